@@ -0,0 +1,47 @@
+"""projects shard sequence
+
+Optional, run against every shard (DB_CONFIG) with its index and number of shards:
+
+    DB_CONFIG=<shard url> alembic -x shard_index=1 -x shard_count=4 upgrade head
+
+Shard i then hands out project ids i + 1, i + 1 + shard_count, ...
+
+Revision ID: 0d5e9b3a7c42
+Revises: f4a8d2c6e913
+Create Date: 2026-10-19 18:02:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0d5e9b3a7c42'
+down_revision: Union[str, None] = 'f4a8d2c6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def set_projects_sequence(shard_index: int, shard_count: int) -> None:
+    '''
+    Next id above existing projects that belongs to the shard.
+    '''
+    max_project_id = op.get_bind().execute(sa.text('SELECT COALESCE(MAX(project_id), 0) FROM projects')).scalar()
+    start = max_project_id + 1 + (shard_index - max_project_id) % shard_count
+    op.execute(
+        f'ALTER SEQUENCE projects_project_id_seq INCREMENT BY {shard_count} START WITH {start} RESTART WITH {start}'
+    )
+
+
+def upgrade() -> None:
+    x_arguments = context.get_x_argument(as_dictionary=True)
+    if 'shard_count' in x_arguments:
+        set_projects_sequence(int(x_arguments['shard_index']), int(x_arguments['shard_count']))
+
+
+def downgrade() -> None:
+    max_project_id = op.get_bind().execute(sa.text('SELECT COALESCE(MAX(project_id), 0) FROM projects')).scalar()
+    op.execute(
+        f'ALTER SEQUENCE projects_project_id_seq INCREMENT BY 1 START WITH 1 RESTART WITH {max_project_id + 1}'
+    )
@@ -0,0 +1,38 @@
+"""projects hull index
+
+Revision ID: 2f6a9c0d1e8b
+Revises: 7c82da390b6b
+Create Date: 2026-10-19 13:05:44.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import geoalchemy2
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6a9c0d1e8b'
+down_revision: Union[str, None] = '7c82da390b6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('hull', geoalchemy2.types.Geometry(spatial_index=False, from_text='ST_GeomFromEWKT', name='geometry'), nullable=True))
+    op.execute('''
+        UPDATE projects p
+        SET hull = s.hull
+        FROM (
+            SELECT project_id, ST_ConvexHull(ST_Collect(geometry)) AS hull
+            FROM features
+            GROUP BY project_id
+        ) AS s
+        WHERE p.project_id = s.project_id
+    ''')
+    op.create_index('ix_projects_hull', 'projects', ['hull'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_hull', table_name='projects', postgresql_using='gist')
+    op.drop_column('projects', 'hull')
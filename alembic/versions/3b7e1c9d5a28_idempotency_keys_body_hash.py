@@ -0,0 +1,25 @@
+"""idempotency keys body hash
+
+Revision ID: 3b7e1c9d5a28
+Revises: 0d5e9b3a7c42
+Create Date: 2026-10-20 09:14:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1c9d5a28'
+down_revision: Union[str, None] = '0d5e9b3a7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('idempotency_keys', sa.Column('body_hash', sa.VARCHAR(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('idempotency_keys', 'body_hash')
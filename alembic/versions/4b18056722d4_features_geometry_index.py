@@ -0,0 +1,25 @@
+"""features geometry index
+
+Revision ID: 4b18056722d4
+Revises: 81d8cbea476e
+Create Date: 2026-10-19 11:40:52.113870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b18056722d4'
+down_revision: Union[str, None] = '81d8cbea476e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_features_geometry', 'features', ['geometry'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_features_geometry', table_name='features', postgresql_using='gist')
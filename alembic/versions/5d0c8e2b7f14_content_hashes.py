@@ -0,0 +1,31 @@
+"""content hashes
+
+Revision ID: 5d0c8e2b7f14
+Revises: b3e1d47a9c25
+Create Date: 2026-10-19 14:37:02.915746
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c8e2b7f14'
+down_revision: Union[str, None] = 'b3e1d47a9c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('content_hash', sa.VARCHAR(length=64), nullable=True))
+    op.create_index(op.f('ix_projects_content_hash'), 'projects', ['content_hash'], unique=False)
+    op.add_column('features', sa.Column('geometry_hash', sa.VARCHAR(length=32), sa.Computed('md5(ST_AsEWKB(geometry))', persisted=True), nullable=True))
+    op.create_index(op.f('ix_features_geometry_hash'), 'features', ['geometry_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_features_geometry_hash'), table_name='features')
+    op.drop_column('features', 'geometry_hash')
+    op.drop_index(op.f('ix_projects_content_hash'), table_name='projects')
+    op.drop_column('projects', 'content_hash')
@@ -0,0 +1,75 @@
+"""project stats
+
+Revision ID: 7c82da390b6b
+Revises: 4b18056722d4
+Create Date: 2026-10-19 12:31:07.552914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7c82da390b6b'
+down_revision: Union[str, None] = '4b18056722d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('extent', postgresql.ARRAY(sa.Float()), nullable=True))
+    op.add_column('projects', sa.Column('feature_count', sa.INTEGER(), server_default=sa.text('0'), nullable=False))
+    op.add_column('projects', sa.Column('vertex_count', sa.BIGINT(), server_default=sa.text('0'), nullable=False))
+    op.add_column('projects', sa.Column('area', sa.Float(), server_default=sa.text('0'), nullable=False))
+    op.add_column('projects', sa.Column('geometry_types', sa.JSON(), nullable=True))
+    op.execute('''
+        WITH feature_stats AS (
+            SELECT
+                project_id,
+                ST_Extent(geometry) AS extent,
+                COUNT(*) AS feature_count,
+                SUM(ST_NPoints(geometry)) AS vertex_count,
+                COALESCE(
+                    SUM(ST_Area(geometry::geography)) FILTER (
+                        WHERE ST_Dimension(geometry) = 2
+                        AND ST_XMin(geometry) >= -180 AND ST_XMax(geometry) <= 180
+                        AND ST_YMin(geometry) >= -90 AND ST_YMax(geometry) <= 90
+                    ),
+                    0
+                ) AS area
+            FROM features
+            GROUP BY project_id
+        ),
+        geometry_type_stats AS (
+            SELECT project_id, JSON_OBJECT_AGG(geometry_type, geometry_type_count) AS geometry_types
+            FROM (
+                SELECT
+                    project_id,
+                    replace(ST_GeometryType(geometry), 'ST_', '') AS geometry_type,
+                    COUNT(*) AS geometry_type_count
+                FROM features
+                GROUP BY 1, 2
+            ) AS t
+            GROUP BY project_id
+        )
+        UPDATE projects p
+        SET
+            extent = ARRAY[ST_XMin(s.extent), ST_YMin(s.extent), ST_XMax(s.extent), ST_YMax(s.extent)],
+            feature_count = s.feature_count,
+            vertex_count = s.vertex_count,
+            area = s.area,
+            geometry_types = t.geometry_types
+        FROM feature_stats s
+        JOIN geometry_type_stats t ON (s.project_id = t.project_id)
+        WHERE p.project_id = s.project_id
+    ''')
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'geometry_types')
+    op.drop_column('projects', 'area')
+    op.drop_column('projects', 'vertex_count')
+    op.drop_column('projects', 'feature_count')
+    op.drop_column('projects', 'extent')
@@ -0,0 +1,32 @@
+"""projects date range index
+
+Revision ID: 81d8cbea476e
+Revises: e6db184953cd
+Create Date: 2026-10-19 11:02:17.540931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81d8cbea476e'
+down_revision: Union[str, None] = 'e6db184953cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_projects_date_range',
+        'projects',
+        [sa.text("daterange(start_date, end_date, '[]')")],
+        unique=False,
+        postgresql_using='gist',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_date_range', table_name='projects', postgresql_using='gist')
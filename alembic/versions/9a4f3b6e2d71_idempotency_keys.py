@@ -0,0 +1,36 @@
+"""idempotency keys
+
+Revision ID: 9a4f3b6e2d71
+Revises: 5d0c8e2b7f14
+Create Date: 2026-10-19 15:12:26.480153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3b6e2d71'
+down_revision: Union[str, None] = '5d0c8e2b7f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('key', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('fingerprint', sa.VARCHAR(length=64), nullable=False),
+    sa.Column('status_code', sa.INTEGER(), nullable=True),
+    sa.Column('content_type', sa.VARCHAR(length=255), nullable=True),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
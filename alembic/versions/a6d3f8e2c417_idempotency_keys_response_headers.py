@@ -0,0 +1,25 @@
+"""idempotency keys response headers
+
+Revision ID: a6d3f8e2c417
+Revises: 3b7e1c9d5a28
+Create Date: 2026-10-19 18:02:37.514290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3f8e2c417'
+down_revision: Union[str, None] = '3b7e1c9d5a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('idempotency_keys', sa.Column('response_headers', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('idempotency_keys', 'response_headers')
@@ -0,0 +1,30 @@
+"""features levels of detail
+
+Revision ID: b3e1d47a9c25
+Revises: 2f6a9c0d1e8b
+Create Date: 2026-10-19 13:48:19.630457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import geoalchemy2
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e1d47a9c25'
+down_revision: Union[str, None] = '2f6a9c0d1e8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('features', sa.Column('geometry_lod1', geoalchemy2.types.Geometry(spatial_index=False, from_text='ST_GeomFromEWKT', name='geometry'), sa.Computed('ST_Simplify(geometry, 0.0001, true)', persisted=True), nullable=True))
+    op.add_column('features', sa.Column('geometry_lod2', geoalchemy2.types.Geometry(spatial_index=False, from_text='ST_GeomFromEWKT', name='geometry'), sa.Computed('ST_Simplify(geometry, 0.001, true)', persisted=True), nullable=True))
+    op.add_column('features', sa.Column('geometry_lod3', geoalchemy2.types.Geometry(spatial_index=False, from_text='ST_GeomFromEWKT', name='geometry'), sa.Computed('ST_Simplify(geometry, 0.01, true)', persisted=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('features', 'geometry_lod3')
+    op.drop_column('features', 'geometry_lod2')
+    op.drop_column('features', 'geometry_lod1')
@@ -0,0 +1,92 @@
+"""features hash partitioning
+
+Optional, features are partitioned only when number of partitions is given:
+
+    alembic -x features_partitions=16 upgrade head
+
+On an upgraded database switch with python -m app.cli partition-features 16
+(app/services/partitioning.py), which does not need downgrades.
+
+Queries bounded by project_id touch one partition, queries over features of
+all projects (nearest, overlaps, bbox filter, unfiltered list) scan all of them.
+
+Revision ID: c81f0e4d6a59
+Revises: e2c7a5f19b03
+Create Date: 2026-10-19 16:44:13.385120
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f0e4d6a59'
+down_revision: Union[str, None] = 'e2c7a5f19b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FEATURES_INDEXES = ('ix_features_project_id', 'ix_features_geometry', 'ix_features_geometry_hash')
+
+
+def features_table_sql(table: str, partitions: int) -> str:
+    return f'''
+        CREATE TABLE {table} (
+            feature_id BIGINT NOT NULL DEFAULT nextval('features_feature_id_seq'::regclass),
+            geometry geometry NOT NULL,
+            geometry_lod1 geometry GENERATED ALWAYS AS (ST_Simplify(geometry, 0.0001, true)) STORED,
+            geometry_lod2 geometry GENERATED ALWAYS AS (ST_Simplify(geometry, 0.001, true)) STORED,
+            geometry_lod3 geometry GENERATED ALWAYS AS (ST_Simplify(geometry, 0.01, true)) STORED,
+            geometry_hash VARCHAR(32) GENERATED ALWAYS AS (md5(ST_AsEWKB(geometry))) STORED,
+            properties JSON,
+            project_id BIGINT NOT NULL REFERENCES projects (project_id) ON DELETE CASCADE,
+            {"PRIMARY KEY (feature_id, project_id)" if partitions else "PRIMARY KEY (feature_id)"}
+        ) {"PARTITION BY HASH (project_id)" if partitions else ""}
+    '''
+
+
+def features_partitioned() -> bool:
+    return op.get_bind().execute(sa.text('''
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'features'::regclass)
+    ''')).scalar()
+
+
+def rebuild_features(partitions: int) -> None:
+    '''
+    Copies features into a new (partitioned or regular) table,
+    indexes are built after the copy.
+    '''
+    op.execute('ALTER TABLE features RENAME TO features_old')
+    op.execute('ALTER TABLE features_old RENAME CONSTRAINT features_pkey TO features_old_pkey')
+    for index in FEATURES_INDEXES:
+        op.execute(f'ALTER INDEX {index} RENAME TO {index}_old')
+
+    op.execute(features_table_sql('features', partitions))
+    for remainder in range(partitions):
+        op.execute(f'''
+            CREATE TABLE features_p{remainder} PARTITION OF features
+            FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+        ''')
+    op.execute('''
+        INSERT INTO features (feature_id, geometry, properties, project_id)
+        SELECT feature_id, geometry, properties, project_id FROM features_old
+    ''')
+    op.execute('ALTER SEQUENCE features_feature_id_seq OWNED BY features.feature_id')
+    op.execute('DROP TABLE features_old')
+
+    op.create_index('ix_features_project_id', 'features', ['project_id'], unique=False)
+    op.create_index('ix_features_geometry', 'features', ['geometry'], unique=False, postgresql_using='gist')
+    op.create_index('ix_features_geometry_hash', 'features', ['geometry_hash'], unique=False)
+    op.execute('ANALYZE features')
+
+
+def upgrade() -> None:
+    partitions = int(context.get_x_argument(as_dictionary=True).get('features_partitions', 0))
+    if partitions and not features_partitioned():
+        rebuild_features(partitions)
+
+
+def downgrade() -> None:
+    if features_partitioned():
+        rebuild_features(0)
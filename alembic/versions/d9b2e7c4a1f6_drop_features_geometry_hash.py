@@ -0,0 +1,27 @@
+"""drop features geometry hash
+
+Revision ID: d9b2e7c4a1f6
+Revises: a6d3f8e2c417
+Create Date: 2026-10-19 18:41:09.862375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b2e7c4a1f6'
+down_revision: Union[str, None] = 'a6d3f8e2c417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_features_geometry_hash'), table_name='features')
+    op.drop_column('features', 'geometry_hash')
+
+
+def downgrade() -> None:
+    op.add_column('features', sa.Column('geometry_hash', sa.VARCHAR(length=32), sa.Computed('md5(ST_AsEWKB(geometry))', persisted=True), nullable=True))
+    op.create_index(op.f('ix_features_geometry_hash'), 'features', ['geometry_hash'], unique=False)
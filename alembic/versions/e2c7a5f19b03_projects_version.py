@@ -0,0 +1,25 @@
+"""projects version
+
+Revision ID: e2c7a5f19b03
+Revises: 9a4f3b6e2d71
+Create Date: 2026-10-19 15:58:41.027736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7a5f19b03'
+down_revision: Union[str, None] = '9a4f3b6e2d71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('version', sa.INTEGER(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'version')
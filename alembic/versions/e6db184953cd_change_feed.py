@@ -0,0 +1,34 @@
+"""change feed
+
+Revision ID: e6db184953cd
+Revises: 87f1757ced27
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6db184953cd'
+down_revision: Union[str, None] = '87f1757ced27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_projects_updated_at', 'projects', ['updated_at', 'project_id'], unique=False)
+    op.create_table('project_tombstones',
+    sa.Column('project_id', sa.BIGINT(), autoincrement=False, nullable=False),
+    sa.Column('deleted_at', postgresql.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    op.create_index('ix_project_tombstones_deleted_at', 'project_tombstones', ['deleted_at', 'project_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_tombstones_deleted_at', table_name='project_tombstones')
+    op.drop_table('project_tombstones')
+    op.drop_index('ix_projects_updated_at', table_name='projects')
@@ -0,0 +1,49 @@
+"""projects soft delete
+
+Revision ID: f4a8d2c6e913
+Revises: c81f0e4d6a59
+Create Date: 2026-10-19 17:21:05.618342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8d2c6e913'
+down_revision: Union[str, None] = 'c81f0e4d6a59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True))
+    op.drop_constraint('projects_name_start_date_end_date_key', 'projects', type_='unique')
+    op.create_index(
+        'ix_projects_name_dates',
+        'projects',
+        ['name', 'start_date', 'end_date'],
+        unique=True,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_projects_deleted_at',
+        'projects',
+        ['deleted_at'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM projects WHERE deleted_at IS NOT NULL')
+    op.drop_index('ix_projects_deleted_at', table_name='projects')
+    op.drop_index('ix_projects_name_dates', table_name='projects')
+    op.create_unique_constraint(
+        'projects_name_start_date_end_date_key',
+        'projects',
+        ['name', 'start_date', 'end_date'],
+    )
+    op.drop_column('projects', 'deleted_at')
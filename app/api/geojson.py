@@ -1,13 +1,309 @@
+from more_itertools import chunked
 from pydantic import ValidationError
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, tuple_, TextClause
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
 from sqlalchemy.sql import text, and_
-from typing import Optional, Any
+from typing import Optional, Any, Sequence, Union
 from geojson_pydantic import Feature, FeatureCollection
+import functools
+import hashlib
 import json
+import math
+from datetime import datetime
 
+from app.config import config
 from app.models import Project as ProjectModel, Feature as FeatureModel
+from app.models.geojson import GEOMETRY_LEVELS_OF_DETAIL
+from app.schemas.geojson import GeometryValidity, ProjectBatchItemSchema, ProjectCreateSchema
+from app.services.notifications import PROJECT_CHANGES_CHANNEL
+
+
+FEATURES_CHUNK_SIZE = 10000
+FEATURES_STAGING_COLUMNS = ("project_id", "properties", "geometry")
+
+insert_features_stmt = text('''
+    insert into features (project_id, properties, geometry) values
+    (:project_id, :properties, ST_GeomFromGeoJson(:geometry))
+''')
+
+create_features_staging_sql = '''
+    CREATE TEMPORARY TABLE features_staging (
+        project_id BIGINT,
+        properties TEXT,
+        geometry TEXT
+    ) ON COMMIT DROP
+'''
+
+notify_project_changes_sql = '''
+    SELECT pg_notify(
+        :channel,
+        json_build_object('project_id', project_id, 'change', CAST(:change AS text))::text
+    )
+    FROM unnest(CAST(:project_ids AS bigint[])) AS project_id
+'''
+
+match_scenes_sql = '''
+    WITH scenes AS (
+        SELECT
+            scene.ordinality - 1 AS scene_index,
+            ST_GeomFromGeoJSON(scene.value->'footprint') AS footprint,
+            (scene.value->>'acquisition_date')::date AS acquisition_date
+        FROM json_array_elements(CAST(:scenes AS json)) WITH ORDINALITY AS scene(value, ordinality)
+    )
+    SELECT
+        s.scene_index AS scene_index,
+        f.project_id AS project_id,
+        ARRAY_AGG(f.feature_id ORDER BY f.feature_id) AS feature_ids
+    FROM scenes s
+    JOIN projects p
+        ON ST_Intersects(p.hull, s.footprint)
+        AND daterange(p.start_date, p.end_date, '[]') @> s.acquisition_date
+        AND p.deleted_at IS NULL
+    JOIN features f
+        ON f.project_id = p.project_id
+        AND ST_Intersects(f.geometry, s.footprint)
+    GROUP BY s.scene_index, f.project_id
+    ORDER BY s.scene_index, f.project_id
+'''
+
+NEAREST_POINT_SQL = "ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)"
+NEAREST_CANDIDATES_FACTOR = 4
+EARTH_RADIUS_M = 6371008.8
+
+refresh_project_stats_sql = '''
+    WITH feature_stats AS (
+        SELECT
+            project_id,
+            ST_Extent(geometry) AS extent,
+            COUNT(*) AS feature_count,
+            SUM(ST_NPoints(geometry)) AS vertex_count,
+            ST_ConvexHull(ST_Collect(geometry)) AS hull,
+            COALESCE(
+                SUM(ST_Area(geometry::geography)) FILTER (
+                    WHERE ST_Dimension(geometry) = 2
+                    AND ST_XMin(geometry) >= -180 AND ST_XMax(geometry) <= 180
+                    AND ST_YMin(geometry) >= -90 AND ST_YMax(geometry) <= 90
+                ),
+                0
+            ) AS area
+        FROM features
+        WHERE project_id = ANY(:project_ids)
+        GROUP BY project_id
+    ),
+    geometry_type_stats AS (
+        SELECT project_id, JSON_OBJECT_AGG(geometry_type, geometry_type_count) AS geometry_types
+        FROM (
+            SELECT
+                project_id,
+                replace(ST_GeometryType(geometry), 'ST_', '') AS geometry_type,
+                COUNT(*) AS geometry_type_count
+            FROM features
+            WHERE project_id = ANY(:project_ids)
+            GROUP BY 1, 2
+        ) AS t
+        GROUP BY project_id
+    )
+    UPDATE projects p
+    SET
+        extent = ARRAY[ST_XMin(s.extent), ST_YMin(s.extent), ST_XMax(s.extent), ST_YMax(s.extent)],
+        feature_count = s.feature_count,
+        vertex_count = s.vertex_count,
+        area = s.area,
+        geometry_types = t.geometry_types,
+        hull = s.hull
+    FROM feature_stats s
+    JOIN geometry_type_stats t ON (s.project_id = t.project_id)
+    WHERE p.project_id = s.project_id
+'''
+
+project_summaries_sql = '''
+    SELECT
+        project_id,
+        name,
+        start_date,
+        end_date,
+        description,
+        created_at,
+        updated_at,
+        version,
+        extent,
+        feature_count,
+        vertex_count,
+        area,
+        geometry_types
+    FROM projects
+'''
+
+INTERSECTION_AREA_SQL = '''
+    CASE WHEN
+        ST_XMin(intersection) >= -180 AND ST_XMax(intersection) <= 180
+        AND ST_YMin(intersection) >= -90 AND ST_YMax(intersection) <= 90
+    THEN ST_Area(intersection::geography)
+    ELSE 0
+    END
+'''
+
+project_overlaps_sql = f'''
+    WITH overlaps AS (
+        SELECT
+            b.project_id AS project_id,
+            ST_Union(ST_Intersection(a.geometry, b.geometry)) AS intersection
+        FROM projects s
+        JOIN projects p
+            ON p.project_id <> s.project_id
+            AND ST_Intersects(p.hull, s.hull)
+            AND p.deleted_at IS NULL
+        JOIN features a
+            ON a.project_id = s.project_id
+        JOIN features b
+            ON b.project_id = p.project_id
+            AND ST_Intersects(a.geometry, b.geometry)
+        WHERE s.project_id = :project_id
+            AND s.deleted_at IS NULL
+        GROUP BY b.project_id
+    )
+    SELECT
+        p.project_id AS project_id,
+        p.name AS name,
+        p.start_date AS start_date,
+        p.end_date AS end_date,
+        {INTERSECTION_AREA_SQL} AS intersection_area,
+        COUNT(*) OVER () AS total
+    FROM overlaps o
+    JOIN projects p
+        ON p.project_id = o.project_id
+    ORDER BY intersection_area DESC, project_id
+    OFFSET :page_start - 1
+    LIMIT :page_end - :page_start + 1
+'''
+
+overlapping_pairs_sql = f'''
+    SELECT
+        project_id,
+        other_project_id,
+        {INTERSECTION_AREA_SQL} AS intersection_area
+    FROM (
+        SELECT
+            a.project_id AS project_id,
+            b.project_id AS other_project_id,
+            ST_Union(ST_Intersection(a.geometry, b.geometry)) AS intersection
+        FROM projects pa
+        JOIN projects pb
+            ON pa.project_id < pb.project_id
+            AND ST_Intersects(pa.hull, pb.hull)
+            AND pb.deleted_at IS NULL
+        JOIN features a
+            ON a.project_id = pa.project_id
+        JOIN features b
+            ON b.project_id = pb.project_id
+            AND ST_Intersects(a.geometry, b.geometry)
+        WHERE pa.deleted_at IS NULL
+        GROUP BY 1, 2
+    ) AS o
+    ORDER BY project_id, other_project_id
+'''
+
+source_project_geometries_sql = '''
+    SELECT
+        encode(ST_AsEWKB(p.hull), 'hex') AS hull,
+        ARRAY_AGG(encode(ST_AsEWKB(f.geometry), 'hex')) AS geometries
+    FROM projects p
+    JOIN features f
+        ON f.project_id = p.project_id
+    WHERE p.project_id = :project_id
+        AND p.deleted_at IS NULL
+    GROUP BY p.project_id
+'''
+
+projects_geometries_sql = '''
+    SELECT
+        p.project_id AS project_id,
+        encode(ST_AsEWKB(p.hull), 'hex') AS hull,
+        ARRAY_AGG(encode(ST_AsEWKB(f.geometry), 'hex')) AS geometries
+    FROM projects p
+    JOIN features f
+        ON f.project_id = p.project_id
+    WHERE p.deleted_at IS NULL
+        AND p.hull IS NOT NULL
+    GROUP BY p.project_id
+    ORDER BY p.project_id
+'''
+
+geometries_overlaps_sql = f'''
+    WITH source AS (
+        SELECT ST_GeomFromEWKB(decode(geometry, 'hex')) AS geometry
+        FROM unnest(CAST(:geometries AS text[])) AS geometry
+    ),
+    overlaps AS (
+        SELECT
+            b.project_id AS project_id,
+            ST_Union(ST_Intersection(a.geometry, b.geometry)) AS intersection
+        FROM projects p
+        JOIN features b
+            ON b.project_id = p.project_id
+        JOIN source a
+            ON ST_Intersects(a.geometry, b.geometry)
+        WHERE p.project_id <> :project_id
+            AND p.deleted_at IS NULL
+            AND ST_Intersects(p.hull, ST_GeomFromEWKB(decode(:hull, 'hex')))
+        GROUP BY b.project_id
+    )
+    SELECT
+        p.project_id AS project_id,
+        p.name AS name,
+        p.start_date AS start_date,
+        p.end_date AS end_date,
+        {INTERSECTION_AREA_SQL} AS intersection_area
+    FROM overlaps o
+    JOIN projects p
+        ON p.project_id = o.project_id
+'''
+
+features_from_staging_sql = '''
+    INSERT INTO features (project_id, properties, geometry)
+    SELECT project_id, properties::json, ST_GeomFromGeoJSON(geometry)
+    FROM features_staging
+'''
+
+invalid_geometries_sql = '''
+    SELECT
+        feature_id,
+        project_id,
+        feature_index,
+        ST_IsValidReason(geometry) AS reason
+    FROM (
+        SELECT
+            feature_id,
+            project_id,
+            row_number() OVER (PARTITION BY project_id ORDER BY feature_id) - 1 AS feature_index,
+            geometry
+        FROM features
+        WHERE project_id = ANY(:project_ids)
+    ) AS project_features
+    WHERE NOT ST_IsValid(geometry)
+    ORDER BY project_id, feature_index
+'''
+
+repair_geometries_sql = '''
+    UPDATE features
+    SET geometry = ST_MakeValid(geometry)
+    WHERE feature_id = ANY(:feature_ids)
+'''
+
+delete_projects_sql = '''
+    DELETE FROM projects
+    WHERE project_id = ANY(:project_ids)
+'''
+
+batch_feature_sql = '''
+    INSERT INTO features (project_id, properties, geometry)
+    SELECT
+        (feature->>'project_id')::bigint,
+        feature->'properties',
+        ST_GeomFromGeoJSON(feature->'geometry')
+    FROM json_array_elements(CAST(:features AS json)) AS feature
+'''
 
 
 def get_geo_data_from_feature(json_data: Feature):
@@ -40,20 +336,129 @@ def get_geo_data_from_feature_collection(json_data: FeatureCollection):
     ).model_dump()
 
 
-def get_features_sql_and_data(
-    project_id: int,
+def get_geo_data(json_data: Any) -> dict[str, Any]:
+    geo_type = json_data.get("type") if isinstance(json_data, dict) else None
+    if geo_type == "Feature":
+        return get_geo_data_from_feature(json_data)
+    if geo_type == "FeatureCollection":
+        return get_geo_data_from_feature_collection(json_data)
+    raise ValueError("Bad geojson format.")
+
+
+def get_feature_rows(
     geo_project_type: str,
     geo_data: dict[str, Any],
-):
+) -> list[dict[str, Any]]:
     if geo_project_type == "Feature":
-        geo_data = [geo_data]
-    else:
-        geo_data = geo_data["features"]
+        return [geo_data]
+    return geo_data["features"]
 
-    feature_sql = '''
-    insert into features (project_id, properties, geometry) values 
-    (:project_id, :properties, ST_GeomFromGeoJson(:geometry))
+
+class InvalidGeometries(Exception):
+    def __init__(self, invalid_features: list[dict[str, Any]]):
+        super().__init__("Invalid geometries")
+        self.invalid_features = invalid_features
+
+
+async def validate_geometries(
+    conn: AsyncConnection,
+    project_ids: Sequence[int],
+    validity: Optional[GeometryValidity],
+) -> list[dict[str, Any]]:
+    '''
+    ST_IsValid of the features stored by the ingest transaction in one statement,
+    returns invalid features as project_id, feature_index and reason.
+    repair replaces their geometries with ST_MakeValid result in place,
+    None skips the check.
     '''
+    if validity is None or not project_ids:
+        return []
+    result = await conn.execute(
+        text(invalid_geometries_sql),
+        {"project_ids": project_ids},
+        execution_options=query_name("invalid_geometries")
+    )
+    invalid = result.fetchall()
+    if invalid and validity == "repair":
+        await conn.execute(
+            text(repair_geometries_sql),
+            {"feature_ids": [row.feature_id for row in invalid]},
+            execution_options=query_name("repair_geometries")
+        )
+    return [
+        {"project_id": row.project_id, "feature_index": row.feature_index, "reason": row.reason}
+        for row in invalid
+    ]
+
+
+async def validate_project_geometries(
+    conn: AsyncConnection,
+    project_ids: list[int],
+    validity: Optional[GeometryValidity],
+    atomic: bool = True,
+) -> tuple[list[Optional[int]], list[dict[str, Any]]]:
+    '''
+    validate_geometries of projects inserted by one transaction,
+    invalid features are returned with item (position in project_ids).
+
+    reject raises InvalidGeometries, so the transaction is rolled back,
+    or with atomic=False deletes the projects with invalid features
+    and returns None in place of their ids.
+    '''
+    items = {project_id: item for item, project_id in enumerate(project_ids)}
+    invalid = [
+        {"item": items[feature.pop("project_id")], **feature}
+        for feature in await validate_geometries(conn, project_ids, validity)
+    ]
+    if not invalid or validity != "reject":
+        return list(project_ids), invalid
+    if atomic:
+        raise InvalidGeometries(invalid)
+    rejected = {feature["item"] for feature in invalid}
+    await conn.execute(
+        text(delete_projects_sql),
+        {"project_ids": [project_ids[item] for item in rejected]},
+        execution_options=query_name("delete_invalid_projects")
+    )
+    return [None if item in rejected else project_id for item, project_id in enumerate(project_ids)], invalid
+
+
+def get_content_hash(geo_data: dict[str, Any]) -> str:
+    '''
+    sha256 of validated geojson serialized with sorted keys,
+    identical uploads get the same hash regardless of formatting.
+    '''
+    content = json.dumps(geo_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def parse_batch_item(line: bytes) -> tuple[dict[str, Any], dict[str, Any]]:
+    try:
+        item = ProjectBatchItemSchema.model_validate_json(line)
+    except ValidationError as e:
+        raise ValueError(f"Bad item format: {e.errors()[0]['msg']}.")
+    try:
+        geo_data = get_geo_data(item.geojson)
+    except ValidationError:
+        raise ValueError("Bad geojson format.")
+    project_model = ProjectCreateSchema(
+        name=item.name,
+        description=item.description,
+        start_date=item.start_date,
+        end_date=item.end_date,
+        geo_project_type=item.geojson["type"],
+        bbox=item.geojson.get("bbox"),
+        content_hash=get_content_hash(geo_data),
+    ).model_dump()
+    return project_model, geo_data
+
+
+def get_features_sql_and_data(
+    project_id: int,
+    geo_project_type: str,
+    geo_data: dict[str, Any],
+):
+    geo_data = get_feature_rows(geo_project_type, geo_data)
 
     geo_data_values = [
         {
@@ -63,51 +468,160 @@ def get_features_sql_and_data(
         }
         for row in geo_data
     ]
-    return {'feature_sql': feature_sql, 'geo_data_values': geo_data_values}
+    return {'feature_sql': insert_features_stmt, 'geo_data_values': geo_data_values}
+
+
+DATE_RELATION_OPERATORS = {
+    "overlaps": "&&",
+    "contains": "@>",
+}
+
+BBOX_ENVELOPE_SQL = "ST_MakeEnvelope(:bbox_xmin, :bbox_ymin, :bbox_xmax, :bbox_ymax, 4326)"
+
+
+def projects_filter_sql(filters: Optional[dict[str, Any]] = None) -> str:
+    '''
+    Conditions on projects table of the list filters present in filters,
+    filter values are bound as parameters of the same names.
+
+    daterange expression matches ix_projects_date_range GiST index.
+    bbox is matched against projects hull (ix_projects_hull GiST index) first,
+    features of the remaining projects only are checked.
+    '''
+    filters = filters or {}
+    conditions = []
+    if "project_ids" in filters:
+        conditions.append("project_id = ANY(:project_ids)")
+    if "name_prefix" in filters:
+        conditions.append("starts_with(name, :name_prefix)")
+    if filters.get("date_relation"):
+        conditions.append(
+            f"daterange(start_date, end_date, '[]') {DATE_RELATION_OPERATORS[filters['date_relation']]} "
+            "daterange(:date_from, :date_to, '[]')"
+        )
+    if "min_feature_count" in filters:
+        conditions.append("feature_count >= :min_feature_count")
+    if "max_feature_count" in filters:
+        conditions.append("feature_count <= :max_feature_count")
+    if "min_area" in filters:
+        conditions.append("area >= :min_area")
+    if "max_area" in filters:
+        conditions.append("area <= :max_area")
+    if "geometry_type" in filters:
+        conditions.append("geometry_types->>CAST(:geometry_type AS text) IS NOT NULL")
+    if "bbox_xmin" in filters:
+        conditions.append(
+            f"ST_Intersects(hull, {BBOX_ENVELOPE_SQL}) "
+            "AND EXISTS ("
+            "SELECT 1 FROM features f WHERE f.project_id = projects.project_id "
+            f"AND ST_Intersects(f.geometry, {BBOX_ENVELOPE_SQL})"
+            ")"
+        )
+    return " AND ".join(conditions)
+
+
+def geometry_column(zoom: Optional[int] = None, tolerance: Optional[float] = None) -> str:
+    '''
+    Coarsest precomputed level of detail not simplified more than requested,
+    zoom is converted to tolerance of one 256px web map tile pixel.
+    '''
+    if zoom is not None:
+        tolerance = 360 / (256 * 2 ** zoom)
+    if tolerance is None:
+        return "geometry"
+    column = "geometry"
+    for level_column, level_tolerance in GEOMETRY_LEVELS_OF_DETAIL.items():
+        if level_tolerance <= tolerance:
+            column = level_column
+    return column
+
+
+def filters_variant(filters: Optional[dict[str, Any]] = None) -> tuple[tuple[str, Any], ...]:
+    '''
+    Part of filters the generated SQL depends on: names of present filters and date relation,
+    filter values are bound as parameters.
+    '''
+    return tuple(sorted(
+        (name, value if name == "date_relation" else None)
+        for name, value in (filters or {}).items()
+    ))
 
 
 def fetch_projects_stmt(
     project_id: Optional[int] = None,
+    project_ids: Optional[list[int]] = None,
     page_start: Optional[int] = None,
     page_end: Optional[int] = None,
-):
-    select_stmt = '''
-        WITH cte_feat AS (
+    filters: Optional[dict[str, Any]] = None,
+    geometry_column: str = "geometry",
+) -> TextClause:
     '''
+    Statement of the variant is built once and reused, so its SQL string
+    is a hit in the SQLAlchemy compiled cache and the prepared statement cache.
+    '''
+    if project_id:
+        return fetch_projects_variant("project_id", (), geometry_column)
+    if project_ids:
+        return fetch_projects_variant("project_ids", (), geometry_column)
     if page_start and page_end:
-        '''
-        DENSE_RANK is used to rank projects for pagination.
+        return fetch_projects_variant("page", filters_variant(filters), geometry_column)
+    return fetch_projects_variant("filters", filters_variant(filters), geometry_column)
 
-        project_id cannot be used for filtering for pagination
-        because there can be gaps in data because projects can be deleted.
 
-        Filtering projects in the first CTE allows to limit rows aggregation
-        what will result in faster query.
-        '''
-        select_stmt += '''
-            SELECT * FROM
-            ( SELECT
-                DENSE_RANK() OVER (ORDER BY project_id) as project_rank,
-        '''
-    else:
-        select_stmt += '''
+@functools.lru_cache(maxsize=None)
+def fetch_projects_variant(
+    selection: str,
+    filters: tuple[tuple[str, Any], ...],
+    geometry_column: str,
+) -> TextClause:
+    filter_sql = projects_filter_sql(dict(filters))
+    select_stmt = f'''
+        WITH cte_feat AS (
             SELECT
-        '''
-    select_stmt += '''
                 'Feature' AS type,
                 properties::json AS properties,
-                ST_AsGeoJSON(geometry)::json AS geometry,
+                ST_AsGeoJSON({geometry_column})::json AS geometry,
                 project_id AS project_id
     '''
-    if project_id:
+    if selection == "project_id":
         select_stmt += '''
             FROM features
             WHERE project_id = :project_id
         '''
-    elif page_start and page_end:
+    elif selection == "project_ids":
         select_stmt += '''
-            FROM features) AS temp_features
-            WHERE project_rank BETWEEN :page_start AND :page_end
+            FROM features
+            WHERE project_id = ANY(:project_ids)
+        '''
+    elif selection == "page":
+        '''
+        Projects are ranked by position in the projects table for pagination.
+
+        project_id cannot be used for filtering for pagination
+        because there can be gaps in data because projects can be deleted.
+
+        Picking the page of project ids first (an index only scan on the
+        projects primary key) limits features lookup and rows aggregation
+        to the projects of the page, what will result in faster query.
+        '''
+        select_stmt += f'''
+            FROM features
+            WHERE project_id IN (
+                SELECT project_id FROM projects
+                WHERE deleted_at IS NULL
+                {"AND " + filter_sql if filter_sql else ""}
+                ORDER BY project_id
+                OFFSET :page_start - 1
+                LIMIT :page_end - :page_start + 1
+            )
+        '''
+    elif filter_sql:
+        select_stmt += f'''
+            FROM features
+            WHERE project_id IN (
+                SELECT project_id FROM projects
+                WHERE deleted_at IS NULL AND {filter_sql}
+            )
         '''
     else:
         select_stmt += '''
@@ -126,6 +640,12 @@ def fetch_projects_stmt(
                 p.geo_project_type AS geo_project_type,
                 p.created_at AS created_at,
                 p.updated_at AS updated_at,
+                p.version AS version,
+                p.extent AS extent,
+                p.feature_count AS feature_count,
+                p.vertex_count AS vertex_count,
+                p.area AS area,
+                p.geometry_types AS geometry_types,
                 CASE WHEN p.geo_project_type = 'Feature' THEN
                     JSON_AGG(
                         JSON_BUILD_OBJECT(
@@ -147,6 +667,7 @@ def fetch_projects_stmt(
             FROM projects p 
             JOIN cte_feat f 
                 ON (p.project_id = f.project_id)
+            WHERE p.deleted_at IS NULL
             GROUP BY 1, 2, 3, 4, 5, 6, 7
             ORDER BY project_id
         )
@@ -158,6 +679,12 @@ def fetch_projects_stmt(
             description,
             created_at,
             updated_at,
+            version,
+            extent,
+            feature_count,
+            vertex_count,
+            area,
+            geometry_types,
             CASE WHEN geo_project_type = 'Feature' THEN
                 features->0
             ELSE NULL
@@ -172,13 +699,71 @@ def fetch_projects_stmt(
             END AS featurecollection
         FROM cte_feat_json
     '''
-    return select_stmt
+    return text(select_stmt)
+
+
+def query_name(name: str) -> dict[str, str]:
+    return {"query_name": name}
+
+
+async def set_statement_timeout(
+    conn: Union[AsyncConnection, AsyncSession],
+    timeout_ms: int,
+) -> None:
+    '''
+    Applies to the current transaction only (SET LOCAL).
+    '''
+    await conn.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(timeout_ms)},
+    )
+
+
+async def notify_project_changes(
+    conn: Union[AsyncConnection, AsyncSession],
+    project_ids: Sequence[int],
+    change: str,
+) -> None:
+    '''
+    Notifications are delivered to listeners when the transaction commits.
+    '''
+    await conn.execute(
+        text(notify_project_changes_sql),
+        {"channel": PROJECT_CHANGES_CHANNEL, "change": change, "project_ids": project_ids},
+        execution_options=query_name("notify_project_changes")
+    )
+
+
+async def refresh_project_stats(
+    conn: Union[AsyncConnection, AsyncSession],
+    project_ids: Sequence[int],
+) -> None:
+    '''
+    Stores extent, feature count, vertex count, area (m2 of polygonal features
+    in lon/lat range), geometry type histogram and convex hull on the projects rows.
+    '''
+    await conn.execute(
+        text(refresh_project_stats_sql),
+        {"project_ids": project_ids},
+        execution_options=query_name("refresh_project_stats")
+    )
 
 
-async def get_total_and_pages(db_engine: AsyncEngine, size: int) -> tuple[int, int]:
+async def get_total_and_pages(
+    db_engine: AsyncEngine,
+    size: int,
+    filters: Optional[dict[str, Any]] = None,
+) -> tuple[int, int]:
     async with db_engine.connect() as conn:
-        select_stmt = '''SELECT COUNT(DISTINCT project_id) FROM features'''
-        result = await conn.execute(text(select_stmt))
+        filter_sql = projects_filter_sql(filters)
+        select_stmt = '''SELECT COUNT(*) FROM projects WHERE deleted_at IS NULL'''
+        if filter_sql:
+            select_stmt += f''' AND {filter_sql}'''
+        result = await conn.execute(
+            text(select_stmt),
+            filters or {},
+            execution_options=query_name("get_total_and_pages")
+        )
         total = result.fetchone()[0]
         pages = total // size if total % size == 0 else total // size + 1
         return total, pages
@@ -196,13 +781,52 @@ async def project_by_unique_index_exists(
             and_(
                 ProjectModel.name == project_data["name"],
                 ProjectModel.start_date == project_data["start_date"],
-                ProjectModel.end_date == project_data["end_date"]
+                ProjectModel.end_date == project_data["end_date"],
+                ProjectModel.deleted_at.is_(None)
             )
         )
-        result = await conn.execute(query)
+        result = await conn.execute(query, execution_options=query_name("project_by_unique_index_exists"))
         return bool(result.fetchone())
 
 
+async def existing_unique_indexes(
+    db_engine: AsyncEngine,
+    unique_indexes: list[tuple[str, Any, Any]],
+    exclude_project_ids: Sequence[int] = (),
+) -> set[tuple[str, Any, Any]]:
+    if not unique_indexes:
+        return set()
+    async with db_engine.connect() as conn:
+        query = select(
+            ProjectModel.name,
+            ProjectModel.start_date,
+            ProjectModel.end_date).where(
+            tuple_(
+                ProjectModel.name,
+                ProjectModel.start_date,
+                ProjectModel.end_date
+            ).in_(unique_indexes),
+            ProjectModel.deleted_at.is_(None)
+        )
+        if exclude_project_ids:
+            query = query.where(ProjectModel.project_id.not_in(exclude_project_ids))
+        result = await conn.execute(query, execution_options=query_name("existing_unique_indexes"))
+        return {tuple(row) for row in result}
+
+
+async def project_id_by_content_hash(
+    db_engine: AsyncEngine,
+    content_hash: str,
+) -> Optional[int]:
+    async with db_engine.connect() as conn:
+        query = select(ProjectModel.project_id).where(
+            ProjectModel.content_hash == content_hash,
+            ProjectModel.deleted_at.is_(None)
+        ).order_by(ProjectModel.project_id).limit(1)
+        result = await conn.execute(query, execution_options=query_name("project_id_by_content_hash"))
+        return result.scalar()
+
+
 async def fetch_project_by_id(
     db_engine: AsyncEngine,
     project_id: int,
@@ -213,8 +837,8 @@ async def fetch_project_by_id(
             ProjectModel.name,
             ProjectModel.start_date,
             ProjectModel.end_date
-        ).where(ProjectModel.project_id == project_id)
-        result = await conn.execute(query)
+        ).where(ProjectModel.project_id == project_id, ProjectModel.deleted_at.is_(None))
+        result = await conn.execute(query, execution_options=query_name("fetch_project_by_id"))
         return result.fetchone()
 
 
@@ -222,10 +846,15 @@ async def create_project_entry(
     db_engine: AsyncEngine,
     project_data: dict[str, Any],
     geo_data: dict[str, Any],
-):
+    geometry_validity: Optional[GeometryValidity] = None,
+) -> tuple[int, list[dict[str, Any]]]:
+    '''
+    Returns project id and invalid features (validate_project_geometries).
+    '''
     async with db_engine.begin() as trans:
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
         project = insert(ProjectModel).values(**project_data).returning(ProjectModel.project_id)
-        result = await trans.execute(project)
+        result = await trans.execute(project, execution_options=query_name("insert_project"))
         project_id = result.fetchone()[0]
 
         feat_db_vars = get_features_sql_and_data(
@@ -234,11 +863,130 @@ async def create_project_entry(
             geo_data=geo_data,
         )
         await trans.execute(
-            text(feat_db_vars['feature_sql']),
-            feat_db_vars['geo_data_values']
+            feat_db_vars['feature_sql'],
+            feat_db_vars['geo_data_values'],
+            execution_options=query_name("insert_features")
+        )
+        _, invalid_features = await validate_project_geometries(trans, [project_id], geometry_validity)
+        await refresh_project_stats(trans, [project_id])
+        await notify_project_changes(trans, [project_id], "created")
+
+        return project_id, invalid_features
+
+
+async def create_project_entries(
+    db_engine: AsyncEngine,
+    projects_data: list[dict[str, Any]],
+    geo_data: list[dict[str, Any]],
+    geometry_validity: Optional[GeometryValidity] = None,
+    atomic: bool = True,
+) -> tuple[list[Optional[int]], list[dict[str, Any]]]:
+    '''
+    Projects are inserted with one multi-row statement and features
+    with set-based INSERT ... SELECT statements, all in one transaction.
+    Returns project ids and invalid features (validate_project_geometries).
+    '''
+    async with db_engine.begin() as trans:
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
+        result = await trans.execute(
+            insert(ProjectModel).returning(ProjectModel.project_id, sort_by_parameter_order=True),
+            projects_data,
+            execution_options=query_name("insert_projects")
+        )
+        project_ids = list(result.scalars().all())
+
+        features = [
+            {
+                'project_id': project_id,
+                'properties': row['properties'],
+                'geometry': row['geometry'],
+            }
+            for project_id, project_data, project_geo_data in zip(project_ids, projects_data, geo_data)
+            for row in get_feature_rows(project_data["geo_project_type"], project_geo_data)
+        ]
+        for features_chunk in chunked(features, FEATURES_CHUNK_SIZE):
+            await trans.execute(
+                text(batch_feature_sql),
+                {'features': json.dumps(features_chunk)},
+                execution_options=query_name("insert_features_batch")
+            )
+        created_ids, invalid_features = await validate_project_geometries(
+            trans, project_ids, geometry_validity, atomic
+        )
+        kept_ids = [project_id for project_id in created_ids if project_id is not None]
+        await refresh_project_stats(trans, kept_ids)
+        await notify_project_changes(trans, kept_ids, "created")
+
+        return created_ids, invalid_features
+
+
+async def copy_records(
+    driver_connection: Any,
+    driver: str,
+    table: str,
+    columns: tuple[str, ...],
+    records: list[tuple[Any, ...]],
+) -> None:
+    if driver == "asyncpg":
+        await driver_connection.copy_records_to_table(table, records=records, columns=columns)
+        return
+    async with driver_connection.cursor() as cursor:
+        async with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for record in records:
+                await copy.write_row(record)
+
+
+async def copy_project_entries(
+    db_engine: AsyncEngine,
+    projects_data: list[dict[str, Any]],
+    geo_data: list[dict[str, Any]],
+    geometry_validity: Optional[GeometryValidity] = None,
+    atomic: bool = True,
+) -> tuple[list[Optional[int]], list[dict[str, Any]]]:
+    '''
+    Bulk import variant of create_project_entries,
+    features are streamed with COPY into a staging table and converted in one statement.
+    '''
+    async with db_engine.begin() as trans:
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
+        result = await trans.execute(
+            insert(ProjectModel).returning(ProjectModel.project_id, sort_by_parameter_order=True),
+            projects_data,
+            execution_options=query_name("insert_projects")
+        )
+        project_ids = list(result.scalars().all())
+
+        await trans.execute(text(create_features_staging_sql))
+        raw_connection = await trans.get_raw_connection()
+        await copy_records(
+            raw_connection.driver_connection,
+            trans.dialect.driver,
+            "features_staging",
+            FEATURES_STAGING_COLUMNS,
+            [
+                (project_id, json.dumps(row['properties']), json.dumps(row['geometry']))
+                for project_id, project_data, project_geo_data in zip(project_ids, projects_data, geo_data)
+                for row in get_feature_rows(project_data["geo_project_type"], project_geo_data)
+            ]
+        )
+        await trans.execute(
+            text(features_from_staging_sql),
+            execution_options=query_name("insert_features_from_staging")
         )
+        created_ids, invalid_features = await validate_project_geometries(
+            trans, project_ids, geometry_validity, atomic
+        )
+        kept_ids = [project_id for project_id in created_ids if project_id is not None]
+        await refresh_project_stats(trans, kept_ids)
+        await notify_project_changes(trans, kept_ids, "created")
+
+        return created_ids, invalid_features
+
 
-        return project_id
+class ProjectVersionConflict(Exception):
+    def __init__(self, version: int):
+        super().__init__(f"Project version is {version}")
+        self.version = version
 
 
 async def update_project_entry(
@@ -246,61 +994,535 @@ async def update_project_entry(
     project_id: int,
     project_data: dict[str, Any],
     geo_data: Optional[dict[str, Any]] = None,
-):
+    expected_versions: Optional[list[int]] = None,
+    geometry_validity: Optional[GeometryValidity] = None,
+) -> tuple[Optional[int], list[dict[str, Any]]]:
+    '''
+    Compare and set in one UPDATE: expected_versions (If-Match) are checked
+    in the WHERE clause and the version is incremented.
+
+    Returns the new version, None if project does not exist, and invalid
+    features of geo_data (validate_project_geometries),
+    raises ProjectVersionConflict if version does not match.
+    Unique and date range violations raise IntegrityError.
+    '''
     async with db_engine.begin() as trans:
-        project = update(ProjectModel).where(ProjectModel.project_id == project_id).values(**project_data)
-        await trans.execute(project)
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
+        project = update(ProjectModel).where(
+            ProjectModel.project_id == project_id,
+            ProjectModel.deleted_at.is_(None)
+        )
+        if expected_versions is not None:
+            project = project.where(ProjectModel.version.in_(expected_versions))
+        project = project.values(**project_data, version=ProjectModel.version + 1).returning(ProjectModel.version)
+        result = await trans.execute(project, execution_options=query_name("update_project"))
+        version = result.scalar()
+        if version is None:
+            if expected_versions is None:
+                return None, []
+            result = await trans.execute(
+                select(ProjectModel.version).where(
+                    ProjectModel.project_id == project_id,
+                    ProjectModel.deleted_at.is_(None)
+                ),
+                execution_options=query_name("project_version")
+            )
+            current_version = result.scalar()
+            if current_version is None:
+                return None, []
+            raise ProjectVersionConflict(current_version)
+        await notify_project_changes(trans, [project_id], "updated")
 
         if not geo_data:
-            return
+            return version, []
 
         feat_delete_stmt = delete(FeatureModel).where(FeatureModel.project_id == project_id)
-        await trans.execute(feat_delete_stmt)
+        await trans.execute(feat_delete_stmt, execution_options=query_name("delete_features"))
         feat_db_vars = get_features_sql_and_data(
             project_id=project_id,
             geo_project_type=project_data["geo_project_type"],
             geo_data=geo_data,
         )
         await trans.execute(
-            text(feat_db_vars['feature_sql']),
-            feat_db_vars['geo_data_values']
+            feat_db_vars['feature_sql'],
+            feat_db_vars['geo_data_values'],
+            execution_options=query_name("insert_features")
+        )
+        _, invalid_features = await validate_project_geometries(trans, [project_id], geometry_validity)
+        await refresh_project_stats(trans, [project_id])
+        return version, invalid_features
+
+
+async def read_project_unique_indexes(
+    db_engine: AsyncEngine,
+    filters: dict[str, Any],
+):
+    '''
+    project_id, name, start_date and end_date of projects selected by filters.
+    '''
+    query = f'''
+        SELECT project_id, name, start_date, end_date
+        FROM projects
+        WHERE deleted_at IS NULL AND {projects_filter_sql(filters)}
+    '''
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text(query),
+            filters,
+            execution_options=query_name("read_project_unique_indexes")
         )
+        return result.fetchall()
+
+
+async def update_project_entries(
+    db_engine: AsyncEngine,
+    filters: dict[str, Any],
+    project_data: dict[str, Any],
+) -> int:
+    '''
+    One set-based UPDATE of metadata of the selected projects,
+    returns number of updated projects.
+    Unique and date range violations raise IntegrityError.
+    '''
+    set_sql = ", ".join(f"{column} = :{column}" for column in project_data)
+    query = f'''
+        UPDATE projects
+        SET {set_sql}, version = version + 1, updated_at = now()
+        WHERE deleted_at IS NULL AND {projects_filter_sql(filters)}
+        RETURNING project_id
+    '''
+    async with db_engine.begin() as trans:
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
+        result = await trans.execute(
+            text(query),
+            {**filters, **project_data},
+            execution_options=query_name("update_projects")
+        )
+        project_ids = result.scalars().all()
+        await notify_project_changes(trans, project_ids, "updated")
+        return len(project_ids)
 
 
 async def read_project_entry(
     db_engine: AsyncEngine,
-    project_id: int
+    project_id: int,
+    geometry_column: str = "geometry",
 ):
     async with db_engine.connect() as conn:
-        select_stmt = fetch_projects_stmt(project_id=project_id)
-        result = await conn.execute(text(select_stmt), {'project_id': project_id})
+        select_stmt = fetch_projects_stmt(project_id=project_id, geometry_column=geometry_column)
+        result = await conn.execute(
+            select_stmt,
+            {'project_id': project_id},
+            execution_options=query_name("read_project_entry")
+        )
         return result.fetchone()._asdict()
 
 
 async def read_project_entries(
     db_engine: AsyncEngine,
+    filters: Optional[dict[str, Any]] = None,
+    geometry_column: str = "geometry",
 ):
     async with db_engine.connect() as conn:
-        select_stmt = fetch_projects_stmt()
-        result = await conn.execute(text(select_stmt))
+        select_stmt = fetch_projects_stmt(filters=filters, geometry_column=geometry_column)
+        result = await conn.execute(
+            select_stmt,
+            filters or {},
+            execution_options=query_name("read_project_entries")
+        )
         return result.fetchall()
 
 
 async def read_project_entries_with_pagination(
     db_engine: AsyncEngine,
     page_start: int,
-    page_end: int
+    page_end: int,
+    filters: Optional[dict[str, Any]] = None,
+    geometry_column: str = "geometry",
+):
+    async with db_engine.connect() as conn:
+        select_stmt = fetch_projects_stmt(
+            page_start=page_start,
+            page_end=page_end,
+            filters=filters,
+            geometry_column=geometry_column,
+        )
+        result = await conn.execute(
+            select_stmt,
+            {"page_start": page_start, "page_end": page_end, **(filters or {})},
+            execution_options=query_name("read_project_entries_with_pagination")
+        )
+        return result.fetchall()
+
+
+async def read_project_summaries(
+    db_engine: AsyncEngine,
+    filters: Optional[dict[str, Any]] = None,
+):
+    '''
+    Projects rows with stored stats only, features are not read.
+    '''
+    async with db_engine.connect() as conn:
+        filter_sql = projects_filter_sql(filters)
+        select_stmt = project_summaries_sql + ''' WHERE deleted_at IS NULL'''
+        if filter_sql:
+            select_stmt += f''' AND {filter_sql}'''
+        select_stmt += ''' ORDER BY project_id'''
+        result = await conn.execute(
+            text(select_stmt),
+            filters or {},
+            execution_options=query_name("read_project_summaries")
+        )
+        return result.fetchall()
+
+
+async def read_project_ids(
+    db_engine: AsyncEngine,
+    limit: int,
+    filters: Optional[dict[str, Any]] = None,
+) -> list[int]:
+    '''
+    First limit project ids in pagination order.
+    '''
+    async with db_engine.connect() as conn:
+        filter_sql = projects_filter_sql(filters)
+        select_stmt = '''SELECT project_id FROM projects WHERE deleted_at IS NULL'''
+        if filter_sql:
+            select_stmt += f''' AND {filter_sql}'''
+        select_stmt += ''' ORDER BY project_id LIMIT :limit'''
+        result = await conn.execute(
+            text(select_stmt),
+            {"limit": limit, **(filters or {})},
+            execution_options=query_name("read_project_ids")
+        )
+        return list(result.scalars().all())
+
+
+async def read_project_entries_by_ids(
+    db_engine: AsyncEngine,
+    project_ids: list[int],
+    geometry_column: str = "geometry",
 ):
+    if not project_ids:
+        return []
     async with db_engine.connect() as conn:
-        select_stmt = fetch_projects_stmt(page_start=page_start, page_end=page_end)
+        select_stmt = fetch_projects_stmt(project_ids=project_ids, geometry_column=geometry_column)
+        result = await conn.execute(
+            select_stmt,
+            {"project_ids": project_ids},
+            execution_options=query_name("read_project_entries_by_ids")
+        )
+        return result.fetchall()
+
+
+async def read_changes(
+    db_engine: AsyncEngine,
+    since: datetime,
+    after_id: int,
+    limit: int,
+):
+    '''
+    Keyset page of (changed_at, project_id) after the watermark, merged from
+    projects (created or updated) and project_tombstones (deleted).
+
+    Changes younger than the safety lag are not returned yet: timestamps are
+    taken at transaction start, so a write transaction still running could
+    commit a change older than an already returned watermark.
+    '''
+    async with db_engine.connect() as conn:
+        select_stmt = '''
+            SELECT project_id, changed_at, change FROM (
+                (
+                    SELECT project_id, updated_at AS changed_at, 'upsert' AS change
+                    FROM projects
+                    WHERE (updated_at, project_id) > (:since, :after_id)
+                        AND updated_at < now() - make_interval(secs => :lag)
+                        AND deleted_at IS NULL
+                    ORDER BY updated_at, project_id
+                    LIMIT :limit
+                )
+                UNION ALL
+                (
+                    SELECT project_id, deleted_at AS changed_at, 'delete' AS change
+                    FROM project_tombstones
+                    WHERE (deleted_at, project_id) > (:since, :after_id)
+                        AND deleted_at < now() - make_interval(secs => :lag)
+                    ORDER BY deleted_at, project_id
+                    LIMIT :limit
+                )
+            ) AS changes
+            ORDER BY changed_at, project_id
+            LIMIT :limit
+        '''
         result = await conn.execute(
             text(select_stmt),
-            {"page_start": page_start, "page_end": page_end}
+            {
+                "since": since,
+                "after_id": after_id,
+                "lag": config.CHANGE_FEED_SAFETY_LAG_SECONDS,
+                "limit": limit,
+            },
+            execution_options=query_name("read_changes")
+        )
+        return result.fetchall()
+
+
+async def match_scenes(
+    db_engine: AsyncEngine,
+    scenes: list[dict[str, Any]],
+):
+    '''
+    For every scene (footprint, acquisition_date) finds features intersecting
+    the footprint of projects whose date range includes acquisition date.
+
+    All scenes are matched in one statement, projects are pruned by
+    ix_projects_hull and ix_projects_date_range GiST indexes before features are checked.
+    '''
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text(match_scenes_sql),
+            {"scenes": json.dumps(scenes)},
+            execution_options=query_name("match_scenes")
         )
         return result.fetchall()
 
 
-async def delete_project_entry(db_session: AsyncSession, project_id: int) -> None:
-    async with db_session.begin():
-        query = delete(ProjectModel).where(ProjectModel.project_id == project_id)
-        await db_session.execute(query)
+async def project_overlaps(
+    db_engine: AsyncEngine,
+    project_id: int,
+    page_start: int,
+    page_end: int,
+) -> tuple[int, list[dict[str, Any]]]:
+    '''
+    Other projects whose features intersect features of the project,
+    with intersection area in m2, largest first.
+
+    Candidates are pruned by ix_projects_hull, feature pairs are found
+    with ix_features_project_id and ix_features_geometry.
+    '''
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text(project_overlaps_sql),
+            {"project_id": project_id, "page_start": page_start, "page_end": page_end},
+            execution_options=query_name("project_overlaps")
+        )
+        rows = result.fetchall()
+        if rows or page_start == 1:
+            total = rows[0].total if rows else 0
+        else:
+            result = await conn.execute(
+                text(project_overlaps_sql),
+                {"project_id": project_id, "page_start": 1, "page_end": 1},
+                execution_options=query_name("project_overlaps")
+            )
+            row = result.fetchone()
+            total = row.total if row else 0
+        overlaps = [
+            {key: value for key, value in row._asdict().items() if key != "total"}
+            for row in rows
+        ]
+        return total, overlaps
+
+
+async def source_project_geometries(
+    db_engine: AsyncEngine,
+    project_id: int,
+):
+    '''
+    Hull and feature geometries (hex EWKB) of the project,
+    to find its overlaps in other databases.
+    '''
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text(source_project_geometries_sql),
+            {"project_id": project_id},
+            execution_options=query_name("source_project_geometries")
+        )
+        return result.fetchone()
+
+
+async def geometries_overlaps(
+    db_engine: AsyncEngine,
+    project_id: int,
+    hull: str,
+    geometries: list[str],
+) -> list[dict[str, Any]]:
+    '''
+    Projects other than project_id whose features intersect the geometries,
+    with intersection area in m2.
+    '''
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text(geometries_overlaps_sql),
+            {"project_id": project_id, "hull": hull, "geometries": geometries},
+            execution_options=query_name("geometries_overlaps")
+        )
+        return [row._asdict() for row in result]
+
+
+def max_distance_expansion(lat: float, max_distance: float) -> tuple[float, float]:
+    '''
+    Degrees (dx, dy) by which the point is expanded to a box
+    containing all points within max_distance meters on the sphere.
+    '''
+    dy = math.degrees(max_distance / EARTH_RADIUS_M)
+    max_lat = abs(lat) + dy
+    if max_lat >= 90:
+        return 360.0, dy
+    return min(360.0, dy / math.cos(math.radians(max_lat))), dy
+
+
+def nearest_features_stmt(
+    filter_sql: str = "",
+    max_distance: Optional[float] = None,
+) -> str:
+    select_stmt = f'''
+        SELECT
+            f.project_id AS project_id,
+            ST_DistanceSphere(f.geometry, {NEAREST_POINT_SQL}) AS distance
+        FROM features f
+        JOIN projects
+            ON projects.project_id = f.project_id
+            AND projects.deleted_at IS NULL
+    '''
+    if filter_sql:
+        select_stmt += f'''
+            AND {filter_sql}
+        '''
+    if max_distance:
+        select_stmt += f'''
+        WHERE f.geometry && ST_Expand({NEAREST_POINT_SQL}, :dx, :dy)
+        '''
+    select_stmt += f'''
+        ORDER BY f.geometry <-> {NEAREST_POINT_SQL}
+        LIMIT :candidates
+    '''
+    return select_stmt
+
+
+def nearest_within_stmt(filter_sql: str = "") -> str:
+    '''
+    Projects with a feature within :radius meters on the sphere, the box
+    expansion :dx, :dy keeps the ix_features_geometry index in use.
+    '''
+    select_stmt = f'''
+        SELECT
+            f.project_id AS project_id,
+            MIN(ST_DistanceSphere(f.geometry, {NEAREST_POINT_SQL})) AS distance
+        FROM features f
+        JOIN projects
+            ON projects.project_id = f.project_id
+            AND projects.deleted_at IS NULL
+    '''
+    if filter_sql:
+        select_stmt += f'''
+            AND {filter_sql}
+        '''
+    select_stmt += f'''
+        WHERE f.geometry && ST_Expand({NEAREST_POINT_SQL}, :dx, :dy)
+            AND ST_DistanceSphere(f.geometry, {NEAREST_POINT_SQL}) <= :radius
+        GROUP BY f.project_id
+        ORDER BY distance, f.project_id
+        LIMIT :k
+    '''
+    return select_stmt
+
+
+async def nearest_projects(
+    db_engine: AsyncEngine,
+    lon: float,
+    lat: float,
+    k: int,
+    max_distance: Optional[float] = None,
+    filters: Optional[dict[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    '''
+    k projects nearest to the point, distance in meters on the sphere.
+
+    Features are walked in ix_features_geometry index order (<-> distance in degrees)
+    and deduplicated to projects, the candidate window is doubled until it holds
+    k projects or features are exhausted. Degrees are not meters (a degree of longitude
+    shrinks towards the poles), so when the window was cut short the k-th distance
+    in meters bounds a second pass collecting every project within it.
+    '''
+    filters = filters or {}
+    filter_sql = projects_filter_sql(filters)
+    select_stmt = nearest_features_stmt(filter_sql, max_distance)
+    params = {"lon": lon, "lat": lat, **filters}
+    if max_distance:
+        params["dx"], params["dy"] = max_distance_expansion(lat, max_distance)
+
+    candidates = k * NEAREST_CANDIDATES_FACTOR
+    async with db_engine.connect() as conn:
+        while True:
+            result = await conn.execute(
+                text(select_stmt),
+                {**params, "candidates": candidates},
+                execution_options=query_name("nearest_features")
+            )
+            rows = result.fetchall()
+            distances: dict[int, float] = {}
+            for row in rows:
+                if max_distance and row.distance > max_distance:
+                    continue
+                distances[row.project_id] = min(row.distance, distances.get(row.project_id, row.distance))
+            if len(distances) >= k or len(rows) < candidates:
+                break
+            candidates *= 2
+
+        project_ids = sorted(distances, key=lambda project_id: (distances[project_id], project_id))[:k]
+        if len(rows) == candidates and len(project_ids) == k:
+            radius = distances[project_ids[-1]]
+            dx, dy = max_distance_expansion(lat, radius)
+            result = await conn.execute(
+                text(nearest_within_stmt(filter_sql)),
+                {**params, "dx": dx, "dy": dy, "radius": radius, "k": k},
+                execution_options=query_name("nearest_within")
+            )
+            distances.update({row.project_id: row.distance for row in result})
+            project_ids = sorted(distances, key=lambda project_id: (distances[project_id], project_id))[:k]
+        if not project_ids:
+            return []
+        result = await conn.execute(
+            text(project_summaries_sql + ''' WHERE project_id = ANY(:project_ids)'''),
+            {"project_ids": project_ids},
+            execution_options=query_name("read_project_summaries_by_ids")
+        )
+        projects = {row.project_id: row._asdict() for row in result}
+        return [
+            {**projects[project_id], "distance": distances[project_id]}
+            for project_id in project_ids
+            if project_id in projects
+        ]
+
+
+async def delete_project_entries(
+    db_engine: AsyncEngine,
+    filters: dict[str, Any],
+) -> int:
+    '''
+    Soft deletes the selected projects in one statement,
+    returns number of deleted projects.
+    '''
+    query = f'''
+        WITH deleted AS (
+            UPDATE projects SET deleted_at = now()
+            WHERE deleted_at IS NULL AND {projects_filter_sql(filters)}
+            RETURNING project_id
+        ),
+        tombstones AS (
+            INSERT INTO project_tombstones (project_id)
+            SELECT project_id FROM deleted
+        )
+        SELECT project_id FROM deleted
+    '''
+    async with db_engine.begin() as trans:
+        await set_statement_timeout(trans, config.STATEMENT_TIMEOUT_INGEST_MS)
+        result = await trans.execute(
+            text(query),
+            filters,
+            execution_options=query_name("delete_projects")
+        )
+        project_ids = result.scalars().all()
+        await notify_project_changes(trans, project_ids, "deleted")
+        return len(project_ids)
@@ -0,0 +1,342 @@
+'''
+Project operations over all shards: single project operations go to the
+owning shard, lists and spatial queries are fanned out concurrently and
+their results merged in the order of the single database queries.
+'''
+import asyncio
+from datetime import datetime
+from itertools import chain
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api import geojson
+from app.schemas.geojson import GeometryValidity
+from app.services.coalescer import CreateCoalescer
+from app.services.shards import ProjectExists, Shards
+
+
+async def project_by_unique_index_exists(
+    shards: Shards,
+    project_data: dict[str, Any],
+) -> bool:
+    return any(await shards.gather(geojson.project_by_unique_index_exists, project_data))
+
+
+async def existing_unique_indexes(
+    shards: Shards,
+    unique_indexes: list[tuple[str, Any, Any]],
+    exclude_project_ids: Sequence[int] = (),
+) -> set[tuple[str, Any, Any]]:
+    return set().union(*await shards.gather(geojson.existing_unique_indexes, unique_indexes, exclude_project_ids))
+
+
+async def project_id_by_content_hash(
+    shards: Shards,
+    content_hash: str,
+) -> Optional[int]:
+    project_ids = await shards.gather(geojson.project_id_by_content_hash, content_hash)
+    return min((project_id for project_id in project_ids if project_id is not None), default=None)
+
+
+async def fetch_project_by_id(
+    shards: Shards,
+    project_id: int,
+):
+    return await geojson.fetch_project_by_id(shards.for_project(project_id), project_id)
+
+
+async def create_project_entry(
+    shards: Shards,
+    project_data: dict[str, Any],
+    geo_data: dict[str, Any],
+    coalescer: Optional[CreateCoalescer] = None,
+    geometry_validity: Optional[GeometryValidity] = None,
+) -> tuple[int, list[dict[str, Any]]]:
+    '''
+    The placement shard checks the name with its unique index, projects renamed
+    into other shards are checked under the unique index lock.
+    The coalescer takes the lock and checks the names once per batch.
+    '''
+    if coalescer is not None:
+        return await coalescer.create(shards, project_data, geo_data, geometry_validity)
+    engine = shards.for_new_project(project_data)
+    async with shards.unique_index_lock(project_data):
+        other_shards = Shards([other for other in shards.engines if other is not engine])
+        if await project_by_unique_index_exists(other_shards, project_data):
+            raise ProjectExists(project_data["name"])
+        return await geojson.create_project_entry(engine, project_data, geo_data, geometry_validity)
+
+
+async def place_project_entries(
+    shards: Shards,
+    create: Callable[..., Awaitable[tuple[list[Optional[int]], list[dict[str, Any]]]]],
+    projects_data: list[dict[str, Any]],
+    geo_data: list[dict[str, Any]],
+    geometry_validity: Optional[GeometryValidity] = None,
+    atomic: bool = True,
+) -> tuple[list[Optional[int]], list[dict[str, Any]]]:
+    '''
+    Runs create (create_project_entries or copy_project_entries) with the projects
+    of every placement shard concurrently, project ids are returned in input order
+    and invalid features with item of the input.
+
+    A shard rejecting invalid geometries with atomic=True stores none of its projects,
+    their ids are None, the other shards are not affected.
+    '''
+    indexes_by_engine: dict[AsyncEngine, list[int]] = {}
+    for index, project_data in enumerate(projects_data):
+        indexes_by_engine.setdefault(shards.for_new_project(project_data), []).append(index)
+
+    results = await asyncio.gather(*(
+        create(
+            engine,
+            [projects_data[index] for index in indexes],
+            [geo_data[index] for index in indexes],
+            geometry_validity,
+            atomic,
+        )
+        for engine, indexes in indexes_by_engine.items()
+    ), return_exceptions=True)
+    project_ids: dict[int, Optional[int]] = {}
+    invalid_features: list[dict[str, Any]] = []
+    for indexes, result in zip(indexes_by_engine.values(), results):
+        if isinstance(result, geojson.InvalidGeometries):
+            result = [None] * len(indexes), result.invalid_features
+        elif isinstance(result, BaseException):
+            raise result
+        shard_project_ids, shard_invalid_features = result
+        project_ids.update(zip(indexes, shard_project_ids))
+        invalid_features.extend({**feature, "item": indexes[feature["item"]]} for feature in shard_invalid_features)
+    invalid_features.sort(key=lambda feature: (feature["item"], feature["feature_index"]))
+    return [project_ids[index] for index in range(len(projects_data))], invalid_features
+
+
+async def create_project_entries(
+    shards: Shards,
+    projects_data: list[dict[str, Any]],
+    geo_data: list[dict[str, Any]],
+    geometry_validity: Optional[GeometryValidity] = None,
+    atomic: bool = True,
+) -> tuple[list[Optional[int]], list[dict[str, Any]]]:
+    '''
+    One create_project_entries transaction per shard, all or nothing within a shard only.
+    Names are checked on all shards under the unique indexes lock,
+    raises ProjectExists if a project was created or renamed into the batch meanwhile.
+    '''
+    async with shards.unique_indexes_lock():
+        if len(shards) > 1:
+            existing = await existing_unique_indexes(shards, [
+                (project_data["name"], project_data["start_date"], project_data["end_date"])
+                for project_data in projects_data
+            ])
+            if existing:
+                raise ProjectExists(min(existing)[0])
+        return await place_project_entries(
+            shards,
+            geojson.create_project_entries,
+            projects_data,
+            geo_data,
+            geometry_validity,
+            atomic,
+        )
+
+
+async def update_project_entry(
+    shards: Shards,
+    project_id: int,
+    project_data: dict[str, Any],
+    geo_data: Optional[dict[str, Any]] = None,
+    expected_versions: Optional[list[int]] = None,
+    geometry_validity: Optional[GeometryValidity] = None,
+) -> tuple[Optional[int], list[dict[str, Any]]]:
+    '''
+    A changed name or date range is checked against the other shards under
+    the unique index lock, the owning shard checks it with its unique index.
+    '''
+    engine = shards.for_project(project_id)
+    update_args = (project_id, project_data, geo_data, expected_versions, geometry_validity)
+    if len(shards) == 1 or not project_data.keys() & {"name", "start_date", "end_date"}:
+        return await geojson.update_project_entry(engine, *update_args)
+
+    project = await geojson.fetch_project_by_id(engine, project_id)
+    if project is None:
+        return None, []
+    unique_index = {**project._asdict(), **project_data}
+    async with shards.unique_index_lock(unique_index):
+        other_shards = Shards([other for other in shards.engines if other is not engine])
+        if await project_by_unique_index_exists(other_shards, unique_index):
+            raise ProjectExists(unique_index["name"])
+        return await geojson.update_project_entry(engine, *update_args)
+
+
+async def update_project_entries(
+    shards: Shards,
+    filters: dict[str, Any],
+    project_data: dict[str, Any],
+) -> int:
+    '''
+    A date change moves the selected projects to new (name, start_date, end_date),
+    with more than one shard they are checked against each other and all shards
+    under the unique indexes lock, raises ProjectExists on a duplicate.
+    '''
+    if len(shards) == 1 or not project_data.keys() & {"start_date", "end_date"}:
+        return sum(await shards.gather(geojson.update_project_entries, filters, project_data))
+
+    async with shards.unique_indexes_lock():
+        projects = list(chain(*await shards.gather(geojson.read_project_unique_indexes, filters)))
+        unique_indexes: dict[tuple[str, Any, Any], int] = {}
+        for project in projects:
+            unique_index = {**project._asdict(), **project_data}
+            key = (unique_index["name"], unique_index["start_date"], unique_index["end_date"])
+            if unique_indexes.setdefault(key, project.project_id) != project.project_id:
+                raise ProjectExists(key[0])
+        existing = await existing_unique_indexes(
+            shards,
+            [*unique_indexes],
+            [project.project_id for project in projects],
+        )
+        if existing:
+            raise ProjectExists(min(existing)[0])
+        return sum(await shards.gather(geojson.update_project_entries, filters, project_data))
+
+
+async def delete_project_entry(
+    shards: Shards,
+    project_id: int,
+) -> None:
+    await geojson.delete_project_entries(shards.for_project(project_id), {"project_ids": [project_id]})
+
+
+async def delete_project_entries(
+    shards: Shards,
+    filters: dict[str, Any],
+) -> int:
+    return sum(await shards.gather(geojson.delete_project_entries, filters))
+
+
+async def read_project_entry(
+    shards: Shards,
+    project_id: int,
+    geometry_column: str = "geometry",
+):
+    return await geojson.read_project_entry(shards.for_project(project_id), project_id, geometry_column)
+
+
+async def read_project_entries(
+    shards: Shards,
+    filters: Optional[dict[str, Any]] = None,
+    geometry_column: str = "geometry",
+):
+    results = await shards.gather(geojson.read_project_entries, filters, geometry_column)
+    return sorted(chain(*results), key=lambda project: project.project_id)
+
+
+async def read_project_summaries(
+    shards: Shards,
+    filters: Optional[dict[str, Any]] = None,
+):
+    results = await shards.gather(geojson.read_project_summaries, filters)
+    return sorted(chain(*results), key=lambda project: project.project_id)
+
+
+async def get_total_and_pages(
+    shards: Shards,
+    size: int,
+    filters: Optional[dict[str, Any]] = None,
+) -> tuple[int, int]:
+    results = await shards.gather(geojson.get_total_and_pages, size, filters)
+    total = sum(shard_total for shard_total, _ in results)
+    pages = total // size if total % size == 0 else total // size + 1
+    return total, pages
+
+
+async def read_project_entries_by_ids(
+    shards: Shards,
+    project_ids: list[int],
+    geometry_column: str = "geometry",
+):
+    project_ids_by_engine: dict[AsyncEngine, list[int]] = {}
+    for project_id in project_ids:
+        project_ids_by_engine.setdefault(shards.for_project(project_id), []).append(project_id)
+    results = await asyncio.gather(*(
+        geojson.read_project_entries_by_ids(engine, engine_project_ids, geometry_column)
+        for engine, engine_project_ids in project_ids_by_engine.items()
+    ))
+    return sorted(chain(*results), key=lambda project: project.project_id)
+
+
+async def read_project_entries_with_pagination(
+    shards: Shards,
+    page_start: int,
+    page_end: int,
+    filters: Optional[dict[str, Any]] = None,
+    geometry_column: str = "geometry",
+):
+    '''
+    The page is picked from the first page_end project ids of every shard,
+    projects of the page are then read from their shards.
+    '''
+    if len(shards) == 1:
+        return await geojson.read_project_entries_with_pagination(
+            shards.engines[0], page_start, page_end, filters, geometry_column
+        )
+    results = await shards.gather(geojson.read_project_ids, page_end, filters)
+    project_ids = sorted(chain(*results))[page_start - 1:page_end]
+    return await read_project_entries_by_ids(shards, project_ids, geometry_column)
+
+
+async def read_changes(
+    shards: Shards,
+    since: datetime,
+    after_id: int,
+    limit: int,
+):
+    results = await shards.gather(geojson.read_changes, since, after_id, limit)
+    return sorted(chain(*results), key=lambda row: (row.changed_at, row.project_id))[:limit]
+
+
+async def match_scenes(
+    shards: Shards,
+    scenes: list[dict[str, Any]],
+):
+    results = await shards.gather(geojson.match_scenes, scenes)
+    return sorted(chain(*results), key=lambda row: (row.scene_index, row.project_id))
+
+
+async def project_overlaps(
+    shards: Shards,
+    project_id: int,
+    page_start: int,
+    page_end: int,
+) -> tuple[int, list[dict[str, Any]]]:
+    '''
+    Features of the project are read from its shard and intersected
+    with features of every shard, overlaps are ordered and paged here.
+    '''
+    if len(shards) == 1:
+        return await geojson.project_overlaps(shards.engines[0], project_id, page_start, page_end)
+    source = await geojson.source_project_geometries(shards.for_project(project_id), project_id)
+    if source is None or source.hull is None:
+        return 0, []
+    results = await shards.gather(geojson.geometries_overlaps, project_id, source.hull, source.geometries)
+    overlaps = sorted(
+        chain(*results),
+        key=lambda overlap: (-overlap["intersection_area"], overlap["project_id"])
+    )
+    return len(overlaps), overlaps[page_start - 1:page_end]
+
+
+async def nearest_projects(
+    shards: Shards,
+    lon: float,
+    lat: float,
+    k: int,
+    max_distance: Optional[float] = None,
+    filters: Optional[dict[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    results = await shards.gather(geojson.nearest_projects, lon, lat, k, max_distance, filters)
+    return sorted(
+        chain(*results),
+        key=lambda project: (project["distance"], project["project_id"])
+    )[:k]
@@ -0,0 +1,407 @@
+import argparse
+import asyncio
+import json
+import sys
+import zipfile
+from datetime import date
+from itertools import chain
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional, get_args
+
+from more_itertools import chunked
+from pydantic import ValidationError
+from sqlalchemy.sql import text
+
+from app.api.geojson import (
+    copy_project_entries,
+    fetch_projects_stmt,
+    geometries_overlaps,
+    get_content_hash,
+    get_geo_data,
+    overlapping_pairs_sql,
+    parse_batch_item,
+    projects_geometries_sql,
+)
+from app.api.shards import existing_unique_indexes, place_project_entries
+from app.config import config
+from app.schemas.geojson import GeometryValidity, ProjectCreateSchema
+from app.services.database import databasemanager
+from app.services.partitioning import partition_features
+from app.services.shards import Shards
+
+
+GEOJSON_SUFFIXES = (".json", ".geojson")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def iter_sources(path: Path) -> Iterator[tuple[str, IO[bytes]]]:
+    '''
+    Yields open binary files, each one is closed when the next one is requested.
+    '''
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist()):
+                if name.endswith(GEOJSON_SUFFIXES + NDJSON_SUFFIXES):
+                    with archive.open(name) as source:
+                        yield name, source
+        return
+    if path.is_file():
+        with path.open("rb") as source:
+            yield path.name, source
+        return
+    for file_path in sorted(path.rglob("*")):
+        if file_path.is_file() and file_path.suffix in GEOJSON_SUFFIXES + NDJSON_SUFFIXES:
+            with file_path.open("rb") as source:
+                yield str(file_path.relative_to(path)), source
+
+
+def parse_geojson_file(
+    name: str,
+    content: bytes,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    '''
+    Project attributes are taken from the "project" foreign member written by export,
+    otherwise the file name and --start-date / --end-date are used.
+    '''
+    try:
+        json_data = json.loads(content)
+        project = json_data.get("project") or {}
+        geo_data = get_geo_data(json_data)
+        project_model = ProjectCreateSchema.model_validate({
+            "name": project.get("name", Path(name).stem[:32]),
+            "description": project.get("description"),
+            "start_date": project.get("start_date", start_date),
+            "end_date": project.get("end_date", end_date),
+            "geo_project_type": json_data["type"],
+            "bbox": json_data.get("bbox"),
+            "content_hash": get_content_hash(geo_data),
+        }).model_dump()
+    except (json.JSONDecodeError, ValidationError, AttributeError):
+        raise ValueError("Bad file format.")
+    return project_model, geo_data
+
+
+def iter_units(
+    path: Path,
+    batch_size: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> Iterator[tuple[str, list[tuple[str, bytes]]]]:
+    '''
+    Unit of work is a single GeoJSON file or batch_size lines of a NDJSON file,
+    each unit is imported in its own transaction and recorded in the state file.
+    NDJSON files are read line by line, only the current batch is held in memory.
+    '''
+    for name, source in iter_sources(path):
+        if name.endswith(GEOJSON_SUFFIXES):
+            yield name, [(name, source.read())]
+            continue
+        lines = (
+            (f"{name}:{line_number}", line.rstrip(b"\r\n"))
+            for line_number, line in enumerate(source, start=1)
+            if line.strip()
+        )
+        for batch in chunked(lines, batch_size):
+            yield batch[0][0], batch
+
+
+async def import_unit(
+    shards: Shards,
+    items: list[tuple[str, bytes]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    geometry_validity: GeometryValidity = "reject",
+) -> tuple[int, int]:
+    '''
+    Returns numbers of imported and rejected items, items that failed to parse
+    or were rejected for invalid geometries.
+
+    Projects are copied to their placement shards, with more than one shard
+    names are checked again on all shards under the unique indexes lock.
+    '''
+    parsed: dict[tuple[str, date, date], tuple[str, dict[str, Any], dict[str, Any]]] = {}
+    rejected = 0
+    for name, content in items:
+        try:
+            if name.endswith(GEOJSON_SUFFIXES):
+                project_model, geo_data = parse_geojson_file(name, content, start_date, end_date)
+            else:
+                project_model, geo_data = parse_batch_item(content)
+        except ValueError as e:
+            print(f"{name}: {e}", file=sys.stderr)
+            rejected += 1
+            continue
+        unique_index = (project_model["name"], project_model["start_date"], project_model["end_date"])
+        parsed.setdefault(unique_index, (name, project_model, geo_data))
+
+    for unique_index in await existing_unique_indexes(shards, [*parsed]):
+        del parsed[unique_index]
+
+    if not parsed:
+        return 0, rejected
+
+    async with shards.unique_indexes_lock():
+        if len(shards) > 1:
+            for unique_index in await existing_unique_indexes(shards, [*parsed]):
+                del parsed[unique_index]
+        project_ids, invalid_features = await place_project_entries(
+            shards,
+            copy_project_entries,
+            [project_model for _, project_model, _ in parsed.values()],
+            [geo_data for _, _, geo_data in parsed.values()],
+            geometry_validity,
+            atomic=False,
+        )
+    names = [name for name, _, _ in parsed.values()]
+    for feature in invalid_features:
+        name = names[feature["item"]]
+        print(f"{name}: feature {feature['feature_index']}: {feature['reason']} ({geometry_validity})", file=sys.stderr)
+    rejected += project_ids.count(None)
+    return len(project_ids) - project_ids.count(None), rejected
+
+
+async def import_projects(
+    shards: Shards,
+    path: Path,
+    state_file: Optional[Path] = None,
+    concurrency: int = 4,
+    batch_size: int = 500,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    geometry_validity: GeometryValidity = "reject",
+) -> int:
+    '''
+    Imports a directory or zip archive of GeoJSON and NDJSON files.
+
+    Units listed in state_file are skipped, so an interrupted import can be resumed.
+    A unit with rejected items counts as failed and is not recorded, its other items are imported.
+    Projects that already exist (name, start_date, end_date) are skipped as well,
+    projects with invalid geometries too unless geometry_validity is report or repair.
+    '''
+    done = set(state_file.read_text().splitlines()) if state_file and state_file.exists() else set()
+    state = state_file.open("a") if state_file else None
+    semaphore = asyncio.Semaphore(concurrency)
+    imported = 0
+    failed = 0
+
+    async def run(unit: str, items: list[tuple[str, bytes]]):
+        nonlocal imported, failed
+        try:
+            unit_imported, rejected = await import_unit(shards, items, start_date, end_date, geometry_validity)
+            imported += unit_imported
+            if rejected:
+                raise ValueError(f"{rejected} items rejected.")
+        except Exception as e:
+            failed += 1
+            print(f"{unit}: {e}", file=sys.stderr)
+        else:
+            if state:
+                state.write(f"{unit}\n")
+                state.flush()
+        finally:
+            semaphore.release()
+
+    tasks = []
+    try:
+        for unit, items in iter_units(path, batch_size, start_date, end_date):
+            if unit in done:
+                continue
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(run(unit, items)))
+        await asyncio.gather(*tasks)
+    finally:
+        if state:
+            state.close()
+
+    print(f"Imported {imported} projects, {failed} units failed.", file=sys.stderr)
+    return imported
+
+
+async def export_projects(
+    shards: Shards,
+    output: Path,
+    output_format: str = "ndjson",
+) -> int:
+    '''
+    Rows are streamed with a server side cursor, one shard after another.
+    ndjson writes one batch create item per line to output file,
+    geojson writes one <project_id>.geojson file per project to output directory.
+    '''
+    if output_format == "geojson":
+        output.mkdir(parents=True, exist_ok=True)
+        ndjson = None
+    else:
+        ndjson = output.open("w")
+
+    exported = 0
+    try:
+        for db_engine in shards.engines:
+            async with db_engine.connect() as conn:
+                result = await conn.stream(
+                    fetch_projects_stmt(),
+                    execution_options={"yield_per": 100, "query_name": "export_projects"}
+                )
+                async for row in result:
+                    geojson = row.feature or row.featurecollection
+                    project = {
+                        "name": row.name,
+                        "description": row.description,
+                        "start_date": row.start_date.isoformat(),
+                        "end_date": row.end_date.isoformat(),
+                    }
+                    if ndjson:
+                        ndjson.write(json.dumps({**project, "geojson": geojson}) + "\n")
+                    else:
+                        (output / f"{row.project_id}.geojson").write_text(
+                            json.dumps({**geojson, "project": project})
+                        )
+                    exported += 1
+    finally:
+        if ndjson:
+            ndjson.close()
+
+    print(f"Exported {exported} projects.", file=sys.stderr)
+    return exported
+
+
+async def export_overlaps(
+    shards: Shards,
+    output: Path,
+) -> int:
+    '''
+    Writes every pair of overlapping projects (project_id < other_project_id)
+    with intersection area in m2 as NDJSON, rows are streamed with a server side cursor.
+
+    Pairs within a shard are found by one query per shard, then features of every
+    project are intersected with features of the following shards.
+    Pairs are ordered within each of these parts only.
+    '''
+    pairs = 0
+    with output.open("w") as ndjson:
+        for db_engine in shards.engines:
+            async with db_engine.connect() as conn:
+                result = await conn.stream(
+                    text(overlapping_pairs_sql),
+                    execution_options={"yield_per": 1000, "query_name": "overlapping_pairs"}
+                )
+                async for row in result:
+                    ndjson.write(json.dumps(row._asdict()) + "\n")
+                    pairs += 1
+
+        for shard_index, db_engine in enumerate(shards.engines[:-1]):
+            following_shards = Shards(shards.engines[shard_index + 1:])
+            async with db_engine.connect() as conn:
+                result = await conn.stream(
+                    text(projects_geometries_sql),
+                    execution_options={"yield_per": 100, "query_name": "projects_geometries"}
+                )
+                async for source in result:
+                    overlaps = chain(*await following_shards.gather(
+                        geometries_overlaps, source.project_id, source.hull, source.geometries
+                    ))
+                    for overlap in sorted(overlaps, key=lambda overlap: overlap["project_id"]):
+                        project_ids = sorted((source.project_id, overlap["project_id"]))
+                        ndjson.write(json.dumps({
+                            "project_id": project_ids[0],
+                            "other_project_id": project_ids[1],
+                            "intersection_area": overlap["intersection_area"],
+                        }) + "\n")
+                        pairs += 1
+
+    print(f"Found {pairs} overlapping pairs.", file=sys.stderr)
+    return pairs
+
+
+async def partition_shards_features(
+    shards: Shards,
+    partitions: int,
+) -> int:
+    '''
+    Rebuilds the features table of every shard with partitions hash partitions
+    (0 converts back to a regular table), shards that have the layout are skipped.
+    Returns number of rebuilt shards.
+    '''
+    rebuilt = 0
+    for shard_index, db_engine in enumerate(shards.engines):
+        if await partition_features(db_engine, partitions):
+            rebuilt += 1
+            print(f"Shard {shard_index}: features rebuilt with {partitions} partitions.", file=sys.stderr)
+        else:
+            print(f"Shard {shard_index}: features already have {partitions} partitions.", file=sys.stderr)
+    return rebuilt
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="geojson-crud", description="Bulk import and export of projects and batch jobs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="import directory or zip archive of GeoJSON / NDJSON files")
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--state-file", type=Path, help="progress file used to resume interrupted import")
+    import_parser.add_argument("--concurrency", type=int, default=4)
+    import_parser.add_argument("--batch-size", type=int, default=500, help="NDJSON lines per transaction")
+    import_parser.add_argument("--start-date", type=date.fromisoformat, help="start_date of plain GeoJSON files")
+    import_parser.add_argument("--end-date", type=date.fromisoformat, help="end_date of plain GeoJSON files")
+    import_parser.add_argument(
+        "--geometry-validity",
+        choices=get_args(GeometryValidity),
+        default=config.GEOMETRY_VALIDITY,
+        help="skip projects with invalid geometries, import them as they are or repaired",
+    )
+
+    export_parser = subparsers.add_parser("export", help="export projects to NDJSON file or GeoJSON files")
+    export_parser.add_argument("output", type=Path)
+    export_parser.add_argument("--format", dest="output_format", choices=["ndjson", "geojson"], default="ndjson")
+
+    overlaps_parser = subparsers.add_parser("overlaps", help="find all pairs of overlapping projects")
+    overlaps_parser.add_argument("output", type=Path, help="NDJSON output file")
+
+    partition_parser = subparsers.add_parser(
+        "partition-features",
+        help="rebuild features table hash partitioned by project_id, 0 partitions for a regular table",
+    )
+    partition_parser.add_argument("partitions", type=int)
+
+    return parser
+
+
+async def run_command(args: argparse.Namespace) -> None:
+    databasemanager.init(
+        config.DB_CONFIG,
+        echo=config.DB_ECHO,
+        statement_timeout_ms=config.STATEMENT_TIMEOUT_INGEST_MS,
+        slow_query_threshold_ms=config.SLOW_QUERY_THRESHOLD_MS,
+        shard_hosts=config.DB_SHARD_CONFIGS,
+    )
+    try:
+        async with databasemanager.shards() as shards:
+            await shards.check_sequences()
+            if args.command == "import":
+                await import_projects(
+                    shards,
+                    args.path,
+                    state_file=args.state_file,
+                    concurrency=args.concurrency,
+                    batch_size=args.batch_size,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                    geometry_validity=args.geometry_validity,
+                )
+            elif args.command == "export":
+                await export_projects(shards, args.output, args.output_format)
+            elif args.command == "overlaps":
+                await export_overlaps(shards, args.output)
+            elif args.command == "partition-features":
+                await partition_shards_features(shards, args.partitions)
+    finally:
+        await databasemanager.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    asyncio.run(run_command(get_parser().parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
 import os
+from typing import cast, get_args
+
+from app.schemas.geojson import GeometryValidity
+
+
+def geometry_validity(value: str) -> GeometryValidity:
+    if value not in get_args(GeometryValidity):
+        raise ValueError(f"GEOMETRY_VALIDITY must be one of {', '.join(get_args(GeometryValidity))}, got {value!r}.")
+    return cast(GeometryValidity, value)
+
 
 class Config:
     DB_CONFIG = os.getenv(
@@ -10,6 +20,34 @@ class Config:
             POSTGRES_NAME=os.getenv("POSTGRES_NAME"),
         ),
     )
+    DB_SHARD_CONFIGS = [url for url in os.getenv("DB_SHARD_CONFIGS", "").split(",") if url]
+    DB_REPLICA_CONFIGS = [url for url in os.getenv("DB_REPLICA_CONFIGS", "").split(",") if url]
+    READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+    DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+    STATEMENT_TIMEOUT_READ_MS = int(os.getenv("STATEMENT_TIMEOUT_READ_MS", "15000"))
+    STATEMENT_TIMEOUT_INGEST_MS = int(os.getenv("STATEMENT_TIMEOUT_INGEST_MS", "300000"))
+    SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+    CREATE_COALESCE_WINDOW_MS = int(os.getenv("CREATE_COALESCE_WINDOW_MS", "0"))
+    CREATE_COALESCE_MAX_BATCH = int(os.getenv("CREATE_COALESCE_MAX_BATCH", "100"))
+    # coalesced batches are bounded by concurrent ingest requests, let a full batch in when coalescing
+    ADMISSION_MAX_CONCURRENT_INGEST = int(os.getenv(
+        "ADMISSION_MAX_CONCURRENT_INGEST",
+        str(CREATE_COALESCE_MAX_BATCH if CREATE_COALESCE_WINDOW_MS > 0 else 4)
+    ))
+    ADMISSION_MAX_INFLIGHT_BYTES = int(os.getenv("ADMISSION_MAX_INFLIGHT_BYTES", str(512 * 1024 * 1024)))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+    GEOMETRY_VALIDITY = geometry_validity(os.getenv("GEOMETRY_VALIDITY", "reject"))
+    BATCH_CREATE_MAX_ITEMS = int(os.getenv("BATCH_CREATE_MAX_ITEMS", "10000"))
+    CHANGE_FEED_SAFETY_LAG_SECONDS = float(os.getenv("CHANGE_FEED_SAFETY_LAG_SECONDS", "60"))
+    SCENE_MATCH_MAX_SCENES = int(os.getenv("SCENE_MATCH_MAX_SCENES", "100"))
+    IDEMPOTENCY_KEY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "600"))
+    PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "10000"))
+    PURGE_THROTTLE_SECONDS = float(os.getenv("PURGE_THROTTLE_SECONDS", "0.5"))
+    PURGE_IDLE_SECONDS = float(os.getenv("PURGE_IDLE_SECONDS", "30"))
 
 
 config = Config
@@ -1,25 +1,123 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 
 from app.config import config
+from app.services.admission import AdmissionController, AdmissionControlMiddleware
+from app.services.coalescer import CreateCoalescer
 from app.services.database import databasemanager
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.notifications import project_changes_hub
+from app.services.purge import DeletedProjectsPurger
+from app.services.replicas import ReadYourWritesMiddleware
+from app.services.shards import Shards
 from app.routers import main_router
 
 
+QUERY_CANCELED = "57014"
+INGEST_PATHS = (
+    "/geojson/create",
+    "/geojson/batch-create",
+    "/geojson/update",
+    "/geojson/bulk-update",
+    "/geojson/bulk-delete",
+)
+WRITE_PATHS = INGEST_PATHS + (
+    "/geojson/delete",
+)
+
+
+async def database_error_handler(request: Request, exc: Exception):
+    if not isinstance(exc, DBAPIError) or getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED:
+        raise exc
+    return JSONResponse(
+        content={"message": "Database query timed out."},
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT
+    )
+
+
+async def pool_timeout_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        content={"message": "Database is busy, try again later."},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"}
+    )
+
+
 def init_app(init_db=True):
     lifespan = None
 
     if init_db:
-        databasemanager.init(config.DB_CONFIG)
+        databasemanager.init(
+            config.DB_CONFIG,
+            echo=config.DB_ECHO,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            statement_timeout_ms=config.STATEMENT_TIMEOUT_READ_MS,
+            slow_query_threshold_ms=config.SLOW_QUERY_THRESHOLD_MS,
+            replica_hosts=config.DB_REPLICA_CONFIGS,
+            shard_hosts=config.DB_SHARD_CONFIGS,
+            prepared_statement_cache_size=config.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        )
+
+        purgers = [
+            DeletedProjectsPurger(
+                batch_size=config.PURGE_BATCH_SIZE,
+                throttle=config.PURGE_THROTTLE_SECONDS,
+                idle_interval=config.PURGE_IDLE_SECONDS,
+            )
+            for _ in databasemanager._shard_engines
+        ]
 
         @asynccontextmanager
         async def lifespan(app: FastAPI):
+            await Shards(databasemanager._shard_engines).check_sequences()
+            await project_changes_hub.start(*databasemanager._shard_engines)
+            for purger, shard_engine in zip(purgers, databasemanager._shard_engines):
+                await purger.start(shard_engine)
             yield
+            for purger in purgers:
+                await purger.stop()
+            await project_changes_hub.stop()
             if databasemanager._engine is not None:
                 await databasemanager.close()
 
     server = FastAPI(title="FastAPI test server", lifespan=lifespan)
     server.include_router(main_router)
+    server.add_exception_handler(DBAPIError, database_error_handler)
+    server.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+
+    server.state.create_coalescer = None
+    if config.CREATE_COALESCE_WINDOW_MS > 0:
+        server.state.create_coalescer = CreateCoalescer(
+            window=config.CREATE_COALESCE_WINDOW_MS / 1000,
+            max_batch=config.CREATE_COALESCE_MAX_BATCH,
+        )
+    server.state.admission_controller = AdmissionController(
+        max_concurrent=config.ADMISSION_MAX_CONCURRENT_INGEST,
+        max_inflight_bytes=config.ADMISSION_MAX_INFLIGHT_BYTES,
+        queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+        retry_after=config.ADMISSION_RETRY_AFTER,
+    )
+    # idempotency inside admission control, so 429 responses are never stored
+    server.add_middleware(
+        IdempotencyMiddleware,
+        engine=databasemanager.get_engine,
+        ingest_paths=INGEST_PATHS,
+        ttl=config.IDEMPOTENCY_KEY_TTL_SECONDS,
+        lock_timeout=config.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+    )
+    server.add_middleware(
+        AdmissionControlMiddleware,
+        controller=server.state.admission_controller,
+        ingest_paths=INGEST_PATHS,
+    )
+    if config.DB_REPLICA_CONFIGS:
+        server.add_middleware(
+            ReadYourWritesMiddleware,
+            write_paths=WRITE_PATHS,
+            window=config.READ_YOUR_WRITES_SECONDS,
+        )
 
     return server
 
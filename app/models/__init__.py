@@ -1,7 +1,10 @@
-from .geojson import Project, Feature
+from .geojson import Project, Feature, ProjectTombstone
+from .idempotency import IdempotencyKey
 
 
 __all__ = [
     "Project",
     "Feature",
-]
\ No newline at end of file
+    "ProjectTombstone",
+    "IdempotencyKey",
+]
@@ -1,17 +1,21 @@
-from datetime import date
+from datetime import date, datetime
 from geoalchemy2 import Geometry, WKBElement
 from sqlalchemy import (
     ARRAY,
     BIGINT,
     CheckConstraint,
+    Computed,
     Enum,
     Float,
     ForeignKey,
+    Index,
+    INTEGER,
     JSON,
-    UniqueConstraint,
     VARCHAR,
+    func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import DATE
+from sqlalchemy.dialects.postgresql import DATE, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Literal, Optional, get_args
 
@@ -21,12 +25,32 @@ from app.services.database import Base
 
 GeoProjectType = Literal["Feature", "FeatureCollection"]
 
+# simplified geometry columns of features and their tolerances (degrees), finest first
+GEOMETRY_LEVELS_OF_DETAIL = {
+    "geometry_lod1": 0.0001,
+    "geometry_lod2": 0.001,
+    "geometry_lod3": 0.01,
+}
+
 
 class Project(Base, TimestampMixin):
     __tablename__ = "projects"
     __table_args__ = (
         CheckConstraint('end_date >= start_date'),
-        UniqueConstraint('name', 'start_date', 'end_date')
+        Index(
+            'ix_projects_name_dates',
+            'name', 'start_date', 'end_date',
+            unique=True,
+            postgresql_where=text('deleted_at IS NULL'),
+        ),
+        Index('ix_projects_updated_at', 'updated_at', 'project_id'),
+        Index(
+            'ix_projects_date_range',
+            text("daterange(start_date, end_date, '[]')"),
+            postgresql_using='gist',
+        ),
+        Index('ix_projects_hull', 'hull', postgresql_using='gist'),
+        Index('ix_projects_deleted_at', 'deleted_at', postgresql_where=text('deleted_at IS NOT NULL')),
     )
 
     project_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
@@ -41,6 +65,15 @@ class Project(Base, TimestampMixin):
         validate_strings=True,
     ))
     bbox: Mapped[Optional[list[float]]] = mapped_column(ARRAY(Float), nullable=True)
+    extent: Mapped[Optional[list[float]]] = mapped_column(ARRAY(Float), nullable=True)
+    feature_count: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default=text("0"))
+    vertex_count: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
+    area: Mapped[float] = mapped_column(Float, nullable=False, server_default=text("0"))
+    geometry_types: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
+    hull: Mapped[Optional[WKBElement]] = mapped_column(Geometry(spatial_index=False), nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(VARCHAR(64), nullable=True, index=True)
+    version: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default=text("1"))
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
     features: Mapped[list["Feature"]] = relationship(
         "Feature",
         back_populates="project",
@@ -50,9 +83,24 @@ class Project(Base, TimestampMixin):
 
 class Feature(Base):
     __tablename__ = "features"
+    __table_args__ = (
+        Index('ix_features_geometry', 'geometry', postgresql_using='gist'),
+    )
 
     feature_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
     geometry: Mapped[WKBElement] = mapped_column(Geometry(spatial_index=False), nullable=False)
+    geometry_lod1: Mapped[Optional[WKBElement]] = mapped_column(
+        Geometry(spatial_index=False),
+        Computed(f"ST_Simplify(geometry, {GEOMETRY_LEVELS_OF_DETAIL['geometry_lod1']}, true)", persisted=True),
+    )
+    geometry_lod2: Mapped[Optional[WKBElement]] = mapped_column(
+        Geometry(spatial_index=False),
+        Computed(f"ST_Simplify(geometry, {GEOMETRY_LEVELS_OF_DETAIL['geometry_lod2']}, true)", persisted=True),
+    )
+    geometry_lod3: Mapped[Optional[WKBElement]] = mapped_column(
+        Geometry(spatial_index=False),
+        Computed(f"ST_Simplify(geometry, {GEOMETRY_LEVELS_OF_DETAIL['geometry_lod3']}, true)", persisted=True),
+    )
     properties: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
     project_id: Mapped[int] = mapped_column(
         ForeignKey(
@@ -62,3 +110,17 @@ class Feature(Base):
         index=True,
     )
     project: Mapped[Project] = relationship("Project", back_populates="features")
+
+
+class ProjectTombstone(Base):
+    __tablename__ = "project_tombstones"
+    __table_args__ = (
+        Index('ix_project_tombstones_deleted_at', 'deleted_at', 'project_id'),
+    )
+
+    project_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=func.now(),
+    )
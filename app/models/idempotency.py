@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import INTEGER, JSON, Index, LargeBinary, VARCHAR, func
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+
+from app.services.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+
+    key: Mapped[str] = mapped_column(VARCHAR(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(VARCHAR(64), nullable=False)
+    body_hash: Mapped[Optional[str]] = mapped_column(VARCHAR(64), nullable=True)
+    status_code: Mapped[Optional[int]] = mapped_column(INTEGER, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(VARCHAR(255), nullable=True)
+    response_body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    response_headers: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=func.now(),
+    )
@@ -1,50 +1,141 @@
+import asyncio
 import json
 
-from fastapi import APIRouter, Depends, File, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, Header, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
-from typing import Annotated, Union
+from typing import Annotated, List, Literal, Optional, Union
 from app.api.geojson import (
-    create_project_entry,
-    fetch_project_by_id,
+    get_content_hash,
     get_geo_data_from_feature,
     get_geo_data_from_feature_collection,
+    geometry_column,
+    InvalidGeometries,
+    parse_batch_item,
+    ProjectVersionConflict,
+)
+from app.api.shards import (
+    create_project_entries,
+    create_project_entry,
+    existing_unique_indexes,
+    fetch_project_by_id,
     get_total_and_pages,
+    match_scenes,
+    nearest_projects,
+    project_id_by_content_hash,
+    project_overlaps,
+    ProjectExists,
+    read_changes,
     project_by_unique_index_exists,
     read_project_entries,
+    read_project_entries_by_ids,
     read_project_entries_with_pagination,
     read_project_entry,
+    read_project_summaries,
+    update_project_entries,
     update_project_entry,
+    delete_project_entries,
     delete_project_entry
 )
-from app.services.database import get_db_session, get_db_engine
+from app.config import config
+from app.services.database import get_db_read_shards, get_db_shards
+from app.services.shards import Shards
+from app.services.notifications import project_changes_hub
 from app.schemas.geojson import (
+    BatchCreateResponseSchema,
+    GeometryValidity,
     ProjectBaseCreateSchema,
     ProjectCreateSchema,
     ProjectBaseUpdateSchema,
     ProjectUpdateSchema,
-    ProjectResponseSchema
+    ProjectResponseSchema,
+    ProjectSummarySchema
+)
+from app.schemas.bulk import (
+    BulkDeleteResponseSchema,
+    BulkUpdateRequestSchema,
+    BulkUpdateResponseSchema,
+    ProjectSelectionSchema,
 )
-from app.schemas.pagination import PageParams, PagedResponseSchema
+from app.schemas.changes import ChangesParams, ChangesResponseSchema
+from app.schemas.filters import GeometryDetailParams, ProjectFilterParams, ProjectListParams
+from app.schemas.nearest import NearestParams, NearestProjectSchema
+from app.schemas.overlaps import OverlapsResponseSchema
+from app.schemas.scenes import SceneMatchRequestSchema, SceneMatchResponseSchema
+from app.schemas.pagination import PageParams, PagedProjectFilterParams, PagedResponseSchema
 
 
 geojson_router = APIRouter()
 
+UNIQUE_VIOLATION = "23505"
+CHECK_VIOLATION = "23514"
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def if_match_versions(if_match: Optional[str]) -> Optional[List[int]]:
+    '''
+    Versions listed in If-Match header, None when any version matches.
+    If-Match uses strong comparison, so weak ETags (W/"1") and ETags other
+    than project versions match nothing.
+    '''
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def invalid_features_content(invalid_features: List[dict]) -> List[dict]:
+    return [
+        {"feature_index": feature["feature_index"], "reason": feature["reason"]}
+        for feature in invalid_features
+    ]
+
+
+def invalid_geometry_response(filename: Optional[str], invalid_features: List[dict]) -> JSONResponse:
+    return JSONResponse(
+        content={
+            "message": f"Invalid geometry in file: {filename}.",
+            "invalid_features": invalid_features_content(invalid_features),
+        },
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
 
 @geojson_router.post(
     "/create",
     status_code=status.HTTP_201_CREATED
 )
 async def create(
-    db_engine: Annotated[AsyncEngine, Depends(get_db_engine)],
+    request: Request,
+    response: Response,
+    shards: Annotated[Shards, Depends(get_db_shards)],
     project: Annotated[ProjectBaseCreateSchema, Query()],
     file: UploadFile = File(...),
+    on_duplicate: Literal["create", "reject", "reuse"] = "create",
+    geometry_validity: Optional[GeometryValidity] = None,
 ):
+    '''
+    on_duplicate decides what happens when a project with identical geojson content exists:
+    create stores a new copy, reject responds 409 with existing project_id,
+    reuse responds 200 with the existing project and stores nothing.
+
+    geometry_validity (GEOMETRY_VALIDITY by default) decides what happens with invalid geometries:
+    reject responds 422 with reasons, report stores them as they are and lists them,
+    repair stores them fixed with ST_MakeValid and lists them.
+    '''
 
     project_data = project.model_dump(exclude_none=True, exclude_unset=True)
 
-    if await project_by_unique_index_exists(db_engine, project_data):
+    if await project_by_unique_index_exists(shards, project_data):
         return JSONResponse(
             content={"message": f"Project name: {project_data['name']} exists."},
             status_code=status.HTTP_400_BAD_REQUEST
@@ -81,6 +172,25 @@ async def create(
             status_code=status.HTTP_400_BAD_REQUEST
         )
 
+    content_hash = get_content_hash(geo_data)
+    if on_duplicate != "create":
+        duplicate_project_id = await project_id_by_content_hash(shards, content_hash)
+        if duplicate_project_id is not None and on_duplicate == "reject":
+            return JSONResponse(
+                content={
+                    "message": f"Identical content exists in project id: {duplicate_project_id}.",
+                    "project_id": duplicate_project_id,
+                },
+                status_code=status.HTTP_409_CONFLICT
+            )
+        if duplicate_project_id is not None:
+            duplicate_project = await read_project_entry(shards, duplicate_project_id)
+            return JSONResponse(
+                content=jsonable_encoder(ProjectResponseSchema(**duplicate_project).model_dump()),
+                status_code=status.HTTP_200_OK
+            )
+
+    validity = geometry_validity or config.GEOMETRY_VALIDITY
     project_model = ProjectCreateSchema(
         name=project_data["name"],
         description=project_data.get("description"),
@@ -88,12 +198,141 @@ async def create(
         end_date=project_data["end_date"],
         geo_project_type=json_data.get("type"),
         bbox=json_data.get("bbox"),
+        content_hash=content_hash,
     ).model_dump(exclude_unset=True, exclude_none=True)
-    project_id = await create_project_entry(db_engine, project_model, geo_data)
+    try:
+        project_id, invalid_features = await create_project_entry(
+            shards,
+            project_model,
+            geo_data,
+            request.app.state.create_coalescer,
+            validity,
+        )
+    except InvalidGeometries as e:
+        return invalid_geometry_response(file.filename, e.invalid_features)
+    except ProjectExists as e:
+        return JSONResponse(
+            content={"message": f"Project name: {e} exists."},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    response_data = ProjectResponseSchema(**await read_project_entry(shards, project_id)).model_dump()
+    if validity != "reject":
+        response_data["invalid_features"] = invalid_features_content(invalid_features)
+    response.headers["ETag"] = etag(response_data["version"])
+    return response_data
+
+@geojson_router.post(
+    "/batch-create",
+    status_code=status.HTTP_201_CREATED
+)
+async def batch_create(
+    shards: Annotated[Shards, Depends(get_db_shards)],
+    file: UploadFile = File(...),
+    atomic: bool = True,
+    geometry_validity: Optional[GeometryValidity] = None,
+):
+    '''
+    file is NDJSON: one project per line with name, description,
+    start_date, end_date and geojson (Feature or FeatureCollection).
+
+    atomic=true creates all projects or none,
+    atomic=false creates valid projects and reports errors of the rest.
+    Invalid geometries are handled per item as in create.
+    '''
+    file_content = await file.read()
+    lines = [line for line in file_content.splitlines() if line.strip()]
+    if not lines:
+        return JSONResponse(
+            content={"message": f"Bad file format: {file.filename}."},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    if len(lines) > config.BATCH_CREATE_MAX_ITEMS:
+        return JSONResponse(
+            content={"message": f"Batch exceeds {config.BATCH_CREATE_MAX_ITEMS} items."},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    items = {}
+    parsed = {}
+    for index, line in enumerate(lines):
+        try:
+            parsed[index] = parse_batch_item(line)
+        except ValueError as e:
+            items[index] = {"index": index, "message": str(e)}
+
+    unique_indexes = {}
+    for index, (project_model, _) in parsed.items():
+        unique_index = (project_model["name"], project_model["start_date"], project_model["end_date"])
+        if unique_index in unique_indexes:
+            items[index] = {"index": index, "message": f"Project name: {project_model['name']} exists."}
+        else:
+            unique_indexes[unique_index] = index
+
+    for unique_index in await existing_unique_indexes(shards, [*unique_indexes]):
+        index = unique_indexes[unique_index]
+        items[index] = {"index": index, "message": f"Project name: {unique_index[0]} exists."}
+
+    validity = geometry_validity or config.GEOMETRY_VALIDITY
+    valid = [index for index in parsed if index not in items]
+    if items and atomic:
+        valid = []
+
+    created = 0
+    if valid:
+        try:
+            project_ids, invalid_features = await create_project_entries(
+                shards,
+                [parsed[index][0] for index in valid],
+                [parsed[index][1] for index in valid],
+                validity,
+                atomic,
+            )
+        except ProjectExists:
+            return JSONResponse(
+                content={"message": "Batch conflicts with concurrent changes, retry."},
+                status_code=status.HTTP_409_CONFLICT
+            )
+        except IntegrityError as e:
+            sqlstate = getattr(e.orig, "sqlstate", None)
+            if sqlstate == UNIQUE_VIOLATION:
+                return JSONResponse(
+                    content={"message": "Batch conflicts with concurrent changes, retry."},
+                    status_code=status.HTTP_409_CONFLICT
+                )
+            if sqlstate == CHECK_VIOLATION:
+                return JSONResponse(
+                    content={"message": "start_date must be before or equal end_date."},
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            raise
+        item_invalid_features: dict[int, List[dict]] = {index: [] for index in valid}
+        for feature in invalid_features:
+            item_invalid_features[valid[feature["item"]]].append(feature)
+        for index, project_id in zip(valid, project_ids):
+            if project_id is not None:
+                created += 1
+                items[index] = {"index": index, "project_id": project_id}
+                if validity != "reject":
+                    items[index]["invalid_features"] = invalid_features_content(item_invalid_features[index])
+            elif item_invalid_features[index]:
+                items[index] = {
+                    "index": index,
+                    "message": "Invalid geometry.",
+                    "invalid_features": invalid_features_content(item_invalid_features[index]),
+                }
+
+    response_data = BatchCreateResponseSchema.model_validate({
+        "created": created,
+        "items": [items[index] for index in sorted(items)],
+    }).model_dump()
+    if items and not created:
+        return JSONResponse(
+            content=response_data,
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return response_data
 
-    project = await read_project_entry(db_engine, project_id)
-    project = ProjectResponseSchema(**project).model_dump()
-    return project
 
 @geojson_router.get(
     "/read/{project_id}",
@@ -101,17 +340,20 @@ async def create(
 )
 async def read(
     project_id: int,
-    db_engine: Annotated[AsyncEngine, Depends(get_db_engine)],
+    response: Response,
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    detail_params: Annotated[GeometryDetailParams, Query()],
 ):
-    project = await fetch_project_by_id(db_engine, project_id)
+    project = await fetch_project_by_id(shards, project_id)
     if project is None:
         return JSONResponse(
             content={"message": f"Project id: {project_id} does not exist."},
             status_code=status.HTTP_404_NOT_FOUND
         )
 
-    project = await read_project_entry(db_engine, project_id)
+    project = await read_project_entry(shards, project_id, geometry_column(**detail_params.detail()))
     project = ProjectResponseSchema(**project).model_dump()
+    response.headers["ETag"] = etag(project["version"])
     return project
 
 
@@ -120,9 +362,14 @@ async def read(
     status_code=status.HTTP_200_OK
 )
 async def list(
-    db_engine: Annotated[AsyncEngine, Depends(get_db_engine)],
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    filter_params: Annotated[ProjectListParams, Query()],
 ):
-    projects = await read_project_entries(db_engine)
+    projects = await read_project_entries(
+        shards,
+        filter_params.filters(),
+        geometry_column(**filter_params.detail()),
+    )
     response_projects = [
         ProjectResponseSchema(**project._asdict()).model_dump()
         for project in projects
@@ -130,16 +377,34 @@ async def list(
     return response_projects
 
 
+@geojson_router.get(
+    "/list-summaries",
+    status_code=status.HTTP_200_OK
+)
+async def list_summaries(
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    filter_params: Annotated[ProjectFilterParams, Query()],
+):
+    projects = await read_project_summaries(shards, filter_params.filters())
+    response_projects = [
+        ProjectSummarySchema(**project._asdict()).model_dump()
+        for project in projects
+    ]
+    return response_projects
+
+
 @geojson_router.get(
     "/list-with-pagination",
     status_code=status.HTTP_200_OK
 )
 async def list_with_pagination(
-    db_engine: Annotated[AsyncEngine, Depends(get_db_engine)],
-    page_params: Annotated[PageParams, Query()],
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    page_params: Annotated[PagedProjectFilterParams, Query()],
 ):
+    filters = page_params.filters()
+    detail = page_params.detail()
     page_params = page_params.model_dump()
-    total, pages = await get_total_and_pages(db_engine, page_params["size"])
+    total, pages = await get_total_and_pages(shards, page_params["size"], filters)
     if page_params["page"] > pages:
         response_data = {
             "total": total,
@@ -150,9 +415,11 @@ async def list_with_pagination(
         }
     else:
         projects = await read_project_entries_with_pagination(
-            db_engine=db_engine,
+            shards=shards,
             page_start=page_params["page_start"],
-            page_end=page_params["page_end"]
+            page_end=page_params["page_end"],
+            filters=filters,
+            geometry_column=geometry_column(**detail),
         )
         response_data = PagedResponseSchema(
             total=total,
@@ -164,45 +431,202 @@ async def list_with_pagination(
     return response_data
 
 
-@geojson_router.patch(
-    "/update/{project_id}",
+@geojson_router.get(
+    "/changes",
     status_code=status.HTTP_200_OK
 )
-async def update(
-    project_id: int,
-    db_engine: Annotated[AsyncEngine, Depends(get_db_engine)],
-    project: Annotated[ProjectBaseUpdateSchema, Query()],
-    file: Union[UploadFile, str, None] = File(None),
+async def changes(
+    shards: Annotated[Shards, Depends(get_db_shards)],
+    changes_params: Annotated[ChangesParams, Query()],
 ):
+    '''
+    Projects created, updated or deleted after (since, after_id) watermark.
+    Pass next_since and next_after_id of the response to get the next page.
 
-    project_data = project.model_dump(exclude_none=True, exclude_unset=True)
-    project_by_id = await fetch_project_by_id(db_engine, project_id)
-    if project_by_id is None:
+    Read from the primary: replica lag longer than the safety lag would skip changes.
+    '''
+    rows = await read_changes(
+        shards,
+        since=changes_params.since,
+        after_id=changes_params.after_id,
+        limit=changes_params.limit,
+    )
+    projects = {
+        project.project_id: project._asdict()
+        for project in await read_project_entries_by_ids(
+            shards,
+            [row.project_id for row in rows if row.change == "upsert"]
+        )
+    }
+    response_data = ChangesResponseSchema.model_validate({
+        "changes": [
+            {
+                "project_id": row.project_id,
+                "change": row.change,
+                "changed_at": row.changed_at,
+                "project": projects.get(row.project_id),
+            }
+            for row in rows
+        ],
+        "next_since": rows[-1].changed_at if rows else changes_params.since,
+        "next_after_id": rows[-1].project_id if rows else changes_params.after_id,
+        "has_more": len(rows) == changes_params.limit,
+    }).model_dump()
+    return response_data
+
+
+@geojson_router.websocket("/ws/changes")
+async def changes_websocket(
+    websocket: WebSocket,
+    project_id: Optional[int] = None,
+):
+    '''
+    Pushes {"project_id": ..., "change": "created" | "updated" | "deleted"} events,
+    of one project only when project_id is given.
+    '''
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    with project_changes_hub.subscribe() as queue:
+        await websocket.accept()
+        disconnected = asyncio.create_task(wait_for_disconnect())
+        try:
+            while True:
+                next_event = asyncio.create_task(queue.get())
+                await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_event.done():
+                    next_event.cancel()
+                    break
+                event = next_event.result()
+                if project_id is None or event["project_id"] == project_id:
+                    await websocket.send_json(event)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            disconnected.cancel()
+
+
+@geojson_router.get(
+    "/nearest",
+    status_code=status.HTTP_200_OK
+)
+async def nearest(
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    nearest_params: Annotated[NearestParams, Query()],
+):
+    '''
+    k projects nearest to lon, lat point, optionally within max_distance meters
+    and filtered like list. distance is in meters.
+    '''
+    projects = await nearest_projects(
+        shards,
+        lon=nearest_params.lon,
+        lat=nearest_params.lat,
+        k=nearest_params.k,
+        max_distance=nearest_params.max_distance,
+        filters=nearest_params.filters(),
+    )
+    return [NearestProjectSchema(**project).model_dump() for project in projects]
+
+
+@geojson_router.get(
+    "/overlaps/{project_id}",
+    status_code=status.HTTP_200_OK
+)
+async def overlaps(
+    project_id: int,
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    page_params: Annotated[PageParams, Query()],
+):
+    '''
+    Other projects whose features intersect the project, with intersection area in m2.
+    '''
+    project = await fetch_project_by_id(shards, project_id)
+    if project is None:
         return JSONResponse(
             content={"message": f"Project id: {project_id} does not exist."},
             status_code=status.HTTP_404_NOT_FOUND
         )
-    name = project_data.get("name", project_by_id[1])
-    start_date = project_data.get("start_date", project_by_id[2])
-    end_date = project_data.get("end_date", project_by_id[3])
-    if start_date > end_date:
-        return JSONResponse(
-            content={"message": "start_date must be before or equal end_date."},
-            status_code=status.HTTP_400_BAD_REQUEST
-        )
 
-    if (
-        (name, start_date, end_date) != project_by_id[1:]
-        and await project_by_unique_index_exists(
-            db_engine,
-            {"name": name, 'start_date': start_date, 'end_date': end_date}
-        )
-    ):
+    total, project_overlaps_page = await project_overlaps(
+        shards,
+        project_id,
+        page_start=page_params.page_start,
+        page_end=page_params.page_end,
+    )
+    size = page_params.size
+    return OverlapsResponseSchema.model_validate({
+        "total": total,
+        "pages": total // size if total % size == 0 else total // size + 1,
+        "page": page_params.page,
+        "size": size,
+        "overlaps": project_overlaps_page,
+    }).model_dump()
+
+
+@geojson_router.post(
+    "/match-scenes",
+    status_code=status.HTTP_200_OK
+)
+async def match_scenes_endpoint(
+    shards: Annotated[Shards, Depends(get_db_read_shards)],
+    scene_match: SceneMatchRequestSchema,
+):
+    '''
+    Finds projects whose geometry intersects scene footprint and whose
+    date range includes scene acquisition date, for a batch of scenes.
+    '''
+    if len(scene_match.scenes) > config.SCENE_MATCH_MAX_SCENES:
         return JSONResponse(
-            content={"message": f"Project name: {name} exists."},
+            content={"message": f"Request exceeds {config.SCENE_MATCH_MAX_SCENES} scenes."},
             status_code=status.HTTP_400_BAD_REQUEST
         )
 
+    rows = await match_scenes(
+        shards,
+        [
+            {
+                "footprint": scene.footprint.model_dump(exclude_none=True),
+                "acquisition_date": scene.acquisition_date.isoformat(),
+            }
+            for scene in scene_match.scenes
+        ]
+    )
+    matches: List[List[dict]] = [[] for _ in scene_match.scenes]
+    for row in rows:
+        matches[row.scene_index].append({"project_id": row.project_id, "feature_ids": row.feature_ids})
+
+    response_data = SceneMatchResponseSchema.model_validate({
+        "scenes": [
+            {"scene_id": scene.scene_id, "projects": scene_matches}
+            for scene, scene_matches in zip(scene_match.scenes, matches)
+        ]
+    }).model_dump()
+    return response_data
+
+
+@geojson_router.patch(
+    "/update/{project_id}",
+    status_code=status.HTTP_200_OK
+)
+async def update(
+    project_id: int,
+    response: Response,
+    shards: Annotated[Shards, Depends(get_db_shards)],
+    project: Annotated[ProjectBaseUpdateSchema, Query()],
+    file: Union[UploadFile, str, None] = File(None),
+    if_match: Annotated[Optional[str], Header()] = None,
+    geometry_validity: Optional[GeometryValidity] = None,
+):
+    '''
+    If-Match header with ETag (version) of read project makes the update
+    conditional, 412 is returned when the project was changed in the meantime.
+    Invalid geometries of the file are handled as in create.
+    '''
+    project_data = project.model_dump(exclude_none=True, exclude_unset=True)
+    expected_versions = if_match_versions(if_match)
+
     json_data = {}
     geo_data = {}
 
@@ -258,12 +682,111 @@ async def update(
         description=project_data.get("description"),
         geo_project_type=json_data.get("type"),
         bbox=json_data.get("bbox"),
+        content_hash=get_content_hash(geo_data) if geo_data else None,
     ).model_dump(exclude_unset=True, exclude_none=True)
-    await update_project_entry(db_engine, project_id, project_model, geo_data)
 
-    project = await read_project_entry(db_engine, project_id)
-    project = ProjectResponseSchema(**project).model_dump()
-    return project
+    validity = geometry_validity or config.GEOMETRY_VALIDITY
+    try:
+        version, invalid_features = await update_project_entry(
+            shards,
+            project_id,
+            project_model,
+            geo_data,
+            expected_versions,
+            validity,
+        )
+    except InvalidGeometries as e:
+        return invalid_geometry_response(getattr(file, "filename", None), e.invalid_features)
+    except ProjectVersionConflict as e:
+        return JSONResponse(
+            content={"message": f"Project id: {project_id} was modified, current version: {e.version}."},
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            headers={"ETag": etag(e.version)}
+        )
+    except ProjectExists as e:
+        return JSONResponse(
+            content={"message": f"Project name: {e} exists."},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    except IntegrityError as e:
+        sqlstate = getattr(e.orig, "sqlstate", None)
+        if sqlstate == UNIQUE_VIOLATION:
+            name = project_data.get("name") or (await fetch_project_by_id(shards, project_id))[1]
+            return JSONResponse(
+                content={"message": f"Project name: {name} exists."},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if sqlstate == CHECK_VIOLATION:
+            return JSONResponse(
+                content={"message": "start_date must be before or equal end_date."},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        raise
+    if version is None:
+        return JSONResponse(
+            content={"message": f"Project id: {project_id} does not exist."},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+
+    response_data = ProjectResponseSchema(**await read_project_entry(shards, project_id)).model_dump()
+    if geo_data and validity != "reject":
+        response_data["invalid_features"] = invalid_features_content(invalid_features)
+    response.headers["ETag"] = etag(response_data["version"])
+    return response_data
+
+
+@geojson_router.patch(
+    "/bulk-update",
+    status_code=status.HTTP_200_OK
+)
+async def bulk_update(
+    shards: Annotated[Shards, Depends(get_db_shards)],
+    bulk_update: BulkUpdateRequestSchema,
+):
+    '''
+    Updates description and / or dates of projects selected by ids,
+    name prefix and date range in one statement.
+    '''
+    try:
+        updated = await update_project_entries(
+            shards,
+            bulk_update.filters(),
+            bulk_update.values.model_dump(exclude_none=True),
+        )
+    except ProjectExists:
+        return JSONResponse(
+            content={"message": "Projects with the same name and dates would exist."},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    except IntegrityError as e:
+        sqlstate = getattr(e.orig, "sqlstate", None)
+        if sqlstate == UNIQUE_VIOLATION:
+            return JSONResponse(
+                content={"message": "Projects with the same name and dates would exist."},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if sqlstate == CHECK_VIOLATION:
+            return JSONResponse(
+                content={"message": "start_date must be before or equal end_date."},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        raise
+    return BulkUpdateResponseSchema(updated=updated).model_dump()
+
+
+@geojson_router.post(
+    "/bulk-delete",
+    status_code=status.HTTP_200_OK
+)
+async def bulk_delete(
+    shards: Annotated[Shards, Depends(get_db_shards)],
+    selection: ProjectSelectionSchema,
+):
+    '''
+    Deletes projects selected by ids, name prefix and date range in one statement.
+    '''
+    deleted = await delete_project_entries(shards, selection.filters())
+    return BulkDeleteResponseSchema(deleted=deleted).model_dump()
 
 
 @geojson_router.delete(
@@ -271,7 +794,7 @@ async def update(
     status_code=status.HTTP_204_NO_CONTENT
 )
 async def delete(
-    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    shards: Annotated[Shards, Depends(get_db_shards)],
     project_id: int
 ):
-    await delete_project_entry(db_session, project_id)
+    await delete_project_entry(shards, project_id)
@@ -0,0 +1,56 @@
+from datetime import date
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Literal, Optional
+from typing_extensions import Self
+
+
+class ProjectSelectionSchema(BaseModel):
+    project_ids: Optional[Annotated[list[int], Field(min_length=1)]] = None
+    name_prefix: Optional[Annotated[str, Field(min_length=1)]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    date_relation: Literal["overlaps", "contains"] = "overlaps"
+
+    @model_validator(mode="after")
+    def validate_selection(self) -> Self:
+        if self.project_ids is None and self.name_prefix is None and self.date_from is None and self.date_to is None:
+            raise ValueError("project_ids, name_prefix or date range has to be defined")
+        if self.date_from is None:
+            self.date_from = self.date_to
+        if self.date_to is None:
+            self.date_to = self.date_from
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from must be before or equal date_to")
+        return self
+
+    def filters(self) -> dict:
+        filters = self.model_dump(include=set(ProjectSelectionSchema.model_fields), exclude_none=True)
+        if "date_from" not in filters:
+            filters.pop("date_relation")
+        return filters
+
+
+class ProjectBulkUpdateSchema(BaseModel):
+    description: Optional[Annotated[str, Field(max_length=255)]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def validate_values(self) -> Self:
+        if self.description is None and self.start_date is None and self.end_date is None:
+            raise ValueError("description, start_date or end_date has to be defined")
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValueError("start_date must be before or equal end_date")
+        return self
+
+
+class BulkUpdateRequestSchema(ProjectSelectionSchema):
+    values: ProjectBulkUpdateSchema
+
+
+class BulkDeleteResponseSchema(BaseModel):
+    deleted: int
+
+
+class BulkUpdateResponseSchema(BaseModel):
+    updated: int
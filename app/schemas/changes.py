@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Literal, Optional
+from .geojson import ProjectResponseSchema
+
+
+class ChangesParams(BaseModel):
+    since: datetime = datetime(1970, 1, 1)
+    after_id: Annotated[int, Field(ge=0)] = 0
+    limit: Annotated[int, Field(ge=1, le=1000)] = 100
+
+    @field_validator("since")
+    @classmethod
+    def validate_since(cls, since: datetime) -> datetime:
+        if since.tzinfo is not None:
+            return since.astimezone(timezone.utc).replace(tzinfo=None)
+        return since
+
+
+class ChangeSchema(BaseModel):
+    project_id: int
+    change: Literal["upsert", "delete"]
+    changed_at: datetime
+    project: Optional[ProjectResponseSchema] = None
+
+
+class ChangesResponseSchema(BaseModel):
+    changes: List[ChangeSchema]
+    next_since: datetime
+    next_after_id: int
+    has_more: bool
@@ -0,0 +1,70 @@
+from datetime import date
+from pydantic import BaseModel, Field, NonNegativeFloat, NonNegativeInt, PositiveFloat, field_validator, model_validator
+from typing import Annotated, Literal, Optional
+from typing_extensions import Self
+
+
+class ProjectFilterParams(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    date_relation: Literal["overlaps", "contains"] = "overlaps"
+    min_feature_count: Optional[NonNegativeInt] = None
+    max_feature_count: Optional[NonNegativeInt] = None
+    min_area: Optional[NonNegativeFloat] = None
+    max_area: Optional[NonNegativeFloat] = None
+    geometry_type: Optional[Literal[
+        "Point", "MultiPoint", "LineString", "MultiLineString", "Polygon", "MultiPolygon", "GeometryCollection"
+    ]] = None
+    bbox: Optional[list[float]] = None
+
+    @field_validator("bbox", mode="before")
+    @classmethod
+    def split_bbox(cls, value):
+        '''
+        bbox query parameter is given as xmin,ymin,xmax,ymax.
+        '''
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        if isinstance(value, str):
+            value = value.split(",")
+        return value
+
+    @model_validator(mode="after")
+    def validate_model_after(self) -> Self:
+        if self.date_from is None:
+            self.date_from = self.date_to
+        if self.date_to is None:
+            self.date_to = self.date_from
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from must be before or equal date_to")
+        if self.bbox is not None and (
+            len(self.bbox) != 4 or self.bbox[0] > self.bbox[2] or self.bbox[1] > self.bbox[3]
+        ):
+            raise ValueError("bbox must be xmin,ymin,xmax,ymax")
+        return self
+
+    def filters(self) -> dict:
+        filters = self.model_dump(include=set(ProjectFilterParams.model_fields), exclude_none=True)
+        if "date_from" not in filters:
+            filters.pop("date_relation")
+        if "bbox" in filters:
+            filters.update(zip(("bbox_xmin", "bbox_ymin", "bbox_xmax", "bbox_ymax"), filters.pop("bbox")))
+        return filters
+
+
+class GeometryDetailParams(BaseModel):
+    zoom: Optional[Annotated[int, Field(ge=0, le=24)]] = None
+    tolerance: Optional[PositiveFloat] = None
+
+    @model_validator(mode="after")
+    def validate_detail(self) -> Self:
+        if self.zoom is not None and self.tolerance is not None:
+            raise ValueError("only one of zoom and tolerance can be given")
+        return self
+
+    def detail(self) -> dict:
+        return self.model_dump(include=set(GeometryDetailParams.model_fields))
+
+
+class ProjectListParams(ProjectFilterParams, GeometryDetailParams):
+    pass
@@ -1,10 +1,13 @@
 from datetime import datetime, date
 from geojson_pydantic import Feature, FeatureCollection
 from pydantic import BaseModel, model_validator
-from typing import Optional
+from typing import Any, Literal, Optional
 from typing_extensions import Self
 
 
+GeometryValidity = Literal["reject", "report", "repair"]
+
+
 class ProjectBaseCreateSchema(BaseModel):
     name: str
     description: Optional[str] = None
@@ -21,6 +24,28 @@ class ProjectBaseCreateSchema(BaseModel):
 class ProjectCreateSchema(ProjectBaseCreateSchema):
     geo_project_type: str
     bbox: Optional[list[float]] = None
+    content_hash: Optional[str] = None
+
+
+class ProjectBatchItemSchema(ProjectBaseCreateSchema):
+    geojson: dict[str, Any]
+
+
+class InvalidFeatureSchema(BaseModel):
+    feature_index: int
+    reason: str
+
+
+class BatchItemResultSchema(BaseModel):
+    index: int
+    project_id: Optional[int] = None
+    message: Optional[str] = None
+    invalid_features: Optional[list[InvalidFeatureSchema]] = None
+
+
+class BatchCreateResponseSchema(BaseModel):
+    created: int
+    items: list[BatchItemResultSchema]
 
 
 class ProjectBaseUpdateSchema(BaseModel):
@@ -39,9 +64,10 @@ class ProjectBaseUpdateSchema(BaseModel):
 class ProjectUpdateSchema(ProjectBaseUpdateSchema):
     geo_project_type: Optional[str] = None
     bbox: Optional[list[float]] = None
+    content_hash: Optional[str] = None
 
 
-class ProjectResponseSchema(BaseModel):
+class ProjectSummarySchema(BaseModel):
     project_id: int
     name: str
     start_date: date
@@ -49,6 +75,15 @@ class ProjectResponseSchema(BaseModel):
     description: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    version: int = 1
+    extent: Optional[list[float]] = None
+    feature_count: int = 0
+    vertex_count: int = 0
+    area: float = 0
+    geometry_types: Optional[dict[str, int]] = None
+
+
+class ProjectResponseSchema(ProjectSummarySchema):
     feature: Optional[Feature] = None
     featurecollection: Optional[FeatureCollection] = None
 
@@ -0,0 +1,16 @@
+from pydantic import Field, PositiveFloat
+from typing import Annotated, Optional
+
+from .filters import ProjectFilterParams
+from .geojson import ProjectSummarySchema
+
+
+class NearestParams(ProjectFilterParams):
+    lon: Annotated[float, Field(ge=-180, le=180)]
+    lat: Annotated[float, Field(ge=-90, le=90)]
+    k: Annotated[int, Field(ge=1, le=100)] = 10
+    max_distance: Optional[PositiveFloat] = None
+
+
+class NearestProjectSchema(ProjectSummarySchema):
+    distance: float
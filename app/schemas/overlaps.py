@@ -0,0 +1,19 @@
+from datetime import date
+from pydantic import BaseModel
+from typing import List
+
+
+class OverlapSchema(BaseModel):
+    project_id: int
+    name: str
+    start_date: date
+    end_date: date
+    intersection_area: float
+
+
+class OverlapsResponseSchema(BaseModel):
+    total: int
+    pages: int
+    page: int
+    size: int
+    overlaps: List[OverlapSchema]
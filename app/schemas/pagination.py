@@ -1,5 +1,6 @@
 from typing import List
 from pydantic import BaseModel, computed_field, conint
+from .filters import ProjectListParams
 from .geojson import ProjectResponseSchema
 
 
@@ -18,6 +19,10 @@ class PageParams(BaseModel):
         return (self.page - 1) * self.size + self.size
 
 
+class PagedProjectFilterParams(PageParams, ProjectListParams):
+    pass
+
+
 class PagedResponseSchema(BaseModel):
     total: int
     pages: int
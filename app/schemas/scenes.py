@@ -0,0 +1,28 @@
+from datetime import date
+from geojson_pydantic.geometries import Geometry
+from pydantic import BaseModel, Field
+from typing import Annotated, List
+
+
+class SceneSchema(BaseModel):
+    scene_id: str
+    footprint: Geometry
+    acquisition_date: date
+
+
+class SceneMatchRequestSchema(BaseModel):
+    scenes: Annotated[List[SceneSchema], Field(min_length=1)]
+
+
+class ProjectMatchSchema(BaseModel):
+    project_id: int
+    feature_ids: List[int]
+
+
+class SceneMatchSchema(BaseModel):
+    scene_id: str
+    projects: List[ProjectMatchSchema]
+
+
+class SceneMatchResponseSchema(BaseModel):
+    scenes: List[SceneMatchSchema]
@@ -0,0 +1,123 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Admission rejected, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    '''
+    Limits concurrent ingest operations and in-flight upload bytes of one worker.
+
+    Requests over the limits wait up to queue_timeout seconds for a slot
+    and are rejected after that. A single upload bigger than
+    max_inflight_bytes is admitted only when nothing else is in flight.
+    '''
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_inflight_bytes: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_inflight_bytes = max_inflight_bytes
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = 0
+        self._inflight_bytes = 0
+        self._condition = asyncio.Condition()
+
+    def _can_admit(self, size: int) -> bool:
+        if self._active == 0:
+            return True
+        return (
+            self._active < self.max_concurrent
+            and self._inflight_bytes + size <= self.max_inflight_bytes
+        )
+
+    async def acquire(self, size: int) -> None:
+        async with self._condition:
+            if not self._can_admit(size):
+                if self.queue_timeout <= 0:
+                    raise AdmissionRejected(self.retry_after)
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._can_admit(size)),
+                        self.queue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise AdmissionRejected(self.retry_after)
+            self._active += 1
+            self._inflight_bytes += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._inflight_bytes -= size
+            self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, size: int) -> AsyncIterator[None]:
+        await self.acquire(size)
+        try:
+            yield
+        finally:
+            await self.release(size)
+
+
+class AdmissionControlMiddleware:
+    '''
+    Applied before the request body is read, so rejected uploads are never buffered.
+    Requests outside of ingest_paths (all reads) are not throttled. Uploads without
+    Content-Length (chunked) are charged max_inflight_bytes, their size is unknown.
+    '''
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        ingest_paths: tuple[str, ...],
+    ):
+        self.app = app
+        self.controller = controller
+        self.ingest_paths = ingest_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PATCH", "PUT")
+            or not scope["path"].startswith(self.ingest_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            size = int(headers[b"content-length"])
+        except (KeyError, ValueError):
+            size = self.controller.max_inflight_bytes
+
+        try:
+            await self.controller.acquire(size)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                content={"message": "Too many concurrent uploads, try again later."},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(size)
@@ -0,0 +1,141 @@
+import asyncio
+from typing import Any, Optional
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.geojson import create_project_entries, create_project_entry, existing_unique_indexes, InvalidGeometries
+from app.schemas.geojson import GeometryValidity
+from app.services.shards import ProjectExists, Shards
+
+BatchKey = tuple[AsyncEngine, Optional[GeometryValidity]]
+
+
+class CreateCoalescer:
+    '''
+    Collects create requests arriving within window seconds (at most max_batch)
+    and stores them with one create_project_entries transaction per database.
+
+    Every request still gets its own project id. A failed batch is retried
+    one project at a time, so only the failing request gets the error.
+    Batches are collected per database and geometry validity, a project
+    rejected for invalid geometries is removed without failing the batch.
+
+    With more than one shard a batch holds the unique index locks of its projects
+    while the other shards are checked for the names and the batch is written,
+    waiting requests hold no connection.
+    '''
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[BatchKey, list[tuple[dict[str, Any], dict[str, Any], asyncio.Future]]] = {}
+        self._flushes: set[asyncio.Task] = set()
+
+    async def create(
+        self,
+        shards: Shards,
+        project_data: dict[str, Any],
+        geo_data: dict[str, Any],
+        geometry_validity: Optional[GeometryValidity] = None,
+    ) -> tuple[int, list[dict[str, Any]]]:
+        future = asyncio.get_running_loop().create_future()
+        key = (shards.for_new_project(project_data), geometry_validity)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = []
+            self._spawn(self._flush_after_window(shards, key, batch))
+        batch.append((project_data, geo_data, future))
+        if len(batch) >= self.max_batch and self._take(key, batch):
+            self._spawn(self._flush(shards, key, batch))
+        return await future
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _take(self, key: BatchKey, batch: list) -> bool:
+        if self._pending.get(key) is not batch:
+            return False
+        del self._pending[key]
+        return True
+
+    async def _flush_after_window(self, shards: Shards, key: BatchKey, batch: list) -> None:
+        await asyncio.sleep(self.window)
+        if self._take(key, batch):
+            await self._flush(shards, key, batch)
+
+    async def _flush(self, shards: Shards, key: BatchKey, batch: list) -> None:
+        db_engine, validity = key
+        try:
+            async with shards.unique_index_lock(*(project_data for project_data, _, _ in batch)):
+                batch = await self._reject_existing(shards, db_engine, batch)
+                await self._create(db_engine, validity, batch)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _reject_existing(self, shards: Shards, db_engine: AsyncEngine, batch: list) -> list:
+        if len(shards) == 1:
+            return batch
+        other_shards = Shards([other for other in shards.engines if other is not db_engine])
+        existing = set().union(*await other_shards.gather(existing_unique_indexes, [
+            (project_data["name"], project_data["start_date"], project_data["end_date"])
+            for project_data, _, _ in batch
+        ]))
+        remaining = []
+        for project_data, geo_data, future in batch:
+            if (project_data["name"], project_data["start_date"], project_data["end_date"]) in existing:
+                future.set_exception(ProjectExists(project_data["name"]))
+            else:
+                remaining.append((project_data, geo_data, future))
+        return remaining
+
+    async def _create(self, db_engine: AsyncEngine, validity: Optional[GeometryValidity], batch: list) -> None:
+        if len(batch) <= 1:
+            await asyncio.gather(*(self._create_one(db_engine, validity, *item) for item in batch))
+            return
+
+        # multi-row insert needs the same columns in every row
+        columns = set().union(*(project_data for project_data, _, _ in batch))
+        try:
+            project_ids, invalid_features = await create_project_entries(
+                db_engine,
+                [{column: project_data.get(column) for column in columns} for project_data, _, _ in batch],
+                [geo_data for _, geo_data, _ in batch],
+                geometry_validity=validity,
+                atomic=False,
+            )
+        except DBAPIError:
+            await asyncio.gather(*(self._create_one(db_engine, validity, *item) for item in batch))
+            return
+
+        item_invalid_features: list[list[dict[str, Any]]] = [[] for _ in batch]
+        for feature in invalid_features:
+            item_invalid_features[feature["item"]].append(feature)
+        for (_, _, future), project_id, features in zip(batch, project_ids, item_invalid_features):
+            if future.done():
+                continue
+            if project_id is None:
+                future.set_exception(InvalidGeometries(features))
+            else:
+                future.set_result((project_id, features))
+
+    async def _create_one(
+        self,
+        db_engine: AsyncEngine,
+        validity: Optional[GeometryValidity],
+        project_data: dict[str, Any],
+        geo_data: dict[str, Any],
+        future: asyncio.Future,
+    ) -> None:
+        try:
+            result = await create_project_entry(db_engine, project_data, geo_data, validity)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
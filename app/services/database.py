@@ -1,7 +1,10 @@
 import contextlib
-from typing import AsyncIterator
+import itertools
+from typing import AsyncIterator, Iterator, Sequence
 
-from fastapi import Depends  # noqa: F401
+from fastapi import Depends, Request  # noqa: F401
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, URL, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
     AsyncConnection,
@@ -12,39 +15,144 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 
+from app.services.query_log import install_slow_query_log
+from app.services.replicas import READ_PRIMARY_COOKIE
+from app.services.shards import Shards
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
+def set_statement_timeout_on_connect(engine: Engine, timeout_ms: int) -> None:
+    '''
+    Default timeout of every pooled connection, ingest transactions
+    raise it with SET LOCAL for their own duration.
+    '''
+
+    @event.listens_for(engine, "connect", insert=True)
+    def set_statement_timeout(dbapi_connection, connection_record):
+        existing_autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET SESSION statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+        dbapi_connection.autocommit = existing_autocommit
+
+
+def create_engine(
+    host: str | URL,
+    echo: bool = False,
+    pool_timeout: float = 30,
+    statement_timeout_ms: int | None = None,
+    slow_query_threshold_ms: int | None = None,
+    prepared_statement_cache_size: int | None = None,
+) -> AsyncEngine:
+    '''
+    asyncpg prepares every statement, prepared_statement_cache_size
+    of them are kept per connection and executed without parsing again.
+    '''
+    connect_args = {}
+    if prepared_statement_cache_size is not None and make_url(host).get_driver_name() == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = prepared_statement_cache_size
+    engine = create_async_engine(host, echo=echo, pool_timeout=pool_timeout, connect_args=connect_args)
+    if statement_timeout_ms:
+        set_statement_timeout_on_connect(engine.sync_engine, statement_timeout_ms)
+    if slow_query_threshold_ms is not None:
+        install_slow_query_log(engine.sync_engine, slow_query_threshold_ms)
+    return engine
+
+
 class DatabaseSessionManager:
+    '''
+    Primary engine for writes and optional replica engines for reads,
+    replicas are used round robin.
+
+    With shard hosts the primary engine is the first of the shard engines,
+    replicas are replicas of the first shard.
+    '''
+
     def __init__(self):
         self._engine: AsyncEngine | None = None
+        self._shard_engines: list[AsyncEngine] = []
+        self._replica_engines: list[AsyncEngine] = []
+        self._replicas: Iterator[AsyncEngine] = iter(())
         self._sessionmaker: async_sessionmaker | None = None
 
-    def init(self, host: str):
-        self._engine = create_async_engine(host, echo=True)
+    def init(
+        self,
+        host: str,
+        echo: bool = False,
+        pool_timeout: float = 30,
+        statement_timeout_ms: int | None = None,
+        slow_query_threshold_ms: int | None = None,
+        replica_hosts: Sequence[str] = (),
+        shard_hosts: Sequence[str] = (),
+        prepared_statement_cache_size: int | None = None,
+    ):
+        engine_options = (echo, pool_timeout, statement_timeout_ms, slow_query_threshold_ms, prepared_statement_cache_size)
+        self._engine = create_engine(host, *engine_options)
+        self._shard_engines = [self._engine] + [
+            create_engine(shard_host, *engine_options)
+            for shard_host in shard_hosts
+        ]
+        self._replica_engines = [
+            create_engine(replica_host, *engine_options)
+            for replica_host in replica_hosts
+        ]
+        self._replicas = itertools.cycle(self._replica_engines)
         self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
 
     async def close(self):
         if self._engine is None:
             raise Exception("DatabaseSessionManager is not initialized")
-        await self._engine.dispose()
+        for engine in [*self._shard_engines, *self._replica_engines]:
+            await engine.dispose()
         self._engine = None
+        self._shard_engines = []
+        self._replica_engines = []
+        self._replicas = iter(())
         self._sessionmaker = None
 
+    def get_engine(self) -> AsyncEngine:
+        '''
+        Primary engine for long lived users (middlewares).
+        '''
+        if self._engine is None:
+            raise Exception("DatabaseSessionManager is not initialized")
+        return self._engine
+
     @contextlib.asynccontextmanager
-    async def engine(self) -> AsyncIterator[AsyncConnection]:
+    async def engine(self) -> AsyncIterator[AsyncEngine]:
+        '''
+        Primary engine, its pool lives until close(), so pooled connections
+        keep their prepared statements between requests.
+        '''
         if self._engine is None:
             raise Exception("DatabaseManager is not initialized")
 
-        engine = self._engine
-        try:
-            yield engine
-        except Exception:
-            raise
-        finally:
-            await engine.dispose()
+        yield self._engine
+
+    @contextlib.asynccontextmanager
+    async def read_engine(self, primary: bool = False) -> AsyncIterator[AsyncEngine]:
+        '''
+        Next replica engine, primary engine when there are no replicas or primary is requested.
+        '''
+        if self._engine is None:
+            raise Exception("DatabaseManager is not initialized")
+
+        yield self._engine if primary or not self._replica_engines else next(self._replicas)
+
+    @contextlib.asynccontextmanager
+    async def shards(self, read: bool = False, primary: bool = False) -> AsyncIterator[Shards]:
+        '''
+        Engines of all shards, for read the first shard engine is taken from read_engine.
+        '''
+        if self._engine is None:
+            raise Exception("DatabaseManager is not initialized")
+
+        async with self.read_engine(primary) if read else self.engine() as engine:
+            yield Shards([engine, *self._shard_engines[1:]])
 
     @contextlib.asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -83,11 +191,21 @@ class DatabaseSessionManager:
 databasemanager = DatabaseSessionManager()
 
 
-async def get_db_session() -> AsyncSession:
+async def get_db_session() -> AsyncIterator[AsyncSession]:
     async with databasemanager.session() as session:
         yield session
 
 
-async def get_db_engine() -> AsyncIterator[AsyncConnection]:
-    async with databasemanager.engine() as connection:
-        yield connection
+async def get_db_engine() -> AsyncIterator[AsyncEngine]:
+    async with databasemanager.engine() as engine:
+        yield engine
+
+
+async def get_db_shards() -> AsyncIterator[Shards]:
+    async with databasemanager.shards() as shards:
+        yield shards
+
+
+async def get_db_read_shards(request: Request) -> AsyncIterator[Shards]:
+    async with databasemanager.shards(read=True, primary=READ_PRIMARY_COOKIE in request.cookies) as shards:
+        yield shards
@@ -0,0 +1,308 @@
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+IDEMPOTENCY_KEY_HEADER = b"idempotency-key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+# stored with the response body and replayed to retries
+REPLAYED_RESPONSE_HEADERS = (b"etag", b"location")
+PURGE_BATCH_SIZE = 100
+# retrying can succeed, responses with these statuses (and 5xx) are not stored
+TRANSIENT_STATUS_CODES = (
+    status.HTTP_408_REQUEST_TIMEOUT,
+    status.HTTP_409_CONFLICT,
+    status.HTTP_425_TOO_EARLY,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+)
+
+purge_idempotency_keys_sql = '''
+    DELETE FROM idempotency_keys
+    WHERE key IN (
+        SELECT key FROM idempotency_keys
+        WHERE created_at < now() - make_interval(secs => :ttl)
+        ORDER BY created_at
+        LIMIT :batch_size
+    )
+'''
+
+claim_idempotency_key_sql = '''
+    INSERT INTO idempotency_keys (key, fingerprint)
+    VALUES (:key, :fingerprint)
+    ON CONFLICT (key) DO UPDATE
+    SET
+        fingerprint = EXCLUDED.fingerprint,
+        body_hash = NULL,
+        status_code = NULL,
+        content_type = NULL,
+        response_body = NULL,
+        response_headers = NULL,
+        created_at = now()
+    WHERE idempotency_keys.created_at < now() - make_interval(secs => :ttl)
+    OR (
+        idempotency_keys.status_code IS NULL
+        AND idempotency_keys.created_at < now() - make_interval(secs => :lock_timeout)
+    )
+    RETURNING key
+'''
+
+stored_idempotency_key_sql = '''
+    SELECT fingerprint, body_hash, status_code, content_type, response_body, response_headers
+    FROM idempotency_keys
+    WHERE key = :key
+'''
+
+store_response_sql = '''
+    UPDATE idempotency_keys
+    SET
+        body_hash = :body_hash,
+        status_code = :status_code,
+        content_type = :content_type,
+        response_body = :response_body,
+        response_headers = CAST(:response_headers AS json)
+    WHERE key = :key AND fingerprint = :fingerprint
+'''
+
+release_idempotency_key_sql = '''
+    DELETE FROM idempotency_keys
+    WHERE key = :key AND fingerprint = :fingerprint AND status_code IS NULL
+'''
+
+
+def request_fingerprint(scope: Scope, headers: dict[bytes, bytes]) -> str:
+    '''
+    Known before the body is read: method, path, query string and body length,
+    the body itself is compared by its hash (body_hash).
+    '''
+    fingerprint = b" ".join([
+        scope["method"].encode(),
+        scope["path"].encode(),
+        scope.get("query_string", b""),
+        headers.get(b"content-length", b""),
+    ])
+    return hashlib.sha256(fingerprint).hexdigest()
+
+
+def multipart_boundary(headers: dict[bytes, bytes]) -> bytes:
+    content_type = headers.get(b"content-type", b"")
+    for parameter in content_type.split(b";"):
+        name, _, value = parameter.strip().partition(b"=")
+        if name.lower() == b"boundary":
+            return value.strip(b'"')
+    return b""
+
+
+class BodyHash:
+    '''
+    sha256 of the request body updated chunk by chunk. The multipart boundary
+    is random per request, so it is left out and retries of the same upload
+    hash the same; the last bytes of a chunk are held back in case the
+    boundary spans two chunks.
+    '''
+
+    def __init__(self, headers: dict[bytes, bytes]):
+        self.boundary = multipart_boundary(headers)
+        self.digest = hashlib.sha256()
+        self.pending = b""
+
+    def update(self, chunk: bytes) -> None:
+        if not self.boundary:
+            self.digest.update(chunk)
+            return
+        data = (self.pending + chunk).replace(self.boundary, b"")
+        held_back = len(self.boundary) - 1
+        self.digest.update(data[:max(len(data) - held_back, 0)])
+        self.pending = data[max(len(data) - held_back, 0):]
+
+    def hexdigest(self) -> str:
+        digest = self.digest.copy()
+        digest.update(self.pending)
+        return digest.hexdigest()
+
+
+async def read_body_hash(receive: Receive, headers: dict[bytes, bytes]) -> str:
+    '''
+    Reads the request body without buffering it.
+    '''
+    body_hash = BodyHash(headers)
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        body_hash.update(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return body_hash.hexdigest()
+
+
+class IdempotencyMiddleware:
+    '''
+    Requests to ingest_paths with Idempotency-Key header are executed once per key,
+    the final response (not 5xx nor TRANSIENT_STATUS_CODES) is stored with the hash
+    of the request body and replayed to retries with the same body, along with
+    its REPLAYED_RESPONSE_HEADERS.
+
+    A retry while the first request is still running gets 409 before its body is read,
+    the same key with a different request (or body) gets 422.
+    '''
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        engine: Callable[[], AsyncEngine],
+        ingest_paths: tuple[str, ...],
+        ttl: float,
+        lock_timeout: float,
+    ):
+        self.app = app
+        self.engine = engine
+        self.ingest_paths = ingest_paths
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    async def execute(self, statement: str, params: dict[str, Any]) -> Optional[Any]:
+        async with self.engine().begin() as conn:
+            result = await conn.execute(
+                text(statement),
+                params,
+                execution_options={"query_name": "idempotency_keys"}
+            )
+            return result.fetchone() if result.returns_rows else None
+
+    async def claim(self, key: str, fingerprint: str) -> bool:
+        async with self.engine().begin() as conn:
+            await conn.execute(
+                text(purge_idempotency_keys_sql),
+                {"ttl": self.ttl, "batch_size": PURGE_BATCH_SIZE},
+                execution_options={"query_name": "purge_idempotency_keys"}
+            )
+            result = await conn.execute(
+                text(claim_idempotency_key_sql),
+                {"key": key, "fingerprint": fingerprint, "ttl": self.ttl, "lock_timeout": self.lock_timeout},
+                execution_options={"query_name": "claim_idempotency_key"}
+            )
+            return result.fetchone() is not None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PATCH", "PUT")
+            or not scope["path"].startswith(self.ingest_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if IDEMPOTENCY_KEY_HEADER not in headers:
+            await self.app(scope, receive, send)
+            return
+
+        key = headers[IDEMPOTENCY_KEY_HEADER].decode("latin-1")
+        response: Response
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            response = JSONResponse(
+                content={"message": f"Idempotency-Key must have 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters."},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+            await response(scope, receive, send)
+            return
+
+        fingerprint = request_fingerprint(scope, headers)
+        if not await self.claim(key, fingerprint):
+            response = await self.stored_response(key, fingerprint, receive, headers)
+            await response(scope, receive, send)
+            return
+
+        response_start: dict[str, Any] = {}
+        response_body: list[bytes] = []
+        request_body_hash = BodyHash(headers)
+        request_body_read = False
+
+        async def receive_and_hash() -> Message:
+            nonlocal request_body_read
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body_hash.update(message.get("body", b""))
+                request_body_read = not message.get("more_body", False)
+            return message
+
+        async def send_and_record(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_start.update(message)
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_hash, send_and_record)
+        except Exception:
+            await self.execute(release_idempotency_key_sql, {"key": key, "fingerprint": fingerprint})
+            raise
+
+        status_code = response_start.get("status", status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # a body not read to the end cannot be compared with retries
+        if status_code >= 500 or status_code in TRANSIENT_STATUS_CODES or not request_body_read:
+            await self.execute(release_idempotency_key_sql, {"key": key, "fingerprint": fingerprint})
+            return
+        response_headers = dict(response_start.get("headers", []))
+        content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+        await self.execute(
+            store_response_sql,
+            {
+                "key": key,
+                "fingerprint": fingerprint,
+                "body_hash": request_body_hash.hexdigest(),
+                "status_code": status_code,
+                "content_type": content_type or None,
+                "response_body": b"".join(response_body),
+                "response_headers": json.dumps({
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in response_headers.items()
+                    if name in REPLAYED_RESPONSE_HEADERS
+                }),
+            }
+        )
+
+    async def stored_response(
+        self,
+        key: str,
+        fingerprint: str,
+        receive: Receive,
+        headers: dict[bytes, bytes],
+    ) -> Response:
+        stored = await self.execute(stored_idempotency_key_sql, {"key": key})
+        if stored is None:
+            return JSONResponse(
+                content={"message": "Request with this Idempotency-Key is in progress, try again later."},
+                status_code=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"}
+            )
+        if stored.fingerprint != fingerprint:
+            return JSONResponse(
+                content={"message": "Idempotency-Key was used with a different request."},
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if stored.status_code is None:
+            return JSONResponse(
+                content={"message": "Request with this Idempotency-Key is in progress, try again later."},
+                status_code=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"}
+            )
+        if await read_body_hash(receive, headers) != stored.body_hash:
+            return JSONResponse(
+                content={"message": "Idempotency-Key was used with a different request."},
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(
+            content=stored.response_body,
+            status_code=stored.status_code,
+            media_type=stored.content_type,
+            headers={**(stored.response_headers or {}), IDEMPOTENT_REPLAYED_HEADER: "true"}
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Any, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+PROJECT_CHANGES_CHANNEL = "project_changes"
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectChangesHub:
+    '''
+    Holds one LISTEN connection per worker and fans notifications
+    out to subscriber queues (one per websocket client).
+
+    A subscriber that does not keep up loses its oldest events. A lost LISTEN
+    connection is replaced every reconnect_interval seconds until LISTEN succeeds,
+    notifications sent in between are lost (/geojson/changes has them).
+    '''
+
+    def __init__(
+        self,
+        channel: str = PROJECT_CHANGES_CHANNEL,
+        queue_size: int = 100,
+        reconnect_interval: float = 1.0,
+    ):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.reconnect_interval = reconnect_interval
+        self._subscribers: set[asyncio.Queue] = set()
+        self._listen_tasks: list[asyncio.Task] = []
+
+    async def start(self, *db_engines: AsyncEngine) -> None:
+        '''
+        Listens on every given database (one per shard).
+        '''
+        for db_engine in db_engines:
+            connection, lost = await self._connect(db_engine)
+            self._listen_tasks.append(asyncio.create_task(self._listen(db_engine, connection, lost)))
+
+    async def stop(self) -> None:
+        for listen_task in self._listen_tasks:
+            listen_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listen_task
+        self._listen_tasks = []
+
+    async def _connect(self, db_engine: AsyncEngine) -> tuple[AsyncConnection, asyncio.Future]:
+        '''
+        LISTEN connection and a future done when the connection is lost.
+        '''
+        connection = await db_engine.connect()
+        try:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection: Any = raw_connection.driver_connection
+            if connection.dialect.driver == "asyncpg":
+                lost = asyncio.get_running_loop().create_future()
+
+                def on_termination(_: Any) -> None:
+                    if not lost.done():
+                        lost.set_result(None)
+
+                driver_connection.add_termination_listener(on_termination)
+                await driver_connection.add_listener(self.channel, self._on_asyncpg_notification)
+            else:
+                await driver_connection.set_autocommit(True)
+                await driver_connection.execute(f"LISTEN {self.channel}")
+                lost = asyncio.ensure_future(self._listen_psycopg(driver_connection))
+        except BaseException:
+            await self._close(connection)
+            raise
+        return connection, lost
+
+    async def _listen(self, db_engine: AsyncEngine, connection: AsyncConnection, lost: asyncio.Future) -> None:
+        try:
+            while True:
+                with contextlib.suppress(Exception):
+                    await lost
+                logger.warning("%s LISTEN connection lost, reconnecting.", self.channel)
+                await self._close(connection)
+                while True:
+                    await asyncio.sleep(self.reconnect_interval)
+                    try:
+                        connection, lost = await self._connect(db_engine)
+                        break
+                    except Exception:
+                        logger.warning("%s LISTEN reconnect failed.", self.channel, exc_info=True)
+        finally:
+            lost.cancel()
+            await self._close(connection)
+
+    @staticmethod
+    async def _close(connection: AsyncConnection) -> None:
+        '''
+        LISTEN connections are never returned to the pool.
+        '''
+        with contextlib.suppress(Exception):
+            await connection.invalidate()
+            await connection.close()
+
+    def _on_asyncpg_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self.publish(payload)
+
+    async def _listen_psycopg(self, driver_connection: Any) -> None:
+        async for notify in driver_connection.notifies():
+            self.publish(notify.payload)
+
+    def publish(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning("Bad %s notification payload: %s", self.channel, payload)
+            return
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @contextlib.contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+
+project_changes_hub = ProjectChangesHub()
@@ -0,0 +1,98 @@
+'''
+Hash partitioning of the features table by project_id.
+
+The table is rebuilt by the CLI (geojson-crud partition-features) on a migrated
+database, so switching between layouts does not need alembic downgrades.
+'''
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql import text
+
+from app.api.geojson import set_statement_timeout
+
+
+logger = logging.getLogger(__name__)
+
+features_partitions_sql = '''
+    SELECT
+        EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'features'::regclass) AS partitioned,
+        (SELECT array_agg(inhrelid::regclass::text) FROM pg_inherits WHERE inhparent = 'features'::regclass) AS partitions
+'''
+
+features_copy_columns_sql = '''
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+    FROM pg_attribute
+    WHERE attrelid = 'features'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+'''
+
+features_indexes_sql = '''
+    SELECT indexname, indexdef FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = 'features'
+    AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = 'features'::regclass)
+'''
+
+
+async def features_partitions(conn: AsyncConnection) -> list[str]:
+    '''
+    Hash partitions of the features table, empty if it is a regular table.
+    '''
+    row = (await conn.execute(text(features_partitions_sql))).one()
+    return row.partitions or [] if row.partitioned else []
+
+
+async def partition_features(db_engine: AsyncEngine, partitions: int) -> bool:
+    '''
+    Rebuilds features as a table hash partitioned into partitions tables
+    (a regular table with 0), in one transaction holding an ACCESS EXCLUSIVE lock.
+    Columns, defaults and indexes are taken from the current table.
+
+    Returns False when the table already has the layout, so it can be run again
+    after an interrupted conversion or on every shard.
+    '''
+    async with db_engine.begin() as conn:
+        await set_statement_timeout(conn, 0)
+        await conn.execute(text("LOCK TABLE features IN ACCESS EXCLUSIVE MODE"))
+        old_partitions = await features_partitions(conn)
+        if len(old_partitions) == partitions:
+            return False
+
+        columns = (await conn.execute(text(features_copy_columns_sql))).scalar()
+        indexes = (await conn.execute(text(features_indexes_sql))).fetchall()
+        sequence = (await conn.execute(text("SELECT pg_get_serial_sequence('features', 'feature_id')"))).scalar()
+
+        await conn.execute(text("ALTER TABLE features RENAME TO features_old"))
+        await conn.execute(text("ALTER TABLE features_old RENAME CONSTRAINT features_pkey TO features_old_pkey"))
+        for index in indexes:
+            await conn.execute(text(f"ALTER INDEX {index.indexname} RENAME TO {index.indexname}_old"))
+        for old_partition in old_partitions:
+            await conn.execute(text(f"ALTER TABLE {old_partition} RENAME TO {old_partition}_old"))
+
+        await conn.execute(text(f'''
+            CREATE TABLE features (LIKE features_old INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE)
+            {"PARTITION BY HASH (project_id)" if partitions else ""}
+        '''))
+        for remainder in range(partitions):
+            await conn.execute(text(f'''
+                CREATE TABLE features_p{remainder} PARTITION OF features
+                FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+            '''))
+        await conn.execute(text(f"INSERT INTO features ({columns}) SELECT {columns} FROM features_old"))
+        await conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY features.feature_id"))
+        await conn.execute(text("DROP TABLE features_old"))
+
+        await conn.execute(text(f'''
+            ALTER TABLE features ADD CONSTRAINT features_pkey
+            PRIMARY KEY {"(feature_id, project_id)" if partitions else "(feature_id)"}
+        '''))
+        await conn.execute(text('''
+            ALTER TABLE features ADD CONSTRAINT features_project_id_fkey
+            FOREIGN KEY (project_id) REFERENCES projects (project_id) ON DELETE CASCADE
+        '''))
+        for index in indexes:
+            # indexes of a partitioned table are defined ON ONLY the parent
+            await conn.execute(text(index.indexdef.replace(" ON ONLY ", " ON ", 1)))
+        await conn.execute(text("ANALYZE features"))
+
+    logger.info("features table rebuilt with %d partitions", partitions)
+    return True
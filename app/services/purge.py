@@ -0,0 +1,94 @@
+import asyncio
+import contextlib
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+
+logger = logging.getLogger(__name__)
+
+claim_deleted_project_sql = '''
+    SELECT project_id FROM projects
+    WHERE deleted_at IS NOT NULL
+    ORDER BY deleted_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+'''
+
+purge_features_sql = '''
+    DELETE FROM features
+    WHERE project_id = :project_id
+    AND feature_id IN (
+        SELECT feature_id FROM features
+        WHERE project_id = :project_id
+        LIMIT :batch_size
+    )
+'''
+
+purge_project_sql = '''
+    DELETE FROM projects WHERE project_id = :project_id
+'''
+
+
+class DeletedProjectsPurger:
+    '''
+    Background removal of soft deleted projects: features are deleted in
+    batches of batch_size rows (one short transaction each) with throttle
+    seconds of sleep in between, the project row goes with the last batch.
+
+    Projects are claimed with SKIP LOCKED, so purgers of all workers share the work.
+    '''
+
+    def __init__(self, batch_size: int, throttle: float, idle_interval: float):
+        self.batch_size = batch_size
+        self.throttle = throttle
+        self.idle_interval = idle_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def purge_batch(self, db_engine: AsyncEngine) -> int:
+        '''
+        Returns number of deleted rows, 0 when there is nothing to purge.
+        '''
+        async with db_engine.begin() as conn:
+            result = await conn.execute(
+                text(claim_deleted_project_sql),
+                execution_options={"query_name": "claim_deleted_project"}
+            )
+            project_id = result.scalar()
+            if project_id is None:
+                return 0
+            result = await conn.execute(
+                text(purge_features_sql),
+                {"project_id": project_id, "batch_size": self.batch_size},
+                execution_options={"query_name": "purge_features"}
+            )
+            deleted = result.rowcount
+            if deleted < self.batch_size:
+                await conn.execute(
+                    text(purge_project_sql),
+                    {"project_id": project_id},
+                    execution_options={"query_name": "purge_project"}
+                )
+                deleted += 1
+            return deleted
+
+    async def run(self, db_engine: AsyncEngine) -> None:
+        while True:
+            try:
+                deleted = await self.purge_batch(db_engine)
+            except Exception:
+                logger.exception("Purging deleted projects failed")
+                deleted = 0
+            await asyncio.sleep(self.throttle if deleted else self.idle_interval)
+
+    async def start(self, db_engine: AsyncEngine) -> None:
+        self._task = asyncio.create_task(self.run(db_engine))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
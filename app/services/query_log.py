@@ -0,0 +1,59 @@
+import json
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("app.slow_query")
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> dict[str, int]:
+    rows = parameters if executemany else [parameters]
+    return {
+        "rows": len(rows),
+        "params": len(rows[0]) if rows and rows[0] else 0,
+    }
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: int) -> None:
+    '''
+    Statements are named with the `query_name` execution option,
+    parameters are logged by shape only so no project data lands in logs.
+    '''
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        if duration_ms < threshold_ms:
+            return
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "name": context.execution_options.get("query_name", "unnamed"),
+            "parameters": parameters_shape(parameters, executemany),
+            "duration_ms": round(duration_ms, 2),
+            "rowcount": cursor.rowcount,
+        }))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        start_times = connection.info.get("query_start_time") if connection is not None else None
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+        context = exception_context.execution_context
+        logger.warning(json.dumps({
+            "event": "failed_query",
+            "name": context.execution_options.get("query_name", "unnamed") if context else "unnamed",
+            "parameters": parameters_shape(exception_context.parameters, context.executemany if context else False),
+            "duration_ms": round(duration_ms, 2),
+            "error": getattr(exception_context.original_exception, "sqlstate", None)
+            or type(exception_context.original_exception).__name__,
+        }))
@@ -0,0 +1,39 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+READ_PRIMARY_COOKIE = "read_primary"
+WRITE_METHODS = ("POST", "PATCH", "PUT", "DELETE")
+
+
+class ReadYourWritesMiddleware:
+    '''
+    Successful requests to write_paths set READ_PRIMARY_COOKIE for window seconds,
+    reads of a client holding the cookie go to the primary (get_db_read_shards),
+    so the client sees its own writes before replicas catch up.
+    '''
+
+    def __init__(self, app: ASGIApp, write_paths: tuple[str, ...], window: int):
+        self.app = app
+        self.write_paths = write_paths
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or not scope["path"].startswith(self.write_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import zlib
+from datetime import date
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence, Union
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+
+projects_sequence_sql = '''
+    SELECT increment_by, start_value
+    FROM pg_sequences
+    WHERE sequencename = 'projects_project_id_seq'
+'''
+
+
+# outside of crc32 range of unique_index_key
+ALL_UNIQUE_INDEXES_LOCK_KEY = -1
+
+# keys are locked in ascending order, so concurrent lockers do not deadlock
+unique_index_lock_sql = '''
+    SELECT pg_advisory_xact_lock_shared(:all_key), (
+        SELECT COUNT(pg_advisory_xact_lock(key))
+        FROM (SELECT key FROM unnest(CAST(:keys AS bigint[])) AS key ORDER BY key) AS keys
+    )
+'''
+
+
+class ShardsMisconfigured(Exception):
+    pass
+
+
+class ProjectExists(Exception):
+    pass
+
+
+def project_shard(project_id: int, shard_count: int) -> int:
+    '''
+    Shard i hands out project ids i + 1, i + 1 + shard_count, ...
+    (projects sequence INCREMENT BY shard_count), the owner follows from the id.
+    '''
+    return (project_id - 1) % shard_count
+
+
+def unique_index_key(
+    name: str,
+    start_date: Union[date, str],
+    end_date: Union[date, str],
+) -> int:
+    return zlib.crc32(f"{name}|{start_date}|{end_date}".encode())
+
+
+def unique_index_shard(
+    name: str,
+    start_date: Union[date, str],
+    end_date: Union[date, str],
+    shard_count: int,
+) -> int:
+    '''
+    New projects are placed by (name, start_date, end_date), so duplicates
+    meet on one shard and are rejected by its unique index.
+    '''
+    return unique_index_key(name, start_date, end_date) % shard_count
+
+
+class Shards:
+    '''
+    Engines of all shards, the first one is the default database (DB_CONFIG).
+    '''
+
+    def __init__(self, engines: Sequence[AsyncEngine]):
+        self.engines = list(engines)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def for_project(self, project_id: int) -> AsyncEngine:
+        return self.engines[project_shard(project_id, len(self.engines))]
+
+    def for_new_project(self, project_data: dict[str, Any]) -> AsyncEngine:
+        return self.engines[unique_index_shard(
+            project_data["name"],
+            project_data["start_date"],
+            project_data["end_date"],
+            len(self.engines),
+        )]
+
+    @contextlib.asynccontextmanager
+    async def unique_index_lock(self, *projects_data: dict[str, Any]) -> AsyncIterator[None]:
+        '''
+        Transaction advisory locks of (name, start_date, end_date) of projects placed
+        on the same shard, held while the other shards are checked for the names and
+        the projects are written. They share ALL_UNIQUE_INDEXES_LOCK_KEY with other
+        single project locks.
+        '''
+        if len(self.engines) == 1:
+            yield
+            return
+        keys = sorted({
+            unique_index_key(project_data["name"], project_data["start_date"], project_data["end_date"])
+            for project_data in projects_data
+        })
+        async with self.for_new_project(projects_data[0]).connect() as conn:
+            await conn.execute(text(unique_index_lock_sql), {"all_key": ALL_UNIQUE_INDEXES_LOCK_KEY, "keys": keys})
+            yield
+
+    @contextlib.asynccontextmanager
+    async def unique_indexes_lock(self) -> AsyncIterator[None]:
+        '''
+        Exclusive ALL_UNIQUE_INDEXES_LOCK_KEY lock on every shard (in shard order),
+        held by operations placing or moving many projects at once (batch create,
+        bulk date change, import) while they check all shards and write.
+        '''
+        if len(self.engines) == 1:
+            yield
+            return
+        async with contextlib.AsyncExitStack() as stack:
+            for engine in self.engines:
+                conn = await stack.enter_async_context(engine.connect())
+                await conn.execute(text("SELECT pg_advisory_xact_lock(:all_key)"), {"all_key": ALL_UNIQUE_INDEXES_LOCK_KEY})
+            yield
+
+    async def gather(self, function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> list[Any]:
+        '''
+        Runs function(engine, *args, **kwargs) on all shards concurrently, results in shard order.
+        '''
+        return await asyncio.gather(*(function(engine, *args, **kwargs) for engine in self.engines))
+
+    async def check_sequences(self) -> None:
+        '''
+        Projects sequence of shard i has to start at i + 1 and increment by number of shards
+        (alembic -x shard_index=i -x shard_count=n upgrade head), otherwise shards hand out the same ids.
+        '''
+        if len(self.engines) == 1:
+            return
+        for shard_index, engine in enumerate(self.engines):
+            async with engine.connect() as conn:
+                sequence = (await conn.execute(text(projects_sequence_sql))).fetchone()
+            if (
+                sequence is None
+                or sequence.increment_by != len(self.engines)
+                or project_shard(sequence.start_value, len(self.engines)) != shard_index
+            ):
+                raise ShardsMisconfigured(
+                    f"Projects sequence of shard {shard_index} does not match {len(self.engines)} shards."
+                )
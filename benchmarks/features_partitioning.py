@@ -0,0 +1,142 @@
+'''
+Features table benchmark, run it against a scratch database (DB_CONFIG)
+once with regular and once with partitioned features table:
+
+    python -m benchmarks.features_partitioning --features 100000000
+    python -m app.cli partition-features 16
+    python -m benchmarks.features_partitioning --skip-seed
+
+Deletes are rolled back, so repeated runs measure the same data.
+'''
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+from app.api.geojson import read_project_entries_with_pagination, read_project_entry
+from app.config import config
+from app.services.database import databasemanager
+
+
+SEED_CHUNK_PROJECTS = 1000
+
+seed_projects_sql = '''
+    INSERT INTO projects (name, start_date, end_date, geo_project_type)
+    SELECT
+        'benchmark ' || i,
+        DATE '2000-01-01' + i % 7000,
+        DATE '2000-01-01' + i % 7000 + 30,
+        'FeatureCollection'::geo_project_type
+    FROM generate_series(:first, :last) AS i
+'''
+
+seed_features_sql = '''
+    INSERT INTO features (project_id, properties, geometry)
+    SELECT
+        p.project_id,
+        '{}'::json,
+        ST_MakeEnvelope(
+            p.project_id % 360 - 180 + n * 0.0001,
+            p.project_id / 360 % 180 - 90 + n * 0.0001,
+            p.project_id % 360 - 180 + n * 0.0001 + 0.00005,
+            p.project_id / 360 % 180 - 90 + n * 0.0001 + 0.00005,
+            4326
+        )
+    FROM projects p, generate_series(1, :features_per_project) AS n
+    WHERE p.project_id BETWEEN :first_project_id AND :last_project_id
+'''
+
+
+async def seed(db_engine: AsyncEngine, features: int, features_per_project: int) -> None:
+    projects = features // features_per_project
+    for first in range(1, projects + 1, SEED_CHUNK_PROJECTS):
+        last = min(first + SEED_CHUNK_PROJECTS - 1, projects)
+        async with db_engine.begin() as conn:
+            result = await conn.execute(
+                text(seed_projects_sql + " RETURNING project_id"),
+                {"first": first, "last": last}
+            )
+            project_ids = result.scalars().all()
+            await conn.execute(
+                text(seed_features_sql),
+                {
+                    "features_per_project": features_per_project,
+                    "first_project_id": min(project_ids),
+                    "last_project_id": max(project_ids),
+                }
+            )
+        print(f"seeded {last * features_per_project} features", flush=True)
+    async with db_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE projects"))
+        await conn.execute(text("VACUUM ANALYZE features"))
+
+
+async def measure(name: str, repeat: int, run: Callable[[], Awaitable[None]]) -> None:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{name:<32} median {statistics.median(durations):>10.2f} ms   p95 {p95:>10.2f} ms")
+
+
+async def run_benchmark(db_engine: AsyncEngine, repeat: int) -> None:
+    async with db_engine.connect() as conn:
+        partitions = (await conn.execute(text(
+            "SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'features'::regclass"
+        ))).scalar()
+        total = (await conn.execute(text("SELECT COUNT(*) FROM projects"))).scalar()
+    print(f"features partitions: {partitions or 'not partitioned'}, projects: {total}")
+    if not total:
+        return
+
+    async def delete_project_features():
+        async with db_engine.connect() as conn:
+            async with conn.begin() as trans:
+                await conn.execute(
+                    text("DELETE FROM features WHERE project_id = :project_id"),
+                    {"project_id": random.randint(1, total)}
+                )
+                await trans.rollback()
+
+    async def read_project():
+        await read_project_entry(db_engine, random.randint(1, total))
+
+    async def read_page():
+        page_start = random.randint(1, max(1, total - 10))
+        await read_project_entries_with_pagination(db_engine, page_start, page_start + 9)
+
+    async def vacuum_features():
+        async with db_engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM features"))
+
+    await measure("delete features of project", repeat, delete_project_features)
+    await measure("read project", repeat, read_project)
+    await measure("read page of 10 projects", repeat, read_page)
+    await measure("vacuum features", 1, vacuum_features)
+
+
+async def main(args: argparse.Namespace) -> None:
+    databasemanager.init(config.DB_CONFIG, statement_timeout_ms=0)
+    async with databasemanager.engine() as db_engine:
+        if not args.skip_seed:
+            await seed(db_engine, args.features, args.features_per_project)
+        await run_benchmark(db_engine, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", type=int, default=1_000_000)
+    parser.add_argument("--features-per-project", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
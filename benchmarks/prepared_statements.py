@@ -0,0 +1,92 @@
+'''
+Statement caching benchmark, run it against the features benchmark dataset
+(python -m benchmarks.features_partitioning) with an asyncpg DB_CONFIG:
+
+    python -m benchmarks.prepared_statements
+
+Reports building a statement per request against the cached variant,
+planning time of a statement planned on every execution against a prepared
+one, and latency of /geojson/read through the application (request dependencies
+and the pools they keep) with and without the prepared statement cache.
+'''
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+from app.api.geojson import fetch_projects_stmt, fetch_projects_variant
+from app.config import config
+from app.main import init_app
+from app.services.database import create_engine, databasemanager
+from benchmarks.features_partitioning import measure
+
+
+def measure_build(repeat: int) -> None:
+    for name, build in [
+        ("build statement per request", lambda: fetch_projects_variant.__wrapped__("project_id", (), "geometry")),
+        ("cached statement variant", lambda: fetch_projects_stmt(project_id=1)),
+    ]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            build()
+        print(f"{name:<32} {(time.perf_counter() - start) / repeat * 1_000_000:>10.2f} us")
+
+
+async def planning_times(db_engine: AsyncEngine, total: int, repeat: int) -> None:
+    select_stmt = fetch_projects_stmt(project_id=1)
+    prepared_sql = str(select_stmt.compile(dialect=asyncpg_dialect()))
+    planned, prepared = [], []
+    async with db_engine.connect() as conn:
+        await conn.execute(text(f"PREPARE benchmark_read_project (bigint) AS {prepared_sql}"))
+        for _ in range(repeat):
+            project_id = random.randint(1, total)
+            result = await conn.execute(
+                text(f"EXPLAIN (ANALYZE, FORMAT JSON) {select_stmt.text}"),
+                {"project_id": project_id}
+            )
+            planned.append(result.scalar()[0]["Planning Time"])
+            result = await conn.execute(
+                text("EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE benchmark_read_project (:project_id)"),
+                {"project_id": project_id}
+            )
+            prepared.append(result.scalar()[0]["Planning Time"])
+        await conn.execute(text("DEALLOCATE benchmark_read_project"))
+    for name, durations in [("planning per execution", planned), ("planning of prepared statement", prepared)]:
+        print(f"{name:<32} median {statistics.median(durations):>10.3f} ms   max {max(durations):>10.3f} ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    measure_build(args.repeat * 100)
+
+    db_engine = create_engine(config.DB_CONFIG, statement_timeout_ms=0)
+    async with db_engine.connect() as conn:
+        total = (await conn.execute(text("SELECT COUNT(*) FROM projects"))).scalar()
+    print(f"projects: {total}")
+    if not total:
+        return
+    await planning_times(db_engine, total, args.repeat)
+    await db_engine.dispose()
+
+    for cache_size in (0, config.DB_PREPARED_STATEMENT_CACHE_SIZE):
+        databasemanager.init(config.DB_CONFIG, statement_timeout_ms=0, prepared_statement_cache_size=cache_size)
+        transport = httpx.ASGITransport(app=init_app(init_db=False))
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+            async def read_project():
+                response = await client.get(f"/geojson/read/{random.randint(1, total)}")
+                response.raise_for_status()
+
+            await measure(f"read project, cache size {cache_size}", args.repeat, read_project)
+        await databasemanager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -11,7 +11,9 @@ from sqlalchemy.sql import text
 from app.main import init_app
 from app.services.database import (
     get_db_engine,
+    get_db_read_shards,
     get_db_session,
+    get_db_shards,
     databasemanager
 )
 
@@ -85,13 +87,27 @@ async def session_override(app, connection_test):
 
 @pytest.fixture(scope="function", autouse=True)
 async def engine_override(app, connection_test):
+    # TestClient runs the app in its own event loop, connections it opened are not reused by tests
     async def get_db_engine_override():
         async with databasemanager.engine() as engine:
             yield engine
+        await engine.dispose()
 
     app.dependency_overrides[get_db_engine] = get_db_engine_override
 
 
+@pytest.fixture(scope="function", autouse=True)
+async def shards_override(app, connection_test):
+    async def get_db_shards_override():
+        async with databasemanager.shards() as shards:
+            yield shards
+        for engine in shards.engines:
+            await engine.dispose()
+
+    app.dependency_overrides[get_db_shards] = get_db_shards_override
+    app.dependency_overrides[get_db_read_shards] = get_db_shards_override
+
+
 @pytest.fixture(scope="function")
 def date_20250101():
     return '2025-01-01'
@@ -266,3 +282,45 @@ def broken_features_file():
     file = BytesIO(json.dumps(json_dict).encode())
     file.name = "broken_features.json"
     return file
+
+
+@pytest.fixture(scope="function")
+def batch_items(point_feature_dict, feature_collection_dict, date_20250101, date_20250103):
+    return [
+        {
+            "name": "batch point",
+            "start_date": date_20250101,
+            "end_date": date_20250103,
+            "geojson": point_feature_dict,
+        },
+        {
+            "name": "batch feature collection",
+            "description": "batch feature collection description",
+            "start_date": date_20250101,
+            "end_date": date_20250103,
+            "geojson": feature_collection_dict,
+        },
+    ]
+
+
+def ndjson_file(items, name):
+    file = BytesIO("\n".join(json.dumps(item) for item in items).encode())
+    file.name = name
+    return file
+
+
+@pytest.fixture(scope="function")
+def batch_file(batch_items):
+    return ndjson_file(batch_items, "batch.ndjson")
+
+
+@pytest.fixture(scope="function")
+def batch_with_errors_file(batch_items, date_20250101, date_20250103):
+    return ndjson_file(
+        batch_items + [
+            batch_items[0],
+            {"name": "no geojson", "start_date": date_20250101, "end_date": date_20250103},
+            {"name": "bad dates", "start_date": date_20250103, "end_date": date_20250101, "geojson": {}},
+        ],
+        "batch_with_errors.ndjson"
+    )
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionControlMiddleware, AdmissionRejected
+
+
+def make_controller(queue_timeout=0.0):
+    return AdmissionController(
+        max_concurrent=2,
+        max_inflight_bytes=100,
+        queue_timeout=queue_timeout,
+        retry_after=7,
+    )
+
+
+async def test_admission_limits_concurrency_and_bytes():
+    controller = make_controller()
+
+    async with controller.admit(60):
+        with pytest.raises(AdmissionRejected):
+            async with controller.admit(60):
+                pass
+        async with controller.admit(40):
+            with pytest.raises(AdmissionRejected) as e:
+                async with controller.admit(0):
+                    pass
+            assert e.value.retry_after == 7
+
+    async with controller.admit(1000):
+        pass
+
+
+async def test_admission_queues_until_slot_is_released():
+    controller = make_controller(queue_timeout=1.0)
+    await controller.acquire(100)
+
+    waiting = asyncio.create_task(controller.acquire(50))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    await controller.release(100)
+    await asyncio.wait_for(waiting, 1.0)
+    await controller.release(50)
+
+
+async def test_upload_without_content_length_is_charged_max_inflight_bytes():
+    controller = make_controller()
+    charged = []
+    messages = []
+
+    async def app(scope, receive, send):
+        charged.append(controller._inflight_bytes)
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = AdmissionControlMiddleware(app, controller, ingest_paths=("/geojson/create",))
+    scope = {"type": "http", "method": "POST", "path": "/geojson/create", "headers": []}
+
+    await middleware(scope, None, send)
+    assert charged == [controller.max_inflight_bytes]
+    assert controller._inflight_bytes == 0
+
+    async with controller.admit(1):
+        await middleware(scope, None, send)
+    assert charged == [controller.max_inflight_bytes]
+    assert messages[0]["status"] == 429
+
+    await middleware({**scope, "headers": [(b"content-length", b"10")]}, None, send)
+    assert charged == [controller.max_inflight_bytes, 10]
+
+
+def test_ingest_rejected_with_retry_after_reads_not_throttled(
+    app,
+    client,
+    date_20250101,
+    point_feature_file,
+):
+    controller = app.state.admission_controller
+    controller.queue_timeout = 0
+    controller._active = controller.max_concurrent
+
+    response = client.post(
+        "/geojson/create",
+        params={
+            "name": "point location",
+            "start_date": date_20250101,
+            "end_date": date_20250101,
+        },
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(controller.retry_after)
+
+    response = client.get("/geojson/list")
+    assert response.status_code == 200
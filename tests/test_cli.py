@@ -0,0 +1,117 @@
+import json
+
+from sqlalchemy.sql import text
+
+from app.cli import export_overlaps, export_projects, import_projects, partition_shards_features
+from app.services.database import databasemanager
+from app.services.partitioning import features_partitions
+
+
+async def test_import_export_round_trip(
+    tmp_path,
+    batch_items,
+    point_feature_dict,
+    date_20250101,
+    date_20250103,
+):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "projects.ndjson").write_text("\n".join(json.dumps(item) for item in batch_items))
+    (source / "plain point.geojson").write_text(json.dumps(point_feature_dict))
+    (source / "broken.json").write_text("{")
+    state_file = tmp_path / "import.state"
+
+    async with databasemanager.shards() as shards:
+        imported = await import_projects(
+            shards,
+            source,
+            state_file=state_file,
+            batch_size=1,
+            start_date=date_20250101,
+            end_date=date_20250103,
+        )
+        assert imported == 3
+        assert sorted(state_file.read_text().splitlines()) == [
+            "plain point.geojson",
+            "projects.ndjson:1",
+            "projects.ndjson:2",
+        ]
+
+        assert await import_projects(shards, source, state_file=state_file) == 0
+        assert await import_projects(
+            shards,
+            source,
+            start_date=date_20250101,
+            end_date=date_20250103,
+        ) == 0
+
+        ndjson = tmp_path / "backup.ndjson"
+        assert await export_projects(shards, ndjson) == 3
+        exported = [json.loads(line) for line in ndjson.read_text().splitlines()]
+        assert {item["name"] for item in exported} == {
+            "batch point",
+            "batch feature collection",
+            "plain point",
+        }
+
+        geojson_dir = tmp_path / "backup"
+        assert await export_projects(shards, geojson_dir, "geojson") == 3
+        exported_files = sorted(geojson_dir.iterdir())
+        assert len(exported_files) == 3
+        assert json.loads(exported_files[0].read_text())["project"]["start_date"] == date_20250101
+
+
+async def test_export_overlaps(tmp_path, date_20250101, date_20250103):
+    source = tmp_path / "projects.ndjson"
+    source.write_text("\n".join(
+        json.dumps({
+            "name": f"square {x}",
+            "start_date": date_20250101,
+            "end_date": date_20250103,
+            "geojson": {
+                "type": "Feature",
+                "properties": {},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]],
+                },
+            },
+        })
+        for x in [0, 0.5, 1.25, 5]
+    ))
+
+    async with databasemanager.shards() as shards:
+        assert await import_projects(shards, source) == 4
+
+        output = tmp_path / "overlaps.ndjson"
+        assert await export_overlaps(shards, output) == 2
+        pairs = [json.loads(line) for line in output.read_text().splitlines()]
+        assert all(pair["intersection_area"] > 0 for pair in pairs)
+        assert [(pair["project_id"], pair["other_project_id"]) for pair in pairs] == [(1, 2), (2, 3)]
+
+
+async def test_partition_features(tmp_path, batch_items):
+    source = tmp_path / "projects.ndjson"
+    source.write_text("\n".join(json.dumps(item) for item in batch_items))
+
+    async with databasemanager.shards() as shards:
+        assert await import_projects(shards, source) == 2
+
+        assert await partition_shards_features(shards, 4) == 1
+        assert await partition_shards_features(shards, 4) == 0
+        async with databasemanager._engine.connect() as conn:
+            assert len(await features_partitions(conn)) == 4
+            indexes = (await conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE tablename = 'features' ORDER BY indexname"
+            ))).scalars().all()
+        assert indexes == ["features_pkey", "ix_features_geometry", "ix_features_project_id"]
+        partitioned = tmp_path / "partitioned.ndjson"
+        partitioned.write_text("\n".join(json.dumps({**item, "name": f"{item['name']} 2"}) for item in batch_items))
+        assert await import_projects(shards, partitioned) == 2
+        assert await export_projects(shards, tmp_path / "backup.ndjson") == 4
+
+        assert await partition_shards_features(shards, 0) == 1
+        async with databasemanager._engine.connect() as conn:
+            assert await features_partitions(conn) == []
+            features = (await conn.execute(text("SELECT count(*) FROM features"))).scalar()
+        assert features > 0
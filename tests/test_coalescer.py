@@ -0,0 +1,101 @@
+import asyncio
+from datetime import date
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import text
+
+from app.api.geojson import get_geo_data_from_feature, InvalidGeometries
+from app.services.coalescer import CreateCoalescer
+from app.services.database import databasemanager
+from app.services.shards import Shards
+
+
+def project_data(name, date_20250101):
+    return {
+        "name": name,
+        "start_date": date.fromisoformat(date_20250101),
+        "end_date": date.fromisoformat(date_20250101),
+        "geo_project_type": "Feature",
+    }
+
+
+async def test_concurrent_creates_share_one_transaction(date_20250101, point_feature_dict):
+    coalescer = CreateCoalescer(window=0.05, max_batch=100)
+    geo_data = get_geo_data_from_feature(point_feature_dict)
+
+    async with databasemanager.engine() as engine:
+        projects = [project_data(f"point {i}", date_20250101) for i in range(5)]
+        projects[1]["description"] = "1"
+        projects[3]["description"] = "3"
+        results = await asyncio.gather(*(
+            coalescer.create(Shards([engine]), project, geo_data) for project in projects
+        ))
+
+        async with engine.connect() as connection:
+            rows = (await connection.execute(text(
+                "SELECT project_id, name, description, xmin::text::bigint AS xid FROM projects ORDER BY project_id"
+            ))).fetchall()
+
+    assert [project_id for project_id, _ in results] == [row.project_id for row in rows]
+    assert [row.name for row in rows] == [f"point {i}" for i in range(5)]
+    assert [row.description for row in rows] == [None, "1", None, "3", None]
+    assert len({row.xid for row in rows}) == 1
+
+
+async def test_failed_batch_is_retried_per_request(date_20250101, point_feature_dict):
+    coalescer = CreateCoalescer(window=0.05, max_batch=3)
+    geo_data = get_geo_data_from_feature(point_feature_dict)
+
+    async with databasemanager.engine() as engine:
+        results = await asyncio.gather(
+            coalescer.create(Shards([engine]), project_data("point", date_20250101), geo_data),
+            coalescer.create(Shards([engine]), project_data("point", date_20250101), geo_data),
+            coalescer.create(Shards([engine]), project_data("other point", date_20250101), geo_data),
+            return_exceptions=True,
+        )
+
+        async with engine.connect() as connection:
+            names = (await connection.execute(text("SELECT name FROM projects ORDER BY name"))).scalars().all()
+
+    assert sum(isinstance(result, IntegrityError) for result in results) == 1
+    assert isinstance(results[2], tuple)
+    assert names == ["other point", "point"]
+
+
+def test_create_with_coalescer(app, client, date_20250101, point_feature_file):
+    app.state.create_coalescer = CreateCoalescer(window=0.01, max_batch=10)
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "point location", "start_date": date_20250101, "end_date": date_20250101},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 201
+    assert client.get(f"/geojson/read/{response.json()['project_id']}").json()["name"] == "point location"
+
+
+async def test_invalid_geometries_are_rejected_within_batch(date_20250101, point_feature_dict):
+    coalescer = CreateCoalescer(window=0.05, max_batch=3)
+    geo_data = get_geo_data_from_feature(point_feature_dict)
+    bowtie_geo_data = get_geo_data_from_feature({
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]},
+    })
+
+    async with databasemanager.engine() as engine:
+        results = await asyncio.gather(
+            coalescer.create(Shards([engine]), project_data("point", date_20250101), geo_data, "reject"),
+            coalescer.create(Shards([engine]), project_data("bowtie", date_20250101), bowtie_geo_data, "reject"),
+            coalescer.create(Shards([engine]), project_data("other point", date_20250101), geo_data, "reject"),
+            return_exceptions=True,
+        )
+
+        async with engine.connect() as connection:
+            names = (await connection.execute(text("SELECT name FROM projects ORDER BY name"))).scalars().all()
+            features = (await connection.execute(text("SELECT count(*) FROM features"))).scalar()
+
+    assert isinstance(results[1], InvalidGeometries)
+    assert [feature["feature_index"] for feature in results[1].invalid_features] == [0]
+    assert results[0][1] == [] and results[2][1] == []
+    assert names == ["other point", "point"]
+    assert features == 2
@@ -0,0 +1,96 @@
+import json
+import logging
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text
+
+from fastapi.testclient import TestClient
+
+from app.api.geojson import query_name, set_statement_timeout
+from app.main import WRITE_PATHS
+from app.services.database import DatabaseSessionManager, databasemanager, get_db_engine, get_db_shards
+from app.services.query_log import install_slow_query_log
+from app.services.replicas import READ_PRIMARY_COOKIE, ReadYourWritesMiddleware
+
+
+def test_statement_timeout_returns_504(app, client):
+    async def sleep():
+        async with databasemanager.connect() as connection:
+            await set_statement_timeout(connection, 10)
+            await connection.execute(text("SELECT pg_sleep(1)"))
+
+    app.add_api_route("/sleep", sleep)
+
+    response = client.get("/sleep")
+    assert response.status_code == 504
+    assert response.json()["message"] == "Database query timed out."
+
+
+async def test_slow_query_log(caplog):
+    engine = create_async_engine(databasemanager._engine.url)
+    install_slow_query_log(engine.sync_engine, threshold_ms=0)
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        async with engine.connect() as connection:
+            await connection.execute(
+                text("SELECT generate_series(1, :rows)"),
+                {"rows": 3},
+                execution_options=query_name("series"),
+            )
+    await engine.dispose()
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "slow_query"
+    assert record["name"] == "series"
+    assert record["parameters"] == {"rows": 1, "params": 1}
+    assert record["duration_ms"] >= 0
+
+
+async def test_read_engine_routes_to_replicas():
+    manager = DatabaseSessionManager()
+    manager.init(databasemanager._engine.url, replica_hosts=[databasemanager._engine.url] * 2)
+    try:
+        engines = []
+        for _ in range(3):
+            async with manager.read_engine() as engine:
+                async with engine.connect() as connection:
+                    assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+                engines.append(engine)
+        assert engines[0] is not engines[1]
+        assert engines[0] is engines[2]
+        assert manager._engine not in engines
+
+        async with manager.read_engine(primary=True) as engine:
+            assert engine is manager._engine
+    finally:
+        await manager.close()
+
+
+async def test_request_dependencies_keep_pools():
+    pool = databasemanager._engine.pool
+    async for shards in get_db_shards():
+        async with shards.engines[0].connect() as connection:
+            assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+    async for engine in get_db_engine():
+        assert engine is databasemanager._engine
+    assert databasemanager._engine.pool is pool
+    assert pool.checkedin() >= 1
+
+
+def test_writes_set_read_primary_cookie(app, date_20250101, point_feature_file):
+    app.add_middleware(ReadYourWritesMiddleware, write_paths=WRITE_PATHS, window=10)
+    with TestClient(app) as client:
+        response = client.get("/geojson/read/1")
+        assert response.status_code == 404
+        assert READ_PRIMARY_COOKIE not in response.cookies
+
+        response = client.post(
+            "/geojson/create",
+            params={"name": "point location", "start_date": date_20250101, "end_date": date_20250101},
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+        assert response.cookies[READ_PRIMARY_COOKIE] == "1"
+        assert "Max-Age=10" in response.headers["set-cookie"]
+
+        response = client.delete("/geojson/delete/1")
+        assert response.cookies[READ_PRIMARY_COOKIE] == "1"
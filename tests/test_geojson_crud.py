@@ -1,3 +1,11 @@
+import json
+import math
+import pytest
+from io import BytesIO
+
+from app.config import config, geometry_validity
+
+
 def test_create_user_happy_path(
     client,
     date_20250101,
@@ -480,3 +488,728 @@ def test_list_with_pagination(
     assert response_json["page"] == 3
     assert response_json["size"] == 2
     assert response_json["projects"] == []
+
+
+def test_batch_create(
+    client,
+    batch_items,
+    batch_file,
+):
+    response = client.post("/geojson/batch-create", files={"file": batch_file})
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["created"] == 2
+    assert [item["index"] for item in response_json["items"]] == [0, 1]
+
+    project_id = response_json["items"][1]["project_id"]
+    response = client.get(f"/geojson/read/{project_id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == batch_items[1]["name"]
+    assert response.json()["description"] == batch_items[1]["description"]
+    assert len(response.json()["featurecollection"]["features"]) == 3
+
+    response = client.post("/geojson/batch-create", files={"file": batch_file})
+    assert response.status_code == 422
+    assert response.json()["created"] == 0
+    assert response.json()["items"][0]["message"] == "Project name: batch point exists."
+
+    response = client.get("/geojson/list")
+    assert len(response.json()) == 2
+
+
+def test_batch_create_atomic_and_partial(
+    client,
+    batch_with_errors_file,
+):
+    response = client.post("/geojson/batch-create", files={"file": batch_with_errors_file})
+    assert response.status_code == 422
+    response_json = response.json()
+    assert response_json["created"] == 0
+    assert [item["index"] for item in response_json["items"]] == [2, 3, 4]
+    assert response_json["items"][0]["message"] == "Project name: batch point exists."
+
+    response = client.get("/geojson/list")
+    assert response.json() == []
+
+    response = client.post(
+        "/geojson/batch-create",
+        params={"atomic": False},
+        files={"file": batch_with_errors_file},
+    )
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["created"] == 2
+    assert [item.get("project_id") is not None for item in response_json["items"]] == [
+        True, True, False, False, False
+    ]
+    assert all(item["message"] for item in response_json["items"][2:])
+
+    response = client.get("/geojson/list")
+    assert len(response.json()) == 2
+
+
+def test_changes(
+    client,
+    monkeypatch,
+    date_20250101,
+    date_20250103,
+    point_feature_file,
+):
+    monkeypatch.setattr(config, "CHANGE_FEED_SAFETY_LAG_SECONDS", 0)
+
+    project_ids = []
+    for i in range(2):
+        response = client.post(
+            "/geojson/create",
+            params={
+                "name": f"{i}: point location",
+                "start_date": date_20250101,
+                "end_date": date_20250103,
+            },
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+        project_ids.append(response.json()["project_id"])
+
+    response = client.get("/geojson/changes", params={"limit": 1})
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["has_more"] is True
+    assert [change["project_id"] for change in response_json["changes"]] == project_ids[:1]
+    assert response_json["changes"][0]["change"] == "upsert"
+    assert response_json["changes"][0]["project"]["name"] == "0: point location"
+
+    watermark = {
+        "since": response_json["next_since"],
+        "after_id": response_json["next_after_id"],
+    }
+    response = client.get("/geojson/changes", params=watermark)
+    response_json = response.json()
+    assert [change["project_id"] for change in response_json["changes"]] == project_ids[1:]
+    assert response_json["has_more"] is False
+
+    watermark = {
+        "since": response_json["next_since"],
+        "after_id": response_json["next_after_id"],
+    }
+    response = client.get("/geojson/changes", params=watermark)
+    assert response.json()["changes"] == []
+    assert response.json()["next_since"] == watermark["since"]
+
+    response = client.delete(f"/geojson/delete/{project_ids[0]}")
+    assert response.status_code == 204
+    response = client.patch(
+        f"/geojson/update/{project_ids[1]}",
+        params={"description": "updated"},
+    )
+    assert response.status_code == 200
+
+    response = client.get("/geojson/changes", params=watermark)
+    changes = response.json()["changes"]
+    assert [(change["project_id"], change["change"]) for change in changes] == [
+        (project_ids[0], "delete"),
+        (project_ids[1], "upsert"),
+    ]
+    assert changes[0]["project"] is None
+    assert changes[1]["project"]["description"] == "updated"
+
+
+def test_list_date_range_filters(
+    client,
+    date_20250101,
+    date_20250102,
+    date_20250103,
+    point_feature_file,
+):
+    for name, start_date, end_date in [
+        ("first", date_20250101, date_20250101),
+        ("second", date_20250101, date_20250103),
+        ("third", date_20250103, date_20250103),
+    ]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": start_date, "end_date": end_date},
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+
+    response = client.get("/geojson/list", params={"date_from": date_20250102})
+    assert [project["name"] for project in response.json()] == ["second"]
+
+    response = client.get("/geojson/list", params={"date_from": date_20250101, "date_to": date_20250102})
+    assert [project["name"] for project in response.json()] == ["first", "second"]
+
+    response = client.get(
+        "/geojson/list",
+        params={"date_from": date_20250101, "date_to": date_20250102, "date_relation": "contains"},
+    )
+    assert [project["name"] for project in response.json()] == ["second"]
+
+    response = client.get(
+        "/geojson/list-with-pagination",
+        params={"date_from": date_20250103, "page": 1, "size": 1},
+    )
+    response_json = response.json()
+    assert response_json["total"] == 2
+    assert response_json["pages"] == 2
+    assert [project["name"] for project in response_json["projects"]] == ["second"]
+
+    response = client.get("/geojson/list", params={"date_from": date_20250103, "date_to": date_20250101})
+    assert response.status_code == 422
+
+
+def test_match_scenes(
+    client,
+    date_20250101,
+    date_20250102,
+    date_20250103,
+    point_feature_file,
+    feature_collection_file,
+):
+    project_ids = []
+    for name, file in [("point", point_feature_file), ("feature collection", feature_collection_file)]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": date_20250101, "end_date": date_20250103},
+            files={"file": file},
+        )
+        assert response.status_code == 201
+        project_ids.append(response.json()["project_id"])
+
+    def footprint(xmin, ymin, xmax, ymax):
+        return {
+            "type": "Polygon",
+            "coordinates": [[[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax], [xmin, ymin]]],
+        }
+
+    response = client.post(
+        "/geojson/match-scenes",
+        json={"scenes": [
+            {"scene_id": "polygon", "footprint": footprint(100.2, 0.2, 100.8, 0.8), "acquisition_date": date_20250102},
+            {"scene_id": "too late", "footprint": footprint(100.2, 0.2, 100.8, 0.8), "acquisition_date": "2025-02-01"},
+            {"scene_id": "everything", "footprint": footprint(-1, -1, 106, 2), "acquisition_date": date_20250103},
+        ]},
+    )
+    assert response.status_code == 200
+    scenes = response.json()["scenes"]
+    assert [scene["scene_id"] for scene in scenes] == ["polygon", "too late", "everything"]
+    assert [project["project_id"] for project in scenes[0]["projects"]] == [project_ids[1]]
+    assert len(scenes[0]["projects"][0]["feature_ids"]) == 1
+    assert scenes[1]["projects"] == []
+    assert [project["project_id"] for project in scenes[2]["projects"]] == project_ids
+    assert len(scenes[2]["projects"][1]["feature_ids"]) == 3
+
+
+def test_project_stats(
+    client,
+    date_20250101,
+    date_20250103,
+    point_feature_file,
+    polygon_feature_file,
+    feature_collection_file,
+):
+    response = client.post(
+        "/geojson/create",
+        params={"name": "feature collection", "start_date": date_20250101, "end_date": date_20250103},
+        files={"file": feature_collection_file},
+    )
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["extent"] == [100.0, 0.0, 105.0, 1.0]
+    assert response_json["feature_count"] == 3
+    assert response_json["vertex_count"] == 10
+    assert response_json["area"] > 0
+    assert response_json["geometry_types"] == {"Point": 1, "LineString": 1, "Polygon": 1}
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "point", "start_date": date_20250101, "end_date": date_20250103},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["extent"] == [0.0, 0.0, 0.0, 0.0]
+    assert response_json["feature_count"] == 1
+    assert response_json["area"] == 0
+    assert response_json["geometry_types"] == {"Point": 1}
+
+    response = client.get("/geojson/list-summaries", params={"geometry_type": "Point"})
+    assert response.status_code == 200
+    assert [project["name"] for project in response.json()] == ["feature collection", "point"]
+    assert all("feature" not in project and "featurecollection" not in project for project in response.json())
+
+    response = client.get("/geojson/list-summaries", params={"min_feature_count": 2})
+    assert [project["name"] for project in response.json()] == ["feature collection"]
+
+    response = client.patch(
+        f"/geojson/update/{response_json['project_id']}",
+        files={"file": polygon_feature_file},
+    )
+    assert response.status_code == 200
+    assert response.json()["vertex_count"] == 5
+    assert response.json()["geometry_types"] == {"Polygon": 1}
+
+    response = client.get("/geojson/list", params={"geometry_type": "Polygon", "min_area": 1})
+    assert [project["name"] for project in response.json()] == ["feature collection", "point"]
+
+    response = client.get("/geojson/list", params={"geometry_type": "Point"})
+    assert [project["name"] for project in response.json()] == ["feature collection"]
+
+
+def test_list_bbox_filter(
+    client,
+    date_20250101,
+    date_20250103,
+    point_feature_file,
+    feature_collection_file,
+):
+    for name, file in [("point", point_feature_file), ("feature collection", feature_collection_file)]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": date_20250101, "end_date": date_20250103},
+            files={"file": file},
+        )
+        assert response.status_code == 201
+
+    response = client.get("/geojson/list", params={"bbox": "-1,-1,1,1"})
+    assert [project["name"] for project in response.json()] == ["point"]
+
+    response = client.get("/geojson/list-summaries", params={"bbox": "100.5,0.2,100.6,0.3"})
+    assert [project["name"] for project in response.json()] == ["feature collection"]
+
+    # inside feature collection hull, but not intersecting any of its features
+    response = client.get("/geojson/list", params={"bbox": "103.9,0.9,104.1,0.95"})
+    assert response.json() == []
+
+    response = client.get("/geojson/list", params={"bbox": "1,1,0,0"})
+    assert response.status_code == 422
+
+
+def test_read_levels_of_detail(
+    client,
+    date_20250101,
+    date_20250103,
+):
+    vertices = 200
+    ring = [
+        [0.005 * math.cos(2 * math.pi * i / vertices), 0.005 * math.sin(2 * math.pi * i / vertices)]
+        for i in range(vertices)
+    ]
+    polygon_feature_dict = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+    }
+    file = BytesIO(json.dumps(polygon_feature_dict).encode())
+    file.name = "circle.json"
+    response = client.post(
+        "/geojson/create",
+        params={"name": "circle", "start_date": date_20250101, "end_date": date_20250103},
+        files={"file": file},
+    )
+    assert response.status_code == 201
+    project_id = response.json()["project_id"]
+
+    def vertex_count(project):
+        return len(project["feature"]["geometry"]["coordinates"][0])
+
+    response = client.get(f"/geojson/read/{project_id}")
+    assert vertex_count(response.json()) == vertices + 1
+
+    response = client.get(f"/geojson/read/{project_id}", params={"tolerance": 0.00001})
+    assert vertex_count(response.json()) == vertices + 1
+
+    response = client.get(f"/geojson/read/{project_id}", params={"tolerance": 0.0001})
+    lod1_vertex_count = vertex_count(response.json())
+    assert 4 <= lod1_vertex_count < vertices + 1
+
+    response = client.get(f"/geojson/read/{project_id}", params={"zoom": 10})
+    assert 4 <= vertex_count(response.json()) < lod1_vertex_count
+
+    response = client.get("/geojson/list", params={"zoom": 0})
+    assert 4 <= vertex_count(response.json()[0]) < lod1_vertex_count
+
+    response = client.get("/geojson/list-with-pagination", params={"zoom": 0})
+    assert 4 <= vertex_count(response.json()["projects"][0]) < lod1_vertex_count
+
+    response = client.get(f"/geojson/read/{project_id}", params={"zoom": 10, "tolerance": 0.1})
+    assert response.status_code == 422
+
+
+def test_nearest(
+    client,
+    date_20250101,
+    date_20250102,
+    date_20250103,
+    point_feature_file,
+    polygon_feature_file,
+    feature_collection_file,
+):
+    for name, start_date, file in [
+        ("point", date_20250101, point_feature_file),
+        ("polygon", date_20250102, polygon_feature_file),
+        ("feature collection", date_20250103, feature_collection_file),
+    ]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": start_date, "end_date": start_date},
+            files={"file": file},
+        )
+        assert response.status_code == 201
+
+    response = client.get("/geojson/nearest", params={"lon": 100.5, "lat": 0.5, "k": 2})
+    assert response.status_code == 200
+    response_json = response.json()
+    assert [project["name"] for project in response_json] == ["feature collection", "polygon"]
+    assert response_json[0]["distance"] == 0
+    assert response_json[1]["distance"] > 10_000_000
+    assert "feature" not in response_json[0]
+
+    response = client.get("/geojson/nearest", params={"lon": 2, "lat": 0, "k": 5})
+    assert [project["name"] for project in response.json()] == ["polygon", "point", "feature collection"]
+
+    response = client.get("/geojson/nearest", params={"lon": 2, "lat": 0, "max_distance": 250_000})
+    assert [project["name"] for project in response.json()] == ["polygon", "point"]
+
+    response = client.get("/geojson/nearest", params={"lon": 2, "lat": 0, "max_distance": 150_000})
+    assert [project["name"] for project in response.json()] == ["polygon"]
+
+    response = client.get("/geojson/nearest", params={"lon": 2, "lat": 0, "date_from": date_20250101})
+    assert [project["name"] for project in response.json()] == ["point"]
+
+    response = client.get("/geojson/nearest", params={"lon": 200, "lat": 0})
+    assert response.status_code == 422
+
+
+def test_nearest_at_high_latitude(client, date_20250101):
+    def point(lon, lat):
+        return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": {}}
+
+    # north: 1 degree of latitude (~111 km), east: 3 degrees of longitude at 80N (~58 km)
+    north = {"type": "FeatureCollection", "features": [point(0, 81 + i * 0.05) for i in range(20)]}
+    east = point(3, 80)
+    for name, geojson in [("north", north), ("east", east)]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": date_20250101, "end_date": date_20250101},
+            files={"file": (f"{name}.json", BytesIO(json.dumps(geojson).encode()))},
+        )
+        assert response.status_code == 201
+
+    response = client.get("/geojson/nearest", params={"lon": 0, "lat": 80, "k": 1})
+    assert [project["name"] for project in response.json()] == ["east"]
+    assert response.json()[0]["distance"] < 60_000
+
+    response = client.get("/geojson/nearest", params={"lon": 0, "lat": 80, "k": 2})
+    assert [project["name"] for project in response.json()] == ["east", "north"]
+
+
+def test_overlaps(
+    client,
+    date_20250101,
+    date_20250103,
+    point_feature_file,
+    polygon_feature_file,
+    feature_collection_file,
+):
+    shifted_polygon_feature_dict = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0.5, 0], [1.5, 0], [1.5, 1], [0.5, 1], [0.5, 0]]],
+        },
+    }
+    shifted_polygon_feature_file = BytesIO(json.dumps(shifted_polygon_feature_dict).encode())
+    shifted_polygon_feature_file.name = "shifted_polygon.json"
+    project_ids = {}
+    for name, file in [
+        ("polygon", polygon_feature_file),
+        ("shifted polygon", shifted_polygon_feature_file),
+        ("point", point_feature_file),
+        ("feature collection", feature_collection_file),
+    ]:
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": date_20250101, "end_date": date_20250103},
+            files={"file": file},
+        )
+        assert response.status_code == 201
+        project_ids[name] = response.json()["project_id"]
+
+    response = client.get(f"/geojson/overlaps/{project_ids['polygon']}")
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["total"] == 2
+    assert response_json["pages"] == 1
+    assert [overlap["name"] for overlap in response_json["overlaps"]] == ["shifted polygon", "point"]
+    polygon_area = client.get(f"/geojson/read/{project_ids['polygon']}").json()["area"]
+    assert response_json["overlaps"][0]["intersection_area"] == pytest.approx(polygon_area / 2, rel=1e-3)
+    assert response_json["overlaps"][1]["intersection_area"] == 0
+
+    response = client.get(f"/geojson/overlaps/{project_ids['polygon']}", params={"page": 2, "size": 1})
+    response_json = response.json()
+    assert response_json["total"] == 2
+    assert [overlap["name"] for overlap in response_json["overlaps"]] == ["point"]
+
+    response = client.get(f"/geojson/overlaps/{project_ids['polygon']}", params={"page": 3, "size": 1})
+    assert response.json()["total"] == 2
+    assert response.json()["overlaps"] == []
+
+    response = client.get(f"/geojson/overlaps/{project_ids['feature collection']}")
+    assert response.json()["total"] == 0
+
+    response = client.get("/geojson/overlaps/0")
+    assert response.status_code == 404
+
+
+def test_create_duplicate_content(
+    client,
+    date_20250101,
+    date_20250103,
+    feature_collection_dict,
+    feature_collection_file,
+):
+    response = client.post(
+        "/geojson/create",
+        params={"name": "original", "start_date": date_20250101, "end_date": date_20250103},
+        files={"file": feature_collection_file},
+    )
+    assert response.status_code == 201
+    original = response.json()
+
+    def reformatted_file():
+        file = BytesIO(json.dumps(feature_collection_dict, indent=4).encode())
+        file.name = "reformatted.json"
+        return file
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "copy", "start_date": date_20250101, "end_date": date_20250103, "on_duplicate": "reject"},
+        files={"file": reformatted_file()},
+    )
+    assert response.status_code == 409
+    assert response.json()["project_id"] == original["project_id"]
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "copy", "start_date": date_20250101, "end_date": date_20250103, "on_duplicate": "reuse"},
+        files={"file": reformatted_file()},
+    )
+    assert response.status_code == 200
+    assert response.json() == original
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "copy", "start_date": date_20250101, "end_date": date_20250103},
+        files={"file": reformatted_file()},
+    )
+    assert response.status_code == 201
+    assert response.json()["project_id"] != original["project_id"]
+
+    response = client.get("/geojson/list")
+    assert [project["name"] for project in response.json()] == ["original", "copy"]
+
+
+def test_update_if_match(
+    client,
+    date_20250101,
+    point_feature_file,
+    polygon_feature_file,
+):
+    response = client.post(
+        "/geojson/create",
+        params={"name": "point location", "start_date": date_20250101, "end_date": date_20250101},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 201
+    assert response.json()["version"] == 1
+    project_id = response.json()["project_id"]
+
+    response = client.get(f"/geojson/read/{project_id}")
+    etag = response.headers["ETag"]
+    assert etag == '"1"'
+
+    response = client.patch(
+        f"/geojson/update/{project_id}",
+        params={"description": "first writer"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.patch(
+        f"/geojson/update/{project_id}",
+        params={"description": "second writer"},
+        files={"file": polygon_feature_file},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.get(f"/geojson/read/{project_id}")
+    assert response.json()["description"] == "first writer"
+    assert response.json()["feature"]["geometry"]["type"] == "Point"
+
+    response = client.patch(
+        f"/geojson/update/{project_id}",
+        params={"description": "unconditional writer"},
+        headers={"If-Match": "*"},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+
+    response = client.patch(
+        f"/geojson/update/{project_id}",
+        params={"description": "weak writer"},
+        headers={"If-Match": 'W/"3"'},
+    )
+    assert response.status_code == 412
+
+    response = client.patch(
+        "/geojson/update/0",
+        params={"description": "missing"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 404
+
+
+def test_bulk_update_and_delete(
+    client,
+    date_20250101,
+    date_20250102,
+    date_20250103,
+    point_feature_file,
+):
+    project_ids = []
+    for name, start_date in [
+        ("customer first", date_20250101),
+        ("customer second", date_20250103),
+        ("other", date_20250101),
+    ]:
+        point_feature_file.seek(0)
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": start_date, "end_date": start_date},
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+        project_ids.append(response.json()["project_id"])
+
+    response = client.post("/geojson/bulk-delete", json={})
+    assert response.status_code == 422
+
+    response = client.patch(
+        "/geojson/bulk-update",
+        json={"name_prefix": "customer", "values": {"description": "customer project"}},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"updated": 2}
+    summaries = client.get("/geojson/list-summaries").json()
+    assert [(project["description"], project["version"]) for project in summaries] == [
+        ("customer project", 2),
+        ("customer project", 2),
+        (None, 1),
+    ]
+
+    response = client.patch(
+        "/geojson/bulk-update",
+        json={"project_ids": project_ids[1:], "values": {"end_date": date_20250102}},
+    )
+    assert response.status_code == 400
+    assert response.json()["message"] == "start_date must be before or equal end_date."
+
+    response = client.post(
+        "/geojson/bulk-delete",
+        json={"name_prefix": "customer", "date_from": date_20250103},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 1}
+
+    response = client.post("/geojson/bulk-delete", json={"project_ids": project_ids})
+    assert response.json() == {"deleted": 2}
+    assert client.get("/geojson/list-summaries").json() == []
+
+
+def test_geometry_validity_setting():
+    assert geometry_validity("repair") == "repair"
+    with pytest.raises(ValueError):
+        geometry_validity("Reject")
+
+
+def test_invalid_geometries(
+    client,
+    date_20250101,
+    point_feature_dict,
+    point_feature_file,
+):
+    bowtie_feature_dict = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]],
+        },
+    }
+
+    def bowtie_file():
+        return ("bowtie.json", BytesIO(json.dumps(bowtie_feature_dict).encode()))
+
+    params = {"start_date": date_20250101, "end_date": date_20250101}
+    response = client.post("/geojson/create", params={"name": "bowtie", **params}, files={"file": bowtie_file()})
+    assert response.status_code == 422
+    response_json = response.json()
+    assert response_json["message"] == "Invalid geometry in file: bowtie.json."
+    assert [feature["feature_index"] for feature in response_json["invalid_features"]] == [0]
+    assert response_json["invalid_features"][0]["reason"].startswith("Self-intersection")
+    assert client.get("/geojson/list").json() == []
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "reported bowtie", "geometry_validity": "report", **params},
+        files={"file": bowtie_file()},
+    )
+    assert response.status_code == 201
+    assert len(response.json()["invalid_features"]) == 1
+    assert response.json()["feature"]["geometry"]["type"] == "Polygon"
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "repaired bowtie", "geometry_validity": "repair", **params},
+        files={"file": bowtie_file()},
+    )
+    assert response.status_code == 201
+    assert len(response.json()["invalid_features"]) == 1
+    assert response.json()["feature"]["geometry"]["type"] == "MultiPolygon"
+    assert response.json()["area"] > 0
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "point", "geometry_validity": "report", **params},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 201
+    assert response.json()["invalid_features"] == []
+
+    response = client.patch(
+        f"/geojson/update/{response.json()['project_id']}",
+        params={"name": "point"},
+        files={"file": bowtie_file()},
+    )
+    assert response.status_code == 422
+
+    items = [
+        {"name": "batch point", "geojson": point_feature_dict, **params},
+        {"name": "batch bowtie", "geojson": bowtie_feature_dict, **params},
+    ]
+    response = client.post(
+        "/geojson/batch-create",
+        params={"atomic": False},
+        files={"file": ("batch.ndjson", BytesIO("\n".join(json.dumps(item) for item in items).encode()))},
+    )
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["created"] == 1
+    assert response_json["items"][1]["message"] == "Invalid geometry."
+    assert response_json["items"][1]["invalid_features"][0]["feature_index"] == 0
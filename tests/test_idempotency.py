@@ -0,0 +1,155 @@
+import json
+from io import BytesIO
+
+from app.main import INGEST_PATHS
+from app.services.database import databasemanager
+from app.services.idempotency import BodyHash, IdempotencyMiddleware
+
+
+def test_create_retry_replays_stored_response(
+    client,
+    date_20250101,
+    point_feature_dict,
+    point_feature_file,
+    polygon_feature_file,
+):
+    params = {"name": "point location", "start_date": date_20250101, "end_date": date_20250101}
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": point_feature_file},
+        headers={"Idempotency-Key": "create-1"},
+    )
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    created = response.json()
+    created_etag = response.headers["ETag"]
+
+    point_feature_file.seek(0)
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": point_feature_file},
+        headers={"Idempotency-Key": "create-1"},
+    )
+    assert response.status_code == 201
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert response.headers["ETag"] == created_etag
+    assert response.json() == created
+    assert len(client.get("/geojson/list").json()) == 1
+
+    response = client.post(
+        "/geojson/create",
+        params={**params, "name": "other location"},
+        files={"file": polygon_feature_file},
+        headers={"Idempotency-Key": "create-1"},
+    )
+    assert response.status_code == 422
+
+    same_length_dict = {**point_feature_dict, "geometry": {"type": "Point", "coordinates": [1, 1]}}
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": ("point.json", BytesIO(json.dumps(same_length_dict).encode()))},
+        headers={"Idempotency-Key": "create-1"},
+    )
+    assert response.status_code == 422
+    assert len(client.get("/geojson/list").json()) == 1
+
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": polygon_feature_file},
+        headers={"Idempotency-Key": "create-2"},
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": polygon_feature_file},
+        headers={"Idempotency-Key": "create-2"},
+    )
+    assert response.status_code == 400
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+def test_update_retry_replays_etag(client, date_20250101, point_feature_file, polygon_feature_file):
+    params = {"name": "point location", "start_date": date_20250101, "end_date": date_20250101}
+    response = client.post("/geojson/create", params=params, files={"file": point_feature_file})
+    project_id = response.json()["project_id"]
+    created_etag = response.headers["ETag"]
+
+    for _ in range(2):
+        polygon_feature_file.seek(0)
+        response = client.patch(
+            f"/geojson/update/{project_id}",
+            params={"description": "updated"},
+            files={"file": polygon_feature_file},
+            headers={"Idempotency-Key": "update-1", "If-Match": created_etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"2"'
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert client.get(f"/geojson/read/{project_id}").json()["version"] == 2
+
+
+async def test_retry_in_progress_is_rejected(app):
+    middleware = IdempotencyMiddleware(
+        app,
+        engine=databasemanager.get_engine,
+        ingest_paths=INGEST_PATHS,
+        ttl=60,
+        lock_timeout=0,
+    )
+    assert await middleware.claim("key", "fingerprint")
+
+    middleware.lock_timeout = 60
+    assert not await middleware.claim("key", "fingerprint")
+    response = await middleware.stored_response("key", "fingerprint", receive=None, headers={})
+    assert response.status_code == 409
+
+    middleware.lock_timeout = 0
+    assert await middleware.claim("key", "fingerprint")
+
+
+def test_retry_after_admission_rejection_is_executed(
+    app,
+    client,
+    date_20250101,
+    point_feature_file,
+):
+    controller = app.state.admission_controller
+    controller.queue_timeout = 0
+    controller._active = controller.max_concurrent
+
+    params = {"name": "point location", "start_date": date_20250101, "end_date": date_20250101}
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": point_feature_file},
+        headers={"Idempotency-Key": "create-after-429"},
+    )
+    assert response.status_code == 429
+
+    controller._active = 0
+    point_feature_file.seek(0)
+    response = client.post(
+        "/geojson/create",
+        params=params,
+        files={"file": point_feature_file},
+        headers={"Idempotency-Key": "create-after-429"},
+    )
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+
+def test_body_hash_ignores_multipart_boundary():
+    def chunked_hash(boundary, chunk_size):
+        body = b"--%s\r\ncontent\r\n--%s--\r\n" % (boundary, boundary)
+        body_hash = BodyHash({b"content-type": b"multipart/form-data; boundary=" + boundary})
+        for start in range(0, len(body), chunk_size):
+            body_hash.update(body[start:start + chunk_size])
+        return body_hash.hexdigest()
+
+    assert chunked_hash(b"a1b2c3", 100) == chunked_hash(b"f9e8d7", 3) == chunked_hash(b"0f0f0f", 1)
+    assert BodyHash({}).hexdigest() != chunked_hash(b"a1b2c3", 100)
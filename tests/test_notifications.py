@@ -0,0 +1,116 @@
+import asyncio
+from sqlalchemy.sql import text
+
+from app.api.geojson import create_project_entry
+from app.api.shards import delete_project_entry
+from app.services.database import databasemanager
+from app.services.notifications import ProjectChangesHub, project_changes_hub
+from app.services.shards import Shards
+
+
+async def test_project_changes_are_notified(point_feature_dict, date_20250101):
+    hub = ProjectChangesHub()
+    async with databasemanager.engine() as db_engine:
+        await hub.start(db_engine)
+        try:
+            with hub.subscribe() as queue:
+                project_id, _ = await create_project_entry(
+                    db_engine,
+                    {
+                        "name": "point location",
+                        "start_date": date_20250101,
+                        "end_date": date_20250101,
+                        "geo_project_type": "Feature",
+                    },
+                    point_feature_dict,
+                )
+                event = await asyncio.wait_for(queue.get(), 5)
+                assert event == {"project_id": project_id, "change": "created"}
+
+                await delete_project_entry(Shards([db_engine]), project_id)
+                event = await asyncio.wait_for(queue.get(), 5)
+                assert event == {"project_id": project_id, "change": "deleted"}
+        finally:
+            await hub.stop()
+
+
+async def test_slow_subscriber_loses_oldest_events():
+    hub = ProjectChangesHub(queue_size=2)
+    with hub.subscribe() as queue:
+        for project_id in range(3):
+            hub.publish(f'{{"project_id": {project_id}, "change": "updated"}}')
+        assert [queue.get_nowait()["project_id"] for _ in range(2)] == [1, 2]
+    assert not hub._subscribers
+
+
+async def listen_backend_pids(db_engine, channel):
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT pid FROM pg_stat_activity WHERE query = :query"),
+            {"query": f"LISTEN {channel}"}
+        )
+        return set(result.scalars().all())
+
+
+async def test_lost_listen_connection_is_reopened(point_feature_dict, date_20250101):
+    hub = ProjectChangesHub(reconnect_interval=0.1)
+    async with databasemanager.engine() as db_engine:
+        await hub.start(db_engine)
+        try:
+            with hub.subscribe() as queue:
+                lost_pids = await listen_backend_pids(db_engine, hub.channel)
+                assert len(lost_pids) == 1
+                async with db_engine.connect() as conn:
+                    await conn.execute(
+                        text("SELECT pg_terminate_backend(pid) FROM unnest(CAST(:pids AS int[])) AS pid"),
+                        {"pids": list(lost_pids)}
+                    )
+
+                for _ in range(50):
+                    await asyncio.sleep(0.1)
+                    pids = await listen_backend_pids(db_engine, hub.channel)
+                    if pids and not pids & lost_pids:
+                        break
+                assert pids and not pids & lost_pids
+
+                project_id, _ = await create_project_entry(
+                    db_engine,
+                    {
+                        "name": "point location",
+                        "start_date": date_20250101,
+                        "end_date": date_20250101,
+                        "geo_project_type": "Feature",
+                    },
+                    point_feature_dict,
+                )
+                event = await asyncio.wait_for(queue.get(), 5)
+                assert event == {"project_id": project_id, "change": "created"}
+        finally:
+            await hub.stop()
+
+
+def test_changes_websocket(client, date_20250101, point_feature_file, polygon_feature_file):
+    client.portal.call(project_changes_hub.start, databasemanager.get_engine())
+    try:
+        with client.websocket_connect("/geojson/ws/changes") as websocket:
+            response = client.post(
+                "/geojson/create",
+                params={"name": "point location", "start_date": date_20250101, "end_date": date_20250101},
+                files={"file": point_feature_file},
+            )
+            assert response.status_code == 201
+            point_project_id = response.json()["project_id"]
+            assert websocket.receive_json() == {"project_id": point_project_id, "change": "created"}
+
+        with client.websocket_connect(f"/geojson/ws/changes?project_id={point_project_id}") as websocket:
+            response = client.post(
+                "/geojson/create",
+                params={"name": "polygon location", "start_date": date_20250101, "end_date": date_20250101},
+                files={"file": polygon_feature_file},
+            )
+            assert response.status_code == 201
+            response = client.patch(f"/geojson/update/{point_project_id}", params={"description": "updated"})
+            assert response.status_code == 200
+            assert websocket.receive_json() == {"project_id": point_project_id, "change": "updated"}
+    finally:
+        client.portal.call(project_changes_hub.stop)
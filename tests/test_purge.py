@@ -0,0 +1,58 @@
+from sqlalchemy.sql import text
+
+from app.api.geojson import create_project_entry
+from app.api.shards import delete_project_entry
+from app.services.database import databasemanager
+from app.services.purge import DeletedProjectsPurger
+from app.services.shards import Shards
+
+
+def test_deleted_project_is_hidden(client, date_20250101, point_feature_file):
+    params = {"name": "point location", "start_date": date_20250101, "end_date": date_20250101}
+    response = client.post("/geojson/create", params=params, files={"file": point_feature_file})
+    assert response.status_code == 201
+    project_id = response.json()["project_id"]
+
+    response = client.delete(f"/geojson/delete/{project_id}")
+    assert response.status_code == 204
+
+    response = client.get(f"/geojson/read/{project_id}")
+    assert response.status_code == 404
+    assert client.get("/geojson/list").json() == []
+    assert client.get("/geojson/list-summaries").json() == []
+    assert client.get("/geojson/list-with-pagination").json()["total"] == 0
+    response = client.patch(f"/geojson/update/{project_id}", params={"description": "updated"})
+    assert response.status_code == 404
+
+    point_feature_file.seek(0)
+    response = client.post("/geojson/create", params=params, files={"file": point_feature_file})
+    assert response.status_code == 201
+    assert response.json()["project_id"] != project_id
+
+
+async def test_deleted_project_is_purged_in_batches(feature_collection_dict, date_20250101):
+    async with databasemanager.engine() as db_engine:
+        project_id, _ = await create_project_entry(
+            db_engine,
+            {
+                "name": "collection",
+                "start_date": date_20250101,
+                "end_date": date_20250101,
+                "geo_project_type": "FeatureCollection",
+            },
+            feature_collection_dict,
+        )
+        purger = DeletedProjectsPurger(batch_size=2, throttle=0, idle_interval=0)
+        assert await purger.purge_batch(db_engine) == 0
+
+        await delete_project_entry(Shards([db_engine]), project_id)
+
+        assert await purger.purge_batch(db_engine) == 2
+        assert await purger.purge_batch(db_engine) == 2
+        assert await purger.purge_batch(db_engine) == 0
+
+        async with db_engine.connect() as conn:
+            assert (await conn.execute(text("SELECT COUNT(*) FROM features"))).scalar() == 0
+            assert (await conn.execute(text("SELECT COUNT(*) FROM projects"))).scalar() == 0
+            result = await conn.execute(text("SELECT project_id FROM project_tombstones"))
+            assert result.scalars().all() == [project_id]
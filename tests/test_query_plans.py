@@ -0,0 +1,204 @@
+import json
+import pytest
+from datetime import date
+from sqlalchemy import TextClause
+from sqlalchemy.sql import text
+
+from app.api.geojson import (
+    fetch_projects_stmt,
+    match_scenes_sql,
+    max_distance_expansion,
+    nearest_features_stmt,
+    nearest_within_stmt,
+    refresh_project_stats_sql,
+)
+from app.services.database import databasemanager
+
+
+PROJECTS = 5000
+FEATURES_PER_PROJECT = 4
+
+
+@pytest.fixture(scope="function")
+async def seeded_projects():
+    async with databasemanager.connect() as connection:
+        await connection.execute(
+            text('''
+                INSERT INTO projects (name, start_date, end_date, geo_project_type)
+                SELECT
+                    'project ' || i,
+                    DATE '2000-01-01' + i,
+                    DATE '2000-01-01' + i + 30,
+                    'FeatureCollection'::geo_project_type
+                FROM generate_series(1, :projects) AS i
+            '''),
+            {"projects": PROJECTS}
+        )
+        await connection.execute(
+            text('''
+                INSERT INTO features (project_id, properties, geometry)
+                SELECT
+                    p.project_id,
+                    '{}'::json,
+                    ST_MakeEnvelope(
+                        p.project_id % 100 + n * 0.1,
+                        p.project_id / 100 + n * 0.1,
+                        p.project_id % 100 + n * 0.1 + 0.05,
+                        p.project_id / 100 + n * 0.1 + 0.05,
+                        4326
+                    )
+                FROM projects p, generate_series(1, :features_per_project) AS n
+                ORDER BY p.project_id
+            '''),
+            {"features_per_project": FEATURES_PER_PROJECT}
+        )
+        result = await connection.execute(text("SELECT ARRAY_AGG(project_id) FROM projects"))
+        await connection.execute(text(refresh_project_stats_sql), {"project_ids": result.scalar()})
+        await connection.execute(text("ANALYZE projects"))
+        await connection.execute(text("ANALYZE features"))
+
+
+async def explain(select_stmt: str | TextClause, params: dict) -> dict:
+    if isinstance(select_stmt, TextClause):
+        select_stmt = select_stmt.text
+    async with databasemanager.connect() as connection:
+        result = await connection.execute(text(f"EXPLAIN (FORMAT JSON) {select_stmt}"), params)
+        return result.scalar()[0]["Plan"]
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def scans_of(plan: dict, relation: str) -> list[dict]:
+    return [node for node in plan_nodes(plan) if node.get("Relation Name") == relation]
+
+
+def test_fetch_projects_stmt_is_built_once_per_variant():
+    assert fetch_projects_stmt(project_id=1) is fetch_projects_stmt(project_id=2)
+    assert fetch_projects_stmt(project_id=1) is not fetch_projects_stmt(project_id=1, geometry_column="geometry_lod1")
+    assert fetch_projects_stmt(filters={"min_area": 1, "max_area": 2}) is fetch_projects_stmt(
+        filters={"max_area": 5, "min_area": 3}
+    )
+    assert fetch_projects_stmt(filters={"min_area": 1}) is not fetch_projects_stmt(filters={"max_area": 1})
+
+    overlaps = {"date_from": date(2025, 1, 1), "date_to": date(2025, 1, 2), "date_relation": "overlaps"}
+    contains = {**overlaps, "date_relation": "contains"}
+    assert fetch_projects_stmt(filters=overlaps) is fetch_projects_stmt(filters={**overlaps, "date_to": date(2025, 2, 1)})
+    assert fetch_projects_stmt(filters=overlaps) is not fetch_projects_stmt(filters=contains)
+    assert "@>" in fetch_projects_stmt(filters=contains).text
+
+
+async def test_single_project_plan_uses_indexes(seeded_projects):
+    plan = await explain(fetch_projects_stmt(project_id=42), {"project_id": 42})
+
+    features_scans = scans_of(plan, "features")
+    assert features_scans
+    assert all(node["Node Type"] != "Seq Scan" for node in features_scans)
+    assert any(node.get("Index Name") == "ix_features_project_id" for node in plan_nodes(plan))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "projects"))
+    assert all(node["Plan Rows"] < 10 * FEATURES_PER_PROJECT for node in features_scans)
+
+
+async def test_paged_plan_does_not_rank_all_features(seeded_projects):
+    page_start, page_end = 101, 110
+    plan = await explain(
+        fetch_projects_stmt(page_start=page_start, page_end=page_end),
+        {"page_start": page_start, "page_end": page_end}
+    )
+
+    nodes = list(plan_nodes(plan))
+    assert all(node["Node Type"] != "WindowAgg" for node in nodes)
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+    assert any(node.get("Index Name") == "ix_features_project_id" for node in nodes)
+    assert any(node.get("Index Name") == "projects_pkey" for node in nodes)
+    assert all(
+        node["Plan Rows"] < 10 * (page_end - page_start + 1) * FEATURES_PER_PROJECT
+        for node in nodes if node["Node Type"] == "Sort"
+    )
+
+
+async def test_full_list_plan_reads_features_once(seeded_projects):
+    plan = await explain(fetch_projects_stmt(), {})
+
+    assert len(scans_of(plan, "features")) == 1
+    assert len(scans_of(plan, "projects")) == 1
+    assert all(node["Node Type"] != "Nested Loop" for node in plan_nodes(plan))
+
+
+async def test_project_ids_plan_uses_indexes(seeded_projects):
+    project_ids = [7, 42, 4200]
+    plan = await explain(fetch_projects_stmt(project_ids=project_ids), {"project_ids": project_ids})
+
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+    assert any(node.get("Index Name") == "ix_features_project_id" for node in plan_nodes(plan))
+
+
+async def test_date_range_filter_plans_use_gist_index(seeded_projects):
+    for date_relation in ["overlaps", "contains"]:
+        filters = {"date_from": date(2005, 6, 1), "date_to": date(2005, 6, 2), "date_relation": date_relation}
+        for select_stmt, params in [
+            (fetch_projects_stmt(filters=filters), filters),
+            (fetch_projects_stmt(page_start=1, page_end=10, filters=filters), {"page_start": 1, "page_end": 10, **filters}),
+        ]:
+            plan = await explain(select_stmt, params)
+
+            nodes = list(plan_nodes(plan))
+            assert any(node.get("Index Name") == "ix_projects_date_range" for node in nodes)
+            assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "projects"))
+            assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+
+
+async def test_bbox_filter_plan_prunes_projects_by_hull(seeded_projects):
+    filters = {"bbox_xmin": 10, "bbox_ymin": 10, "bbox_xmax": 10.5, "bbox_ymax": 10.5}
+    plan = await explain(fetch_projects_stmt(filters=filters), filters)
+
+    assert any(node.get("Index Name") == "ix_projects_hull" for node in plan_nodes(plan))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "projects"))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+
+
+async def test_match_scenes_plan_uses_indexes(seeded_projects):
+    scenes = [
+        {
+            "footprint": {
+                "type": "Polygon",
+                "coordinates": [[[10, 10], [10.5, 10], [10.5, 10.5], [10, 10.5], [10, 10]]],
+            },
+            "acquisition_date": "2005-06-01",
+        }
+    ]
+    plan = await explain(match_scenes_sql, {"scenes": json.dumps(scenes)})
+
+    nodes = list(plan_nodes(plan))
+    assert any(node.get("Index Name") in ("ix_projects_hull", "ix_projects_date_range") for node in nodes)
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "projects"))
+
+
+async def test_nearest_plan_walks_geometry_index(seeded_projects):
+    plan = await explain(nearest_features_stmt(), {"lon": 10, "lat": 10, "candidates": 40})
+
+    nodes = list(plan_nodes(plan))
+    assert any(node.get("Index Name") == "ix_features_geometry" for node in nodes)
+    assert all(node["Node Type"] != "Sort" for node in nodes)
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+
+    dx, dy = max_distance_expansion(10, 50_000)
+    plan = await explain(
+        nearest_features_stmt(max_distance=50_000),
+        {"lon": 10, "lat": 10, "candidates": 40, "dx": dx, "dy": dy}
+    )
+
+    assert any(node.get("Index Name") == "ix_features_geometry" for node in plan_nodes(plan))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
+
+    plan = await explain(
+        nearest_within_stmt(),
+        {"lon": 10, "lat": 10, "k": 10, "radius": 50_000, "dx": dx, "dy": dy}
+    )
+
+    assert any(node.get("Index Name") == "ix_features_geometry" for node in plan_nodes(plan))
+    assert all(node["Node Type"] != "Seq Scan" for node in scans_of(plan, "features"))
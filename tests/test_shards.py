@@ -0,0 +1,347 @@
+import asyncio
+import json
+import pytest
+from datetime import date
+from io import BytesIO
+from pytest_postgresql.janitor import DatabaseJanitor
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text
+
+from app.api.geojson import create_project_entry, get_geo_data_from_feature
+from app.api.shards import ProjectExists, create_project_entries
+from app.cli import export_overlaps, export_projects, import_projects
+from app.services.coalescer import CreateCoalescer
+from app.services.database import databasemanager
+from app.services.shards import Shards, ShardsMisconfigured, project_shard, unique_index_shard
+
+
+def test_project_shard():
+    assert [project_shard(project_id, 3) for project_id in range(1, 7)] == [0, 1, 2, 0, 1, 2]
+    assert [project_shard(project_id, 1) for project_id in range(1, 4)] == [0, 0, 0]
+
+
+def test_unique_index_shard():
+    assert unique_index_shard("shard project 1", "2025-01-01", "2025-01-01", 2) == 1
+    assert unique_index_shard("shard project 2", "2025-01-01", "2025-01-01", 2) == 0
+    assert unique_index_shard("shard project 1", "2025-01-01", "2025-01-01", 1) == 0
+
+
+@pytest.fixture(scope="function")
+async def second_shard(test_db):
+    with DatabaseJanitor(
+        dbname="postgres_test_shard1",
+        user=test_db.user,
+        host=test_db.host,
+        port=test_db.port,
+        version=test_db.version,
+        password=test_db.password,
+    ):
+        engine = create_async_engine(
+            f"postgresql+psycopg://{test_db.user}:{test_db.password}@{test_db.host}:{test_db.port}/postgres_test_shard1"
+        )
+        async with engine.begin() as connection:
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+            await databasemanager.create_all(connection)
+        await engine.dispose()
+
+        databasemanager._shard_engines.append(engine)
+        try:
+            yield engine
+        finally:
+            databasemanager._shard_engines.remove(engine)
+            await engine.dispose()
+
+
+async def set_projects_sequence(engine, shard_index, shard_count):
+    async with engine.begin() as connection:
+        await connection.execute(text(
+            f"ALTER SEQUENCE projects_project_id_seq INCREMENT BY {shard_count} "
+            f"START WITH {shard_index + 1} RESTART WITH {shard_index + 1}"
+        ))
+    await engine.dispose()
+
+
+async def test_check_sequences(second_shard):
+    shards = Shards(databasemanager._shard_engines)
+    with pytest.raises(ShardsMisconfigured):
+        await shards.check_sequences()
+
+    await set_projects_sequence(databasemanager._engine, 0, 2)
+    await set_projects_sequence(second_shard, 1, 2)
+    await shards.check_sequences()
+    for engine in shards.engines:
+        await engine.dispose()
+
+
+async def projects_on_shard(engine):
+    async with engine.connect() as connection:
+        rows = await connection.execute(text("SELECT project_id, name FROM projects ORDER BY project_id"))
+        project_ids = {row.name: row.project_id for row in rows}
+    await engine.dispose()
+    return project_ids
+
+
+@pytest.fixture(scope="function")
+async def two_shards(second_shard):
+    await set_projects_sequence(databasemanager._engine, 0, 2)
+    await set_projects_sequence(second_shard, 1, 2)
+    return second_shard
+
+
+@pytest.fixture(scope="function")
+def point_projects(client, two_shards, date_20250101, point_feature_file):
+    project_ids = {}
+    for i in range(1, 7):
+        response = client.post(
+            "/geojson/create",
+            params={"name": f"shard project {i}", "start_date": date_20250101, "end_date": date_20250101},
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+        project_ids[f"shard project {i}"] = response.json()["project_id"]
+    return project_ids
+
+
+async def test_projects_are_placed_by_unique_index(two_shards, point_projects):
+    first_shard_projects = await projects_on_shard(databasemanager._engine)
+    second_shard_projects = await projects_on_shard(two_shards)
+
+    assert set(second_shard_projects) == {"shard project 1", "shard project 6"}
+    assert set(first_shard_projects) == {f"shard project {i}" for i in (2, 3, 4, 5)}
+    assert all(project_shard(project_id, 2) == 0 for project_id in first_shard_projects.values())
+    assert all(project_shard(project_id, 2) == 1 for project_id in second_shard_projects.values())
+    assert {**first_shard_projects, **second_shard_projects} == point_projects
+
+
+async def test_unique_index_lock_serialises_same_name(two_shards, date_20250101):
+    shards = Shards([databasemanager._engine, two_shards])
+    project_data = {"name": "locked project", "start_date": date_20250101, "end_date": date_20250101}
+
+    async def lock_and_release():
+        async with shards.unique_index_lock(project_data):
+            pass
+
+    async with shards.unique_index_lock(project_data):
+        waiting = asyncio.create_task(lock_and_release())
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+        async with shards.unique_index_lock({**project_data, "name": "other project"}):
+            pass
+    await asyncio.wait_for(waiting, 5)
+    for engine in shards.engines:
+        await engine.dispose()
+
+
+async def test_unique_indexes_lock_excludes_project_locks(two_shards, date_20250101):
+    shards = Shards([databasemanager._engine, two_shards])
+    project_data = {"name": "locked project", "start_date": date_20250101, "end_date": date_20250101}
+
+    async def lock_and_release():
+        async with shards.unique_index_lock(project_data):
+            pass
+
+    async with shards.unique_indexes_lock():
+        waiting = asyncio.create_task(lock_and_release())
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+    await asyncio.wait_for(waiting, 5)
+    for engine in shards.engines:
+        await engine.dispose()
+
+
+async def test_batch_create_checks_all_shards(two_shards, point_projects, date_20250101):
+    shards = Shards([databasemanager._engine, two_shards])
+    projects_data = [
+        {"name": "shard project 7", "start_date": date_20250101, "end_date": date_20250101},
+        {"name": "shard project 1", "start_date": date_20250101, "end_date": date_20250101},
+    ]
+    with pytest.raises(ProjectExists):
+        await create_project_entries(shards, projects_data, [{}, {}])
+    assert await projects_on_shard(databasemanager._engine) | await projects_on_shard(two_shards) == point_projects
+    for engine in shards.engines:
+        await engine.dispose()
+
+
+def test_bulk_date_change_is_checked_across_shards(client, two_shards, date_20250101, date_20250103, point_feature_file):
+    name = next(
+        f"moved project {i}" for i in range(100)
+        if unique_index_shard(f"moved project {i}", date_20250101, date_20250101, 2)
+        != unique_index_shard(f"moved project {i}", date_20250103, date_20250103, 2)
+    )
+    project_ids = []
+    for day in (date_20250101, date_20250103):
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": day, "end_date": day},
+            files={"file": point_feature_file},
+        )
+        assert response.status_code == 201
+        project_ids.append(response.json()["project_id"])
+
+    response = client.post(
+        "/geojson/bulk-update",
+        json={"project_ids": project_ids[1:], "values": {"start_date": date_20250101, "end_date": date_20250101}},
+    )
+    assert response.status_code == 400
+    assert response.json()["message"] == "Projects with the same name and dates would exist."
+
+    response = client.post(
+        "/geojson/bulk-update",
+        json={"project_ids": project_ids, "values": {"end_date": date_20250103}},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"updated": 2}
+
+
+def test_single_project_operations(client, point_projects, date_20250101, point_feature_file):
+    for name, project_id in point_projects.items():
+        response = client.get(f"/geojson/read/{project_id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == name
+
+    response = client.post(
+        "/geojson/create",
+        params={"name": "shard project 1", "start_date": date_20250101, "end_date": date_20250101},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 400
+
+    response = client.patch(
+        f"/geojson/update/{point_projects['shard project 2']}",
+        params={"name": "shard project 1"},
+    )
+    assert response.status_code == 400
+    assert response.json()["message"] == "Project name: shard project 1 exists."
+
+    response = client.patch(
+        f"/geojson/update/{point_projects['shard project 2']}",
+        params={"name": "renamed project"},
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/geojson/create",
+        params={"name": "renamed project", "start_date": date_20250101, "end_date": date_20250101},
+        files={"file": point_feature_file},
+    )
+    assert response.status_code == 400
+
+    response = client.delete(f"/geojson/delete/{point_projects['shard project 6']}")
+    assert response.status_code == 204
+    response = client.get(f"/geojson/read/{point_projects['shard project 6']}")
+    assert response.status_code == 404
+
+
+def test_lists_are_merged(client, point_projects):
+    project_ids = sorted(point_projects.values())
+
+    response = client.get("/geojson/list")
+    assert response.status_code == 200
+    assert [project["project_id"] for project in response.json()] == project_ids
+
+    response = client.get("/geojson/list-with-pagination", params={"page": 2, "size": 4})
+    response_json = response.json()
+    assert response_json["total"] == 6
+    assert response_json["pages"] == 2
+    assert [project["project_id"] for project in response_json["projects"]] == project_ids[4:]
+
+    response = client.get("/geojson/nearest", params={"lon": 1, "lat": 0, "k": 3})
+    assert [project["project_id"] for project in response.json()] == project_ids[:3]
+
+    response = client.post("/geojson/bulk-delete", json={"name_prefix": "shard project"})
+    assert response.json() == {"deleted": 6}
+    assert client.get("/geojson/list").json() == []
+
+
+def test_overlaps_across_shards(client, two_shards, date_20250101, polygon_feature_dict):
+    project_ids = {}
+    for name in ("polygon a", "polygon b"):
+        response = client.post(
+            "/geojson/create",
+            params={"name": name, "start_date": date_20250101, "end_date": date_20250101},
+            files={"file": ("polygon.json", BytesIO(json.dumps(polygon_feature_dict).encode()))},
+        )
+        assert response.status_code == 201
+        project_ids[name] = response.json()["project_id"]
+    assert project_shard(project_ids["polygon a"], 2) == 1
+    assert project_shard(project_ids["polygon b"], 2) == 0
+
+    response = client.get(f"/geojson/overlaps/{project_ids['polygon b']}")
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["total"] == 1
+    assert response_json["overlaps"][0]["name"] == "polygon a"
+    polygon_area = client.get(f"/geojson/read/{project_ids['polygon a']}").json()["area"]
+    assert response_json["overlaps"][0]["intersection_area"] == pytest.approx(polygon_area, rel=1e-3)
+
+
+async def test_cli_across_shards(tmp_path, two_shards, date_20250101, date_20250103):
+    source = tmp_path / "projects.ndjson"
+    source.write_text("\n".join(
+        json.dumps({
+            "name": f"area {x}",
+            "start_date": date_20250101,
+            "end_date": date_20250103,
+            "geojson": {
+                "type": "Feature",
+                "properties": {},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]],
+                },
+            },
+        })
+        for x in [0, 0.5, 1.25, 5]
+    ))
+    shards = Shards([databasemanager._engine, two_shards])
+
+    assert await import_projects(shards, source) == 4
+    assert await import_projects(shards, source) == 0
+    project_ids = await projects_on_shard(databasemanager._engine) | await projects_on_shard(two_shards)
+    assert len(project_ids) == 4
+    assert all(
+        project_shard(project_id, 2) == unique_index_shard(name, date_20250101, date_20250103, 2)
+        for name, project_id in project_ids.items()
+    )
+    assert project_shard(project_ids["area 0.5"], 2) != project_shard(project_ids["area 1.25"], 2)
+
+    output = tmp_path / "overlaps.ndjson"
+    assert await export_overlaps(shards, output) == 2
+    pairs = {(pair["project_id"], pair["other_project_id"]) for pair in map(json.loads, output.read_text().splitlines())}
+    assert pairs == {
+        tuple(sorted((project_ids["area 0"], project_ids["area 0.5"]))),
+        tuple(sorted((project_ids["area 0.5"], project_ids["area 1.25"]))),
+    }
+
+    assert await export_projects(shards, tmp_path / "backup.ndjson") == 4
+    for engine in shards.engines:
+        await engine.dispose()
+
+
+async def test_coalesced_creates_check_other_shards(two_shards, date_20250101, point_feature_dict):
+    shards = Shards([databasemanager._engine, two_shards])
+    coalescer = CreateCoalescer(window=0.05, max_batch=100)
+    geo_data = get_geo_data_from_feature(point_feature_dict)
+    projects = [
+        {
+            "name": f"coalesced project {i}",
+            "start_date": date.fromisoformat(date_20250101),
+            "end_date": date.fromisoformat(date_20250101),
+            "geo_project_type": "Feature",
+        }
+        for i in range(4)
+    ]
+    # as if renamed into another shard than its placement shard
+    renamed_engine = next(engine for engine in shards.engines if engine is not shards.for_new_project(projects[0]))
+    await create_project_entry(renamed_engine, projects[0], geo_data)
+
+    results = await asyncio.gather(
+        *(coalescer.create(shards, project, geo_data) for project in projects),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], ProjectExists)
+    assert all(isinstance(result, tuple) for result in results[1:])
+    project_ids = await projects_on_shard(databasemanager._engine) | await projects_on_shard(two_shards)
+    assert sorted(project_ids) == [f"coalesced project {i}" for i in range(4)]
+    for engine in shards.engines:
+        await engine.dispose()